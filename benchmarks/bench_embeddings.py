@@ -0,0 +1,89 @@
+"""
+Throughput of the index build embedding backends, in documents per second.
+
+Compares the in-process HuggingFace model used so far with ProcessPoolEmbedding
+for each `--processes` value. Documents are built from the chunks file when it
+exists, otherwise generated synthetically. The embedding cache is not used.
+
+Usage:
+    python -m benchmarks.bench_embeddings [--docs 2000] [--processes 2 4 8]
+                                          [--batch-size 32]
+"""
+
+import argparse
+import time
+from functools import partial
+from itertools import islice
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+from src.constants import CHUNKS_PATH
+from src.constants import EMBED_BATCH_SIZE
+from src.constants import EMBEDDING_MODEL_NAME
+from src.embeddings import ProcessPoolEmbedding
+from src.storage import iter_jsonl
+
+
+def load_texts(n: int) -> list[str]:
+    if CHUNKS_PATH.exists():
+        # Imported here: the worker processes re-import this module
+        from src.rag_index import build_documents
+        from src.rag_index import get_catalog
+
+        chunks = list(islice(iter_jsonl(CHUNKS_PATH), n))
+        docs = build_documents(chunks, get_catalog())
+        return [doc.get_content() for doc in docs]
+    return [
+        f"Anime: Title {i} (ID: {i})\nSynopsis: "
+        + " ".join(f"word{(i * j) % 997}" for j in range(150))
+        for i in range(n)
+    ]
+
+
+def docs_per_second(  # type: ignore[no-any-unimported]
+    model: BaseEmbedding, texts: list[str]
+) -> tuple[float, np.ndarray]:
+    model.get_text_embedding_batch(texts[:8])  # Load the model(s), warm up
+    start = time.perf_counter()
+    vectors = model.get_text_embedding_batch(texts)
+    return len(texts) / (time.perf_counter() - start), np.asarray(vectors)
+
+
+def main() -> None:
+    from src.rag_index import load_embedding_backend  # See load_texts
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    args = parser.parse_args()
+
+    texts = load_texts(args.docs)
+    print(f"{len(texts)} documents")
+
+    baseline = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL_NAME)
+    base_rate, expected = docs_per_second(baseline, texts)
+    print(f"In-process          : {base_rate:8.1f} docs/s")
+
+    for processes in args.processes:
+        model = ProcessPoolEmbedding(
+            partial(load_embedding_backend, "torch"),
+            model_name=EMBEDDING_MODEL_NAME,
+            processes=processes,
+            batch_size=args.batch_size,
+        )
+        try:
+            rate, vectors = docs_per_second(model, texts)
+        finally:
+            model.close()
+        error = np.abs(vectors - expected).max()
+        print(
+            f"{processes:2d} processes x {args.batch_size:3d}: {rate:8.1f} docs/s "
+            f"({rate / base_rate:.1f}x), max abs diff {error:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
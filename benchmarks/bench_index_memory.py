@@ -0,0 +1,143 @@
+"""
+Peak memory of a full index build for synthetic catalogs of increasing size.
+
+Each build runs in its own process, with the data paths of `src.rag_index`
+pointed at a temporary directory and a mock embedding model (same dimension as
+bge-small), so only the chunk / document / vector store pipeline is measured.
+Two modes are compared:
+
+- stream: `build_and_persist_vector_index`, metadata file to vector store in
+  batches of INDEX_INSERT_BATCH_SIZE documents
+- list: every chunk, then every document, built in memory before embedding, as
+  the index used to be built
+
+Usage:
+    python -m benchmarks.bench_index_memory [--titles 1000 10000 50000]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.embeddings import MockEmbedding
+
+from src.constants import EMBEDDING_MODEL_NAME
+from src.storage import data_path
+from src.storage import write_json
+
+EMBED_DIM = 384  # bge-small
+CHILD_COMMAND = (sys.executable, "-m", "benchmarks.bench_index_memory", "--child")
+
+
+def write_catalog(meta_dir: Path, titles: int, episodes: int = 12) -> None:
+    for mal_id in range(1, titles + 1):
+        write_json(
+            data_path(meta_dir, str(mal_id)),
+            {
+                "summary": {
+                    "mal_id": mal_id,
+                    "title": f"Title {mal_id}",
+                    "url": f"https://myanimelist.net/anime/{mal_id}",
+                    "synopsis": f"Synopsis of title {mal_id}. " * 20,
+                    "score": 7.5,
+                },
+                "episodes": [
+                    {
+                        "mal_id": e,
+                        "title": f"Episode {e}",
+                        "url": f"https://myanimelist.net/anime/{mal_id}/x/episode/{e}",
+                        "synopsis": f"What happens in episode {e}. " * 10,
+                        "score": 4.5,
+                    }
+                    for e in range(1, episodes + 1)
+                ],
+            },
+        )
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def mock_embedding(backend: str, threads: int = 0) -> BaseEmbedding:  # type: ignore[no-any-unimported]  # noqa: ARG001
+    return MockEmbedding(embed_dim=EMBED_DIM, model_name=EMBEDDING_MODEL_NAME)
+
+
+def run_build(workdir: Path, mode: str) -> dict[str, float]:
+    """Build the index of `workdir`/metadata in this process."""
+    from llama_index.core import StorageContext
+    from llama_index.core import VectorStoreIndex
+    from llama_index.vector_stores.chroma import ChromaVectorStore
+
+    from src import rag_index
+
+    rag_index.META_DIR = workdir / "metadata"
+    rag_index.CHUNKS_PATH = workdir / mode / "chunks.jsonl.zst"
+    rag_index.CHUNKS_JSON = workdir / mode / "chunks.json"
+    rag_index.CHROMA_DIR = workdir / mode / "chroma"
+    rag_index.INDEX_MANIFEST_PATH = workdir / mode / "chroma_manifest.json"
+    rag_index.EMBEDDING_CACHE_PATH = workdir / mode / "embedding_cache.sqlite"
+    rag_index.CATALOG_PATH = workdir / mode / "catalog.sqlite"
+    rag_index.load_embedding_backend = mock_embedding
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "stream":
+        rag_index.build_and_persist_vector_index(force_recreate=True, embed_processes=0)
+    else:
+        chunks = list(rag_index.iter_chunks(force_recreate=True))
+        docs = rag_index.build_documents(chunks, rag_index.get_catalog())
+        client = rag_index.chromadb.PersistentClient(path=str(rag_index.CHROMA_DIR))
+        collection = client.get_or_create_collection("anime")
+        storage_context = StorageContext.from_defaults(
+            vector_store=ChromaVectorStore(chroma_collection=collection)
+        )
+        VectorStoreIndex.from_documents(
+            docs,
+            storage_context=storage_context,
+            embed_model=rag_index.get_embed_model(),
+        )
+    return {
+        "seconds": time.perf_counter() - start,
+        "baseline_mb": baseline,
+        "peak_mb": peak_rss_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--titles", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--modes", nargs="+", default=["stream", "list"])
+    parser.add_argument("--child", nargs=2, metavar=("WORKDIR", "MODE"))
+    args = parser.parse_args()
+
+    if args.child:
+        workdir, mode = args.child
+        print(json.dumps(run_build(Path(workdir), mode)))
+        return
+
+    print(f"{'titles':>7} {'mode':<7} {'seconds':>8} {'base MB':>8} {'peak MB':>8}")
+    for titles in args.titles:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_catalog(Path(tmp) / "metadata", titles)
+            for mode in args.modes:
+                child = subprocess.run(
+                    [*CHILD_COMMAND, tmp, mode],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                print(
+                    f"{titles:>7} {mode:<7} {result['seconds']:8.1f} "
+                    f"{result['baseline_mb']:8.0f} {result['peak_mb']:8.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
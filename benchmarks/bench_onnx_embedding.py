@@ -0,0 +1,102 @@
+"""
+Accuracy versus latency of the ONNX Runtime embedding backends against PyTorch.
+
+For each backend this reports the model load time, the latency of embedding one
+question (the query-time cost in `run_rag_chatbot`), the mean cosine similarity
+of its query and document vectors with the PyTorch ones, and the retrieval
+overlap@5: the share of the PyTorch top 5 documents it retrieves when its query
+vectors search the PyTorch document vectors, as an existing index would be.
+
+Usage:
+    python -m benchmarks.bench_onnx_embedding [--docs 1000] [--queries 100]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from benchmarks.bench_embeddings import load_texts
+from src.constants import SIMILARITY_TOP_K
+from src.rag_index import EMBEDDING_BACKENDS
+from src.rag_index import load_embedding_backend
+
+QUESTIONS = (
+    "What happens in episode {n} of {title}?",
+    "Which episode of {title} has the best score?",
+    "Summarize the story of {title}.",
+    "Who is the main character of {title}?",
+)
+
+
+def make_queries(texts: list[str], n: int) -> list[str]:
+    titles = [text.split(" (ID:", 1)[0].removeprefix("Anime: ") for text in texts]
+    return [
+        QUESTIONS[i % len(QUESTIONS)].format(
+            n=i % 12 + 1, title=titles[i % len(titles)]
+        )
+        for i in range(n)
+    ]
+
+
+def top_k(queries: np.ndarray, docs: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+
+def mean_cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(np.sum(a * b, axis=1)))  # Both sides are normalized
+
+
+def bench_backend(  # type: ignore[no-any-unimported]
+    model: BaseEmbedding, texts: list[str], queries: list[str]
+) -> tuple[np.ndarray, np.ndarray, list[float]]:
+    model.get_query_embedding("warm up")
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(model.get_query_embedding(query))
+        latencies.append(time.perf_counter() - start)
+    doc_vectors = np.asarray(model.get_text_embedding_batch(texts))
+    return np.asarray(query_vectors), doc_vectors, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    texts = load_texts(args.docs)
+    queries = make_queries(texts, args.queries)
+    print(f"{len(texts)} documents, {len(queries)} queries")
+    print(
+        f"{'backend':<10} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+        f"{'cos query':>9} {'cos doc':>8} {'overlap@' + str(SIMILARITY_TOP_K):>10}"
+    )
+
+    reference: tuple[np.ndarray, np.ndarray] | None = None
+    for backend in EMBEDDING_BACKENDS:
+        start = time.perf_counter()
+        model = load_embedding_backend(backend)
+        load_seconds = time.perf_counter() - start
+        query_vectors, doc_vectors, latencies = bench_backend(model, texts, queries)
+        if reference is None:  # "torch" comes first
+            reference = query_vectors, doc_vectors
+        ref_queries, ref_docs = reference
+        expected = top_k(ref_queries, ref_docs, SIMILARITY_TOP_K)
+        found = top_k(query_vectors, ref_docs, SIMILARITY_TOP_K)
+        overlap = np.mean(
+            [len(set(e) & set(f)) / SIMILARITY_TOP_K for e, f in zip(expected, found)]
+        )
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(
+            f"{backend:<10} {load_seconds:7.2f} {p50:7.2f} {p95:7.2f} "
+            f"{mean_cosine(query_vectors, ref_queries):9.4f} "
+            f"{mean_cosine(doc_vectors, ref_docs):8.4f} {overlap:10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
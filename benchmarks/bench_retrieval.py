@@ -0,0 +1,120 @@
+"""
+Hit rate and latency of dense, BM25 and hybrid (reciprocal rank fusion)
+retrieval over a question set, on the built index (see `src.rag_index`), and of
+hybrid retrieval restricted to the anime named in the question ("titles").
+
+A question is a hit when one of the `--top-k` retrieved nodes belongs to the
+expected anime; MRR is the mean reciprocal rank of the first such node. The
+question set is a JSON Lines file of {"question": ..., "mal_id": ...} records,
+or by default questions generated from a sample of the indexed chunks: the
+anime of a title, of an episode title, and of an episode number.
+
+Usage:
+    python -m benchmarks.bench_retrieval [--questions questions.jsonl]
+                                         [--sample 200] [--top-k 5]
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from llama_index.core.schema import QueryBundle
+
+from src.constants import CHUNKS_PATH
+from src.constants import SIMILARITY_TOP_K
+from src.storage import iter_jsonl
+
+Retrieve = Callable[[str], list[Any]]  # mal_id of each retrieved node, best first
+
+
+def generate_questions(sample: int, seed: int = 0) -> list[dict[str, Any]]:
+    chunks = [c for c in iter_jsonl(CHUNKS_PATH) if c.get("episodes")]
+    questions = []
+    for chunk in random.Random(seed).sample(chunks, min(sample, len(chunks))):
+        episode = chunk["episodes"][0]
+        for question in (
+            f"What is {chunk['title']} about?",
+            f'Which anime has an episode titled "{episode["title"]}"?',
+            f"What happens in episode {episode['episode_id']} of {chunk['title']}?",
+        ):
+            questions.append({"question": question, "mal_id": chunk["mal_id"]})
+    return questions
+
+
+def load_retrievers(top_k: int) -> dict[str, Retrieve]:
+    from src.rag_index import build_and_persist_vector_index
+    from src.rag_index import get_title_index
+    from src.rag_index import load_bm25_index
+    from src.retrieval import HybridRetriever
+    from src.retrieval import fetch_nodes
+
+    index = build_and_persist_vector_index()
+    bm25 = load_bm25_index(index.vector_store)
+    dense = index.as_retriever(similarity_top_k=top_k)
+    hybrid = HybridRetriever(index, bm25, similarity_top_k=top_k)
+    titles = HybridRetriever(index, bm25, get_title_index(), similarity_top_k=top_k)
+
+    def sparse(question: str) -> list[Any]:
+        node_ids = [node_id for node_id, _ in bm25.search(question, top_k)]
+        nodes = {n.node_id: n for n in fetch_nodes(index.vector_store, node_ids)}
+        return [nodes[i].metadata.get("mal_id") for i in node_ids if i in nodes]
+
+    return {
+        "dense": lambda q: [n.node.metadata.get("mal_id") for n in dense.retrieve(q)],
+        "bm25": sparse,
+        "hybrid": lambda q: [
+            n.node.metadata.get("mal_id") for n in hybrid.retrieve(QueryBundle(q))
+        ],
+        "titles": lambda q: [
+            n.node.metadata.get("mal_id") for n in titles.retrieve(QueryBundle(q))
+        ],
+    }
+
+
+def evaluate(
+    retrieve: Retrieve, questions: list[dict[str, Any]]
+) -> tuple[float, float, float, float]:
+    """Hit rate, MRR, and p50 / p95 latency in ms."""
+    latencies = []
+    hits = 0
+    reciprocal_ranks = 0.0
+    for question in questions:
+        start = time.perf_counter()
+        mal_ids = retrieve(question["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if question["mal_id"] in mal_ids:
+            hits += 1
+            reciprocal_ranks += 1 / (mal_ids.index(question["mal_id"]) + 1)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    n = len(questions)
+    return hits / n, reciprocal_ranks / n, float(p50), float(p95)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=Path)
+    parser.add_argument("--sample", type=int, default=200, help="Generated chunks")
+    parser.add_argument("--top-k", type=int, default=SIMILARITY_TOP_K)
+    args = parser.parse_args()
+
+    if args.questions:
+        questions = list(iter_jsonl(args.questions))
+    else:
+        questions = generate_questions(args.sample)
+    retrievers = load_retrievers(args.top_k)
+    for retrieve in retrievers.values():  # Warm up: query embedding model
+        retrieve(questions[0]["question"])
+
+    print(f"{len(questions)} questions, top {args.top_k}")
+    print(f"{'retriever':<9} {'hit rate':>8} {'MRR':>6} {'p50 ms':>7} {'p95 ms':>7}")
+    for name, retrieve in retrievers.items():
+        hit_rate, mrr, p50, p95 = evaluate(retrieve, questions)
+        print(f"{name:<9} {hit_rate:8.3f} {mrr:6.3f} {p50:7.2f} {p95:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Microbenchmark of the MAL episode synopsis extractors.
+
+Pages are read, in order of preference, from `--pages-dir` (*.html files), from the
+MyAnimeList responses stored in the ingest HTTP cache, or generated synthetically.
+
+Usage:
+    python -m benchmarks.bench_synopsis [--pages-dir DIR] [--rounds 3]
+"""
+
+import argparse
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from loguru import logger
+
+from src.constants import HTTP_CACHE_PATH
+from src.parsers.synopsis import extract_synopsis
+from src.parsers.synopsis import extract_synopsis_bs4
+
+
+def load_cached_pages(cache_path: Path) -> list[str]:
+    if not cache_path.exists():
+        return []
+    with sqlite3.connect(cache_path) as conn:
+        rows = conn.execute(
+            "SELECT body FROM responses WHERE key LIKE 'https://myanimelist.net/%'"
+        ).fetchall()
+    return [body.decode("utf-8", errors="replace") for (body,) in rows]
+
+
+def synthetic_page(episode: int) -> str:
+    """A page shaped like a MAL episode page: ~150KB, synopsis in the middle."""
+    filler = "".join(
+        f'<div class="row"><div class="cell"><a href="/x/{i}">Link {i}</a></div>'
+        f"<span>Item &amp; {i}</span></div>"
+        for i in range(1200)
+    )
+    script = '<script>var tpl = "<div><h2>Synopsis</h2>not this</div>";</script>'
+    return (
+        f"<html><head>{script}</head><body><div id='contentWrapper'>{filler}"
+        f"<div class='js-scrollfix-bottom-rel'><h2>Synopsis</h2>"
+        f"Episode {episode} synopsis with <b>markup</b> &quot;quotes&quot;.<br>"
+        f"(Source: Crunchyroll)</div>{filler}</div></body></html>"
+    )
+
+
+def pages_per_second(extract: Callable[[str], str | None], pages: list[str]) -> float:
+    start = time.perf_counter()
+    for page in pages:
+        extract(page)
+    return len(pages) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages-dir", type=Path)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.pages_dir:
+        pages = [p.read_text(encoding="utf-8") for p in args.pages_dir.glob("*.html")]
+    else:
+        pages = load_cached_pages(HTTP_CACHE_PATH)
+    source = "saved" if pages else "synthetic"
+    pages = pages or [synthetic_page(i) for i in range(50)]
+
+    logger.remove()  # extractor warnings would dominate the timing
+    mismatches = sum(extract_synopsis(p) != extract_synopsis_bs4(p) for p in pages)
+    bs4_rate = max(
+        pages_per_second(extract_synopsis_bs4, pages) for _ in range(args.rounds)
+    )
+    fast_rate = max(
+        pages_per_second(extract_synopsis, pages) for _ in range(args.rounds)
+    )
+
+    print(f"{len(pages)} {source} pages, {mismatches} mismatches")
+    print(f"BeautifulSoup : {bs4_rate:10.1f} pages/s")
+    print(f"Regex scanner : {fast_rate:10.1f} pages/s ({fast_rate / bs4_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
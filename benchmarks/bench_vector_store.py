@@ -0,0 +1,140 @@
+"""
+Load time, query latency and recall of the Chroma collection against the
+memory-mapped NumPy vector store, on synthetic clustered unit vectors (same
+dimension as bge-small).
+
+Each store is written to a temporary directory, then reopened: the load time is
+the time until the first query returns. Recall@k is measured against an exact
+float32 search. The NumPy store is measured as float16, int8, and partitioned
+into IVF lists (`NUMPY_IVF_MIN_VECTORS` lowered so every size is partitioned).
+
+Usage:
+    python -m benchmarks.bench_vector_store [--vectors 10000 50000]
+                                            [--queries 200] [--top-k 5]
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from src.numpy_vector_store import NumpyVectorStore
+from src.numpy_vector_store import normalize
+
+EMBED_DIM = 384  # bge-small
+CLUSTERS = 200
+CHROMA_BATCH_SIZE = 5000
+
+Search = Callable[[np.ndarray], list[int]]
+
+
+def make_vectors(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(CLUSTERS, EMBED_DIM))
+    vectors = centers[rng.integers(0, CLUSTERS, n)] + rng.normal(size=(n, EMBED_DIM))
+    return normalize(vectors).astype(np.float32)
+
+
+def open_chroma(path: Path, vectors: np.ndarray, top_k: int) -> Search:
+    collection = chromadb.PersistentClient(path=str(path)).get_or_create_collection(
+        "bench", metadata={"hnsw:space": "cosine"}
+    )
+    for start in range(0, len(vectors), CHROMA_BATCH_SIZE):
+        batch = vectors[start : start + CHROMA_BATCH_SIZE]
+        collection.add(
+            ids=[str(i) for i in range(start, start + len(batch))],
+            embeddings=batch,
+            documents=["text"] * len(batch),
+        )
+    del collection
+    loaded: chromadb.Collection | None = None
+
+    def search(vector: np.ndarray) -> list[int]:
+        nonlocal loaded
+        if loaded is None:
+            client = chromadb.PersistentClient(path=str(path))
+            loaded = client.get_collection("bench")
+        ids = loaded.query(query_embeddings=[vector], n_results=top_k)["ids"][0]
+        return [int(i) for i in ids]
+
+    return search
+
+
+def open_numpy(path: Path, vectors: np.ndarray, top_k: int, **kwargs: Any) -> Search:
+    store = NumpyVectorStore(**kwargs)
+    store.add(
+        [
+            TextNode(id_=str(i), text="text", embedding=vector.tolist())
+            for i, vector in enumerate(vectors)
+        ]
+    )
+    store.persist(str(path))
+    loaded: NumpyVectorStore | None = None
+
+    def search(vector: np.ndarray) -> list[int]:
+        nonlocal loaded
+        if loaded is None:
+            loaded = NumpyVectorStore.from_persist_dir(path)
+        query = VectorStoreQuery(
+            query_embedding=vector.tolist(), similarity_top_k=top_k
+        )
+        return [int(i) for i in loaded.query(query).ids or []]
+
+    return search
+
+
+def measure(
+    search: Search, vectors: np.ndarray, queries: np.ndarray, top_k: int
+) -> tuple[float, float, float, float]:
+    """Load time in seconds, p50 / p95 query latency in ms, and recall@k."""
+    start = time.perf_counter()
+    search(queries[0])
+    load = time.perf_counter() - start
+    latencies = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        ids = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        exact = np.argpartition(-(vectors @ query), top_k)[:top_k]
+        hits += len(set(ids) & set(exact.tolist()))
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return load, float(p50), float(p95), hits / (len(queries) * top_k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    stores: dict[str, Callable[..., Search]] = {
+        "chroma": open_chroma,
+        "float16": lambda *a: open_numpy(*a, dtype="float16"),
+        "int8": lambda *a: open_numpy(*a, dtype="int8"),
+        "ivf": lambda *a: open_numpy(*a, dtype="float16", ivf_min_vectors=1),
+    }
+    print(
+        f"{'vectors':>8} {'store':<8} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} "
+        f"{'recall@' + str(args.top_k):>9}"
+    )
+    for n in args.vectors:
+        # Queries drawn from the same clusters as the stored vectors
+        vectors, queries = np.split(make_vectors(n + args.queries), [n])
+        for name, open_store in stores.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                search = open_store(Path(tmp), vectors, args.top_k)
+                load, p50, p95, recall = measure(search, vectors, queries, args.top_k)
+            print(f"{n:>8} {name:<8} {load:7.2f} {p50:7.2f} {p95:7.2f} {recall:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
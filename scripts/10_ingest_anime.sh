@@ -8,4 +8,4 @@ fi
 
 QUERY="$1"
 
-python -c "from src.ingest import ingest_anime_metadata; ingest_anime_metadata(\"$QUERY\")"
+python -m src.ingest --query "$QUERY"
@@ -0,0 +1,10 @@
+#!/bin/bash
+# Usage: ./11_crawl_catalog.sh [--queries-file FILE] [--season 2022/spring] [--top-pages N]
+# Bulk crawl: titles from every source are deduped before any episode is fetched.
+
+if [ -z "$1" ]; then
+  echo "Usage: $0 [--queries-file FILE] [--season YEAR/SEASON]... [--top-pages N]"
+  exit 1
+fi
+
+python -m src.ingest "$@"
@@ -1,14 +1,17 @@
-import src.setup_telemetry  # noqa: F401, I001
 from typing import Any
 
 import gradio as gr
 
+from src.chat_sessions import DEFAULT_SESSION_ID
 from src.query_engine import reset_chat
 from src.query_engine import run_rag_chatbot
+from src.setup_telemetry import init_telemetry
 
 
-def parse_chatbot(
-    message: str, chat_history: list[dict[str, Any]] | None = None
+def parse_chatbot(  # type: ignore[no-any-unimported]
+    message: str,
+    chat_history: list[dict[str, Any]] | None,
+    request: gr.Request,
 ) -> tuple[str, list[dict[str, Any]]]:
     """
     Gradio uses the first argument of the function as a pre-written text to
@@ -16,11 +19,19 @@ def parse_chatbot(
     returns the last response from the chatbot of the first argument.
     Therefore, we will only use the run_rag_chatbot for the `history` and
     return empty for the pre-written text.
+
+    Each browser tab is a chat session, identified by its Gradio session hash.
     """
-    return "", run_rag_chatbot(message, chat_history)[1]
+    session_id = request.session_hash or DEFAULT_SESSION_ID
+    return "", run_rag_chatbot(message, chat_history, session_id)[1]
+
+
+def reset_session(request: gr.Request) -> list[dict[str, Any]]:  # type: ignore[no-any-unimported]
+    return reset_chat(request.session_hash or DEFAULT_SESSION_ID)
 
 
 def create_gradio_app() -> gr.Blocks:  # type: ignore[no-any-unimported]
+    init_telemetry()  # Traced however the app is launched; only runs once
     with gr.Blocks() as demo:
         gr.Markdown("# Chatbot")
         chatbot = gr.Chatbot(type="messages")
@@ -29,7 +40,7 @@ def create_gradio_app() -> gr.Blocks:  # type: ignore[no-any-unimported]
             placeholder="Hello, can you tell me about Naruto?",
         )
         reset = gr.Button("Reset")
-        reset.click(reset_chat, None, chatbot, queue=False)
+        reset.click(reset_session, None, chatbot, queue=False)
         msg.submit(parse_chatbot, [msg, chatbot], [msg, chatbot])
     return demo
 
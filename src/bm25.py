@@ -0,0 +1,155 @@
+import re
+from collections import Counter
+from collections.abc import Collection
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from scipy import sparse  # type: ignore[import-untyped]
+
+from src.constants import BM25_B
+from src.constants import BM25_K1
+from src.storage import atomic_open
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words of `text`: letters, digits and underscores, any script."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _join(strings: Iterable[str]) -> np.ndarray:
+    # One byte buffer: an array of str would pad every entry to the longest one
+    return np.frombuffer("\n".join(strings).encode(), dtype=np.uint8)
+
+
+def _split(buffer: np.ndarray) -> list[str]:
+    text = buffer.tobytes().decode()
+    return text.split("\n") if text else []
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index of the nodes of the vector store, searched along
+    with it by `src.retrieval.HybridRetriever`.
+
+    The BM25 weight of every (term, node) pair is computed once at build time, so
+    a search only sums the sparse rows of the query terms. The MyAnimeList ID of
+    each node (-1 without one) restricts searches to some anime. The index is
+    saved as a single `.npz` file and tagged with the `version` of the vector
+    index it was built from (see `src.rag_index.load_bm25_index`).
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self,
+        node_ids: list[str],
+        mal_ids: np.ndarray,
+        vocabulary: dict[str, int],
+        weights: sparse.csr_array,
+        version: str = "",
+    ) -> None:
+        self.node_ids = node_ids
+        self.mal_ids = mal_ids
+        self.vocabulary = vocabulary
+        self.weights = weights  # Terms x nodes
+        self.version = version
+
+    @classmethod
+    def build(
+        cls,
+        entries: Iterable[tuple[str, str, int | None]],
+        version: str = "",
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> "BM25Index":
+        """
+        Index `entries`, (node ID, text, MyAnimeList ID) triples, streamed: only
+        the term counts of each node are kept.
+        """
+        node_ids: list[str] = []
+        mal_ids: list[int] = []
+        vocabulary: dict[str, int] = {}
+        terms: list[np.ndarray] = []
+        frequencies: list[np.ndarray] = []
+        lengths: list[int] = []
+        for node_id, text, mal_id in entries:
+            counts = Counter(
+                vocabulary.setdefault(token, len(vocabulary))
+                for token in tokenize(text)
+            )
+            node_ids.append(node_id)
+            mal_ids.append(-1 if mal_id is None else mal_id)
+            terms.append(np.fromiter(counts.keys(), np.int32, len(counts)))
+            frequencies.append(np.fromiter(counts.values(), np.float32, len(counts)))
+            lengths.append(counts.total())
+        if not node_ids:
+            empty = sparse.csr_array((0, 0), dtype=np.float32)
+            return cls([], np.empty(0, np.int64), {}, empty, version)
+
+        nodes = np.repeat(np.arange(len(node_ids)), [len(t) for t in terms])
+        term_ids = np.concatenate(terms)
+        tf = np.concatenate(frequencies)
+        doc_lengths = np.asarray(lengths, dtype=np.float32)
+        doc_freq = np.bincount(term_ids, minlength=len(vocabulary))
+        idf = np.log1p((len(node_ids) - doc_freq + 0.5) / (doc_freq + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths / max(doc_lengths.mean(), 1.0))
+        weights = idf[term_ids] * tf * (k1 + 1) / (tf + norm[nodes])
+        matrix = sparse.csr_array(
+            (weights.astype(np.float32), (term_ids, nodes)),
+            shape=(len(vocabulary), len(node_ids)),
+        )
+        logger.info(f"BM25 index built: {len(node_ids)} nodes, {len(vocabulary)} terms")
+        return cls(node_ids, np.asarray(mal_ids), vocabulary, matrix, version)
+
+    def search(
+        self, query: str, top_k: int, mal_ids: Collection[int] = ()
+    ) -> list[tuple[str, float]]:
+        """
+        The `top_k` nodes with the highest BM25 score for `query`, of the anime
+        with one of `mal_ids` if any.
+
+        Returns:
+            list[tuple[str, float]]: Node IDs and scores, best first. Nodes sharing
+            no term with the query are left out.
+        """
+        terms = [self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary]
+        if not terms or top_k <= 0:
+            return []
+        scores = np.asarray(self.weights[terms].sum(axis=0)).ravel()
+        if mal_ids:
+            scores[~np.isin(self.mal_ids, list(mal_ids))] = 0
+        matches = np.flatnonzero(scores)
+        if len(matches) > top_k:
+            matches = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return [(self.node_ids[i], float(scores[i])) for i in matches]
+
+    def save(self, path: Path) -> None:
+        with atomic_open(path) as f:
+            np.savez(
+                f,
+                data=self.weights.data,
+                indices=self.weights.indices,
+                indptr=self.weights.indptr,
+                shape=np.asarray(self.weights.shape),
+                vocabulary=_join(self.vocabulary),
+                node_ids=_join(self.node_ids),
+                mal_ids=self.mal_ids,
+                version=_join([self.version]),
+            )
+        logger.info(f"BM25 index saved to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path) as arrays:
+            weights = sparse.csr_array(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(arrays["shape"]),
+            )
+            vocabulary = {t: i for i, t in enumerate(_split(arrays["vocabulary"]))}
+            node_ids = _split(arrays["node_ids"])
+            mal_ids = arrays["mal_ids"]
+            version = arrays["version"].tobytes().decode()
+        return cls(node_ids, mal_ids, vocabulary, weights, version)
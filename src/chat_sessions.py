@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+
+from llama_index.core.chat_engine.types import BaseChatEngine
+from loguru import logger
+
+from src.constants import CHAT_SESSION_IDLE_TTL
+from src.constants import CHAT_SESSIONS_MAX
+from src.constants import CHAT_SESSIONS_MAX_CHARS
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class ChatSession:
+    engine: BaseChatEngine  # type: ignore[no-any-unimported]
+    used_at: float
+    chars: int = 0  # Length of the chat history kept by the engine memory
+    users: int = 0  # Callers holding or waiting for the engine
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ChatEnginePool:
+    """
+    Chat engines by session ID, each with its own memory, so that concurrent
+    users neither share their conversation nor wait for each other. The engines
+    come from `new_engine`, which shares the index, retriever, embedding model
+    and LLM client between them (see `src.query_engine.init_model`).
+
+    Sessions idle for `idle_ttl` seconds are dropped, and the least recently used
+    ones past `max_sessions`, or once the chat histories of all sessions exceed
+    `max_chars` characters. A session in use is never dropped.
+
+    Use:
+        with pool.session(session_id) as chat_engine:
+            chat_engine.chat(message)
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self,
+        new_engine: Callable[[], BaseChatEngine],
+        max_sessions: int = CHAT_SESSIONS_MAX,
+        max_chars: int = CHAT_SESSIONS_MAX_CHARS,
+        idle_ttl: float = CHAT_SESSION_IDLE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.new_engine = new_engine
+        self.max_sessions = max_sessions
+        self.max_chars = max_chars
+        self.idle_ttl = idle_ttl
+        self.evictions = 0
+        self._clock = clock
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def chars(self) -> int:
+        """Characters of the chat histories of all sessions."""
+        return self._chars
+
+    def _get(self, session_id: str) -> ChatSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(self.new_engine(), self._clock())
+                self._sessions[session_id] = session
+            session.used_at = self._clock()
+            session.users += 1
+            self._sessions.move_to_end(session_id)
+            self._evict()
+            return session
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[BaseChatEngine]:  # type: ignore[no-any-unimported]
+        """
+        The chat engine of `session_id`, created if needed, held by one caller
+        at a time.
+        """
+        session = self._get(session_id)
+        chars = session.chars
+        try:
+            with session.lock:
+                try:
+                    yield session.engine
+                finally:
+                    history = session.engine.chat_history
+                    chars = sum(len(message.content or "") for message in history)
+        finally:
+            with self._lock:
+                session.users -= 1
+                self._chars += chars - session.chars
+                session.chars = chars
+                session.used_at = self._clock()
+                self._evict()
+
+    def reset(self, session_id: str) -> None:
+        """Clear the chat history of `session_id` only, if it exists."""
+        with self._lock:
+            if session_id not in self._sessions:
+                return
+        with self.session(session_id) as chat_engine:
+            chat_engine.reset()
+
+    def _evict(self) -> None:
+        """Drop idle sessions, then the least recently used while over a limit."""
+        now = self._clock()
+        for session_id, session in list(self._sessions.items()):
+            if session.users:
+                continue
+            over_limit = (
+                len(self._sessions) > self.max_sessions or self._chars > self.max_chars
+            )
+            if not over_limit and now - session.used_at < self.idle_ttl:
+                break  # Sessions are ordered from least to most recently used
+            del self._sessions[session_id]
+            self._chars -= session.chars
+            self.evictions += 1
+            logger.info(f"Chat session {session_id} dropped: {session.chars} chars")
@@ -1,23 +1,123 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-CHUNKS_JSON = BASE_DIR / "data" / "index" / "chunks.json"
+CHUNKS_JSON = BASE_DIR / "data" / "index" / "chunks.json"  # Legacy, see src.storage
+CHUNKS_PATH = BASE_DIR / "data" / "index" / "chunks.jsonl.zst"
 CHROMA_DIR = BASE_DIR / "data" / "chroma/"
 RAW_DIR = BASE_DIR / "data" / "raw"
 META_DIR = BASE_DIR / "data" / "metadata"
 SUMMARY_DIR = BASE_DIR / "data" / "summaries"
+HTTP_CACHE_PATH = BASE_DIR / "data" / "http_cache.sqlite"
+JOURNAL_PATH = BASE_DIR / "data" / "ingest_journal.sqlite"
+REGISTRY_PATH = BASE_DIR / "data" / "registry.sqlite"
+EMBEDDING_CACHE_PATH = BASE_DIR / "data" / "embedding_cache.sqlite"
+CATALOG_PATH = BASE_DIR / "data" / "catalog.sqlite"
+INDEX_MANIFEST_PATH = BASE_DIR / "data" / "chroma_manifest.json"
+NUMPY_STORE_DIR = BASE_DIR / "data" / "vectors"
+BM25_INDEX_PATH = BASE_DIR / "data" / "bm25.npz"
+ONNX_MODEL_DIR = BASE_DIR / "data" / "onnx" / "bge-small-en-v1.5"
 PROMPT_DIR = BASE_DIR / "src" / "prompts"
 
-CHUNKS_JSON.parent.mkdir(parents=True, exist_ok=True)
-CHROMA_DIR.mkdir(parents=True, exist_ok=True)
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-META_DIR.mkdir(parents=True, exist_ok=True)
-SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
-
-
 JIKAN_BASE = "https://api.jikan.moe/v4"
 CHUNK_SIZE = 13  # Number of episodes per chunk
 
 EMBEDDING_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+# Runtime of the embedding model: "torch", "onnx" (float32) or "onnx-int8"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
 GROQ_MODEL_NAME = "llama3-70b-8192"
+PROMPT_VERSION = "v1"  # System prompt, see src.prompts.manager
 SIMILARITY_TOP_K = 5  # Number of top similar chunks to retrieve
+CHAT_MEMORY_TOKEN_LIMIT = 512  # Chat history sent to the LLM
+# Chat sessions, each with its own chat engine memory (see src.chat_sessions):
+# idle ones are dropped, and the least recently used past these limits
+CHAT_SESSIONS_MAX = 1000
+CHAT_SESSIONS_MAX_CHARS = 32 * 2**20  # Chat histories of all sessions
+CHAT_SESSION_IDLE_TTL = 3600  # Seconds
+EMBEDDING_CACHE_MAX_BYTES = 2 * 1024**3  # ~1.4M bge-small vectors
+EMBED_PROCESSES = min(4, os.cpu_count() or 1)  # Index builds; 0 embeds in-process
+EMBED_BATCH_SIZE = 32  # Texts per batch sent to an embedding process
+INDEX_INSERT_BATCH_SIZE = 512  # Documents split, embedded and stored at a time
+# Indexed documents: "chunk", one per CHUNK_SIZE episodes, or "hierarchical", one
+# per episode under one per anime, its parent, added to the retrieved episodes
+INDEX_MODE = os.getenv("INDEX_MODE", "chunk")
+# Vector store of the index: "chroma" or "numpy", an in-process memory-mapped
+# matrix (see src.numpy_vector_store) for single-node deployments
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")
+NUMPY_VECTOR_DTYPE = os.getenv("NUMPY_VECTOR_DTYPE", "float16")  # Or "int8"
+NUMPY_IVF_MIN_VECTORS = 20_000  # Exact search below, sqrt(n) IVF lists above
+NUMPY_IVF_PROBES = 16  # IVF lists scanned per query
+INDEX_FORMAT_VERSION = 2  # Bump when build_documents changes the indexed text
+# Chat engine retrieval: "dense" (vector store only) or "hybrid", dense and BM25
+# results fused by reciprocal rank (see src.retrieval.HybridRetriever)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+HYBRID_CANDIDATES = 20  # Nodes retrieved by each retriever before fusion
+RRF_K = 60  # Reciprocal rank fusion constant: 1 / (RRF_K + rank)
+BM25_K1 = 1.2  # Term frequency saturation
+BM25_B = 0.75  # Document length normalization
+# Retrieval is restricted to the anime whose titles the question names (see
+# src.title_index), unless it names more than this many anime
+TITLE_FILTER_MAX_ANIME = 20
+TITLE_ALIAS_MIN_CHARS = 3  # Shorter one-word titles are not matched
+# In-process caches of query embeddings and retrieved nodes (see src.query_cache),
+# cleared when the index is rebuilt or updated
+QUERY_EMBEDDING_CACHE_SIZE = 1024  # ~12 MiB of bge-small embeddings
+RETRIEVAL_CACHE_SIZE = 512  # Retrieved node lists
+QUERY_CACHE_TTL = 3600  # Seconds
+# Opt-in semantic cache of the answers to first questions of a chat (see
+# src.query_cache.AnswerCache): ANSWER_CACHE=1 turns it on
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "0") == "1"
+ANSWER_CACHE_SIZE = 2048  # Answers
+ANSWER_CACHE_TTL = 6 * 3600  # Seconds
+ANSWER_CACHE_THRESHOLD = 0.95  # Minimum cosine similarity of the questions
+
+# Ingest fetch engine. Rate limits are (tokens per second, burst capacity) per host.
+# Jikan publishes 3 requests/second and 60 requests/minute: a burst of 3 refilled at
+# 1 token/second honours both.
+HOST_RATE_LIMITS: dict[str, tuple[float, int]] = {
+    "api.jikan.moe": (1.0, 3),
+    "myanimelist.net": (2.0, 4),
+}
+DEFAULT_RATE_LIMIT: tuple[float, int] = (2.0, 2)
+MAX_CONCURRENT_REQUESTS = 8
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+REQUEST_TIMEOUT_SECONDS = 10.0
+
+# Ingest HTTP cache. Expired entries are revalidated with ETag / Last-Modified.
+HTTP_CACHE_MAX_BYTES = 2 * 1024**3
+HTTP_CACHE_DEFAULT_TTL = 24 * 3600  # Search results and unknown titles
+HTTP_CACHE_AIRING_TTL = 12 * 3600  # New episodes may show up any day
+HTTP_CACHE_FINISHED_TTL = 30 * 24 * 3600
+JIKAN_SEARCH_LIMIT = 25  # Jikan maximum page size
+CRAWL_WORKERS = 4  # Titles whose episodes are fetched at the same time
+JIKAN_EPISODES_PAGE_SIZE = 100  # Episodes per page of /anime/{id}/episodes
+PIPELINE_QUEUE_SIZE = 64  # Items buffered between two ingest pipeline stages
+PARSE_PROCESSES = min(4, os.cpu_count() or 1)  # 0 parses in the event loop
+
+# Title registry staleness policy: a crawled title is not crawled again, whatever
+# the query returning it, until it is older than this (or its status changed).
+REGISTRY_AIRING_MAX_AGE = 24 * 3600
+REGISTRY_FINISHED_MAX_AGE = 90 * 24 * 3600
+REGISTRY_DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Histogram buckets, in seconds, of the ingest request latency and parse time
+METRICS_LATENCY_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# zstd level of the compressed data files (see src.storage): cheap enough to write
+# during ingest, and the repetitive Jikan payloads compress well at this level.
+ZSTD_LEVEL = 10
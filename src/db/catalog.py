@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+
+from src.models.anime import AnimeRecord
+
+
+class AnimeCatalog:
+    """
+    SQLite store of the anime-level metadata, one AnimeRecord per MyAnimeList ID.
+
+    Chunks only reference their anime by `mal_id`: the index build joins the
+    record back to build documents, and queries join it to the retrieved nodes
+    (see `src.retrieval.CatalogJoin`).
+
+    The titles of each anime (see `src.parsers.anime.anime_titles`) are stored
+    alongside its record, for `src.title_index.TitleIndex`.
+
+    Records are written in one transaction per index build: `clear` and `put` do
+    not commit, `commit` does. The connection is opened lazily on first use and
+    shared by the threads queries are answered from, behind a lock.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, timeout=30.0, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS anime (
+                    mal_id INTEGER PRIMARY KEY,
+                    record TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alias (
+                    mal_id INTEGER NOT NULL,
+                    alias TEXT NOT NULL,
+                    PRIMARY KEY (mal_id, alias)
+                )
+                """
+            )
+        return self._conn
+
+    def put(self, record: AnimeRecord, aliases: Iterable[str] = ()) -> None:
+        """Store `record`, and replace the titles of its anime with `aliases`."""
+        mal_id = record["mal_id"]
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO anime VALUES (?, ?)",
+                (mal_id, json.dumps(record, ensure_ascii=False)),
+            )
+            self.conn.execute("DELETE FROM alias WHERE mal_id = ?", (mal_id,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO alias VALUES (?, ?)",
+                ((mal_id, alias) for alias in aliases),
+            )
+
+    def clear(self) -> None:
+        """Remove every record and title, before the catalog is written again."""
+        with self._lock:
+            self.conn.execute("DELETE FROM anime")
+            self.conn.execute("DELETE FROM alias")
+
+    def commit(self) -> None:
+        with self._lock:
+            self.conn.commit()
+
+    def get(self, mal_id: int) -> AnimeRecord | None:
+        return self.get_many([mal_id]).get(mal_id)
+
+    def get_many(self, mal_ids: Iterable[int]) -> dict[int, AnimeRecord]:
+        """Records of the given anime, by MyAnimeList ID; unknown ones are left out."""
+        ids = list(dict.fromkeys(mal_ids))
+        records: dict[int, AnimeRecord] = {}
+        for start in range(0, len(ids), 500):  # SQLite caps bound parameters
+            batch = ids[start : start + 500]
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT mal_id, record FROM anime "
+                    f"WHERE mal_id IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+            records.update((mal_id, json.loads(record)) for mal_id, record in rows)
+        return records
+
+    def iter_aliases(self) -> Iterator[tuple[str, int]]:
+        """Every title of every anime, with its MyAnimeList ID."""
+        with self._lock:
+            rows = self.conn.execute("SELECT alias, mal_id FROM alias").fetchall()
+        yield from rows
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
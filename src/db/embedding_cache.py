@@ -0,0 +1,142 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from src.db.http_cache import CacheStats
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed cache of text embeddings keyed by (model name, text hash).
+
+    Vectors are stored as float32 blobs, so an unchanged document is never sent
+    through the embedding model twice, across runs and processes. The least
+    recently used vectors are evicted once they exceed `max_bytes`.
+
+    The connection is opened lazily on first use and shared by the threads the
+    embedding model is called from, behind a lock.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._conn: sqlite3.Connection | None = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_accessed_at "
+                "ON embeddings(accessed_at)"
+            )
+            row = self._conn.execute(
+                "SELECT SUM(LENGTH(vector)) FROM embeddings"
+            ).fetchone()
+            self._total_bytes = row[0] or 0
+        return self._conn
+
+    def get_many(self, model: str, texts: Iterable[str]) -> dict[str, list[float]]:
+        """
+        Cached embeddings of `texts` for `model`.
+
+        Returns:
+            dict[str, list[float]]: Embedding by text, for the texts found.
+        """
+        by_hash = {text_hash(text): text for text in texts}
+        hashes = list(by_hash)
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):  # SQLite caps bound parameters
+                batch = hashes[start : start + 500]
+                rows = self.conn.execute(
+                    "SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[by_hash[key]] = vector.tolist()
+            if found:
+                self.conn.executemany(
+                    "UPDATE embeddings SET accessed_at = ? "
+                    "WHERE model = ? AND text_hash = ?",
+                    [(time.time(), model, text_hash(text)) for text in found],
+                )
+                self.conn.commit()
+        self.stats.hits += len(found)
+        self.stats.misses += len(by_hash) - len(found)
+        return found
+
+    def put_many(
+        self, model: str, embeddings: Iterable[tuple[str, list[float]]]
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            for text, vector in embeddings:
+                blob = np.asarray(vector, np.float32).tobytes()
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)",
+                    (model, text_hash(text), blob, now),
+                )
+                self._total_bytes += len(blob) * cursor.rowcount
+            self.evict()
+            self.conn.commit()
+
+    def evict(self) -> None:
+        """Drop least recently used vectors until the cache fits in `max_bytes`."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute(
+            "SELECT model, text_hash, LENGTH(vector) FROM embeddings "
+            "ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted = []
+        for model, key, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((model, key))
+            self._total_bytes -= size
+        self.conn.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND text_hash = ?", evicted
+        )
+        self.stats.evictions += len(evicted)
+
+    def log_stats(self) -> None:
+        s = self.stats
+        logger.info(
+            f"Embedding cache: {s.hits} hits, {s.misses} misses, "
+            f"{s.evictions} evicted, hit ratio {s.hit_ratio:.1%}, "
+            f"{self._total_bytes / 2**20:.1f} MiB stored"
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,169 @@
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+from loguru import logger
+
+
+class CachedResponse(NamedTuple):
+    """A stored response and the validators needed to revalidate it."""
+
+    status: int
+    content_type: str | None
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses + self.revalidations
+        return (self.hits + self.revalidations) / lookups if lookups else 0.0
+
+
+class HttpCache:
+    """
+    SQLite-backed HTTP response cache with conditional revalidation.
+
+    Each entry keeps its ETag / Last-Modified validators and an expiry chosen by the
+    caller, so finished titles can live for weeks while airing ones expire quickly.
+    Once expired, an entry is not dropped: the fetcher revalidates it and a 304 only
+    extends its expiry. The least recently used entries are evicted once the stored
+    bodies exceed `max_bytes`.
+
+    The connection is opened lazily on first use.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._conn: sqlite3.Connection | None = None
+        self._total_bytes = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    content_type TEXT,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_accessed_at ON responses(accessed_at)"
+            )
+            row = self._conn.execute("SELECT SUM(size) FROM responses").fetchone()
+            self._total_bytes = row[0] or 0
+        return self._conn
+
+    def get(self, key: str) -> CachedResponse | None:
+        row = self.conn.execute(
+            "SELECT status, content_type, body, etag, last_modified, expires_at "
+            "FROM responses WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        self.conn.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        # Committed at once: the LRU touch would otherwise be lost on read-only
+        # runs, and the open transaction would hold the SQLite write lock
+        self.conn.commit()
+        return CachedResponse(*row)
+
+    def put(
+        self,
+        key: str,
+        status: int,
+        content_type: str | None,
+        body: bytes,
+        etag: str | None,
+        last_modified: str | None,
+        ttl: float,
+    ) -> None:
+        now = time.time()
+        previous = self.conn.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                status,
+                content_type,
+                body,
+                etag,
+                last_modified,
+                now + ttl,
+                now,
+                len(body),
+            ),
+        )
+        self._total_bytes += len(body) - (previous[0] if previous else 0)
+        self.evict()
+        self.conn.commit()
+
+    def refresh(self, key: str, ttl: float) -> None:
+        """Extend the expiry of `key` after a successful revalidation (304)."""
+        now = time.time()
+        self.conn.execute(
+            "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+            (now + ttl, now, key),
+        )
+        self.conn.commit()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits in `max_bytes`."""
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.stats.evictions += len(evicted)
+
+    def log_stats(self) -> None:
+        s = self.stats
+        logger.info(
+            f"HTTP cache: {s.hits} hits, {s.misses} misses, "
+            f"{s.revalidations} revalidated (304), {s.evictions} evicted, "
+            f"hit ratio {s.hit_ratio:.1%}, {self._total_bytes / 2**20:.1f} MiB stored"
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
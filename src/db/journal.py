@@ -0,0 +1,146 @@
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+
+class IngestJournal:
+    """
+    SQLite journal of the progress of one ingest job.
+
+    Every listing page, resolved episode and saved title is recorded as soon as it
+    completes, so a crawl that crashes or gets throttled halfway can be resumed
+    without sending the same requests again. Rows are keyed by `job`, a hash of
+    the crawl parameters (see `job_id`): resuming only reuses the progress of the
+    exact same crawl.
+
+    The connection is opened lazily on first use.
+    """
+
+    def __init__(self, path: str | Path, job: str) -> None:
+        self.path = Path(path)
+        self.job = job
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def job_id(**params: Any) -> str:
+        """Stable identifier of a crawl from its parameters."""
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    job TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    has_next INTEGER NOT NULL,
+                    PRIMARY KEY (job, source, page)
+                );
+                CREATE TABLE IF NOT EXISTS episodes (
+                    job TEXT NOT NULL,
+                    mal_id INTEGER NOT NULL,
+                    episode_id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job, mal_id, episode_id)
+                );
+                CREATE TABLE IF NOT EXISTS titles (
+                    job TEXT NOT NULL,
+                    mal_id INTEGER NOT NULL,
+                    PRIMARY KEY (job, mal_id)
+                );
+                """
+            )
+        return self._conn
+
+    def reset(self) -> None:
+        """Forget the progress of the job, e.g. when starting it over."""
+        for table in ("pages", "episodes", "titles"):
+            self.conn.execute(f"DELETE FROM {table} WHERE job = ?", (self.job,))
+        self.conn.commit()
+
+    def page(self, source: str, page: int) -> tuple[list[dict[str, Any]], bool] | None:
+        """
+        A listing page completed earlier.
+
+        Returns:
+            tuple[list[dict[str, Any]], bool] | None: The anime of the page and
+            whether a next page exists, or None if the page was not completed.
+        """
+        row = self.conn.execute(
+            "SELECT data, has_next FROM pages "
+            "WHERE job = ? AND source = ? AND page = ?",
+            (self.job, source, page),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), bool(row[1])
+
+    def record_page(
+        self, source: str, page: int, data: list[dict[str, Any]], has_next: bool
+    ) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+            (self.job, source, page, json.dumps(data), has_next),
+        )
+        self.conn.commit()
+
+    def episodes(self, mal_id: int) -> dict[int, dict[str, Any]]:
+        """Episodes of an unsaved title resolved earlier, by episode ID."""
+        rows = self.conn.execute(
+            "SELECT episode_id, data FROM episodes WHERE job = ? AND mal_id = ?",
+            (self.job, mal_id),
+        ).fetchall()
+        return {episode_id: json.loads(data) for episode_id, data in rows}
+
+    def record_episode(self, mal_id: int, episode: dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?)",
+            (self.job, mal_id, episode["mal_id"], json.dumps(episode)),
+        )
+        self.conn.commit()
+
+    def titles(self) -> set[int]:
+        """MyAnimeList IDs of the titles already saved by the job."""
+        rows = self.conn.execute(
+            "SELECT mal_id FROM titles WHERE job = ?", (self.job,)
+        ).fetchall()
+        return {mal_id for (mal_id,) in rows}
+
+    def record_title(self, mal_id: int) -> None:
+        """Mark a title as saved; its episodes are in META_DIR from now on."""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO titles VALUES (?, ?)", (self.job, mal_id)
+        )
+        self.conn.execute(
+            "DELETE FROM episodes WHERE job = ? AND mal_id = ?", (self.job, mal_id)
+        )
+        self.conn.commit()
+
+    def log_stats(self) -> None:
+        counts = {
+            table: self.conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE job = ?", (self.job,)
+            ).fetchone()[0]
+            for table in ("pages", "episodes", "titles")
+        }
+        logger.info(
+            f"Ingest journal {self.job}: {counts['titles']} titles saved, "
+            f"{counts['pages']} listing pages and {counts['episodes']} episodes "
+            "of unsaved titles recorded"
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
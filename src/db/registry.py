@@ -0,0 +1,123 @@
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import NamedTuple
+
+
+class RegistryEntry(NamedTuple):
+    """Last successful crawl of a title."""
+
+    mal_id: int
+    fetched_at: float
+    episodes: int
+    status: str | None
+
+
+@dataclass(frozen=True)
+class StalenessPolicy:
+    """
+    How long a crawled title stays fresh, in seconds, depending on its status.
+    A title whose airing status changed since the last crawl is always stale.
+    """
+
+    airing_max_age: float
+    finished_max_age: float
+    default_max_age: float
+
+    @classmethod
+    def uniform(cls, max_age: float) -> "StalenessPolicy":
+        """Same maximum age whatever the status; 0 re-crawls every title."""
+        return cls(max_age, max_age, max_age)
+
+    def max_age(self, anime: dict[str, Any]) -> float:
+        status = (anime.get("status") or "").lower()
+        if status == "finished airing":
+            return self.finished_max_age
+        if anime.get("airing") or status in {"currently airing", "not yet aired"}:
+            return self.airing_max_age
+        return self.default_max_age
+
+    def is_stale(
+        self, entry: RegistryEntry, anime: dict[str, Any], now: float | None = None
+    ) -> bool:
+        if entry.status != anime.get("status"):
+            return True
+        age = (time.time() if now is None else now) - entry.fetched_at
+        return age >= self.max_age(anime)
+
+
+class TitleRegistry:
+    """
+    Ingest-wide SQLite registry of the titles crawled so far.
+
+    Every saved title is recorded with its crawl time, episode count and airing
+    status. Query paths check it before fetching episodes so a title returned by
+    overlapping queries, or by crawls of other operators sharing the file, is only
+    crawled again once stale according to a `StalenessPolicy`.
+
+    The connection is opened lazily on first use.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS titles (
+                    mal_id INTEGER PRIMARY KEY,
+                    fetched_at REAL NOT NULL,
+                    episodes INTEGER NOT NULL,
+                    status TEXT
+                )
+                """
+            )
+        return self._conn
+
+    def get(self, mal_ids: Iterable[int]) -> dict[int, RegistryEntry]:
+        """Registry entries of the given titles, by MyAnimeList ID."""
+        ids = list(mal_ids)
+        entries: dict[int, RegistryEntry] = {}
+        for start in range(0, len(ids), 500):  # SQLite caps bound parameters
+            batch = ids[start : start + 500]
+            rows = self.conn.execute(
+                "SELECT mal_id, fetched_at, episodes, status FROM titles "
+                f"WHERE mal_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            entries.update((row[0], RegistryEntry(*row)) for row in rows)
+        return entries
+
+    def record(self, mal_id: int, episodes: int, status: str | None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?)",
+            (mal_id, time.time(), episodes, status),
+        )
+        self.conn.commit()
+
+    def fresh(
+        self, animes_data: list[dict[str, Any]], policy: StalenessPolicy
+    ) -> set[int]:
+        """MyAnimeList IDs of the titles of `animes_data` that are not stale."""
+        entries = self.get(a["mal_id"] for a in animes_data)
+        now = time.time()
+        return {
+            a["mal_id"]
+            for a in animes_data
+            if a["mal_id"] in entries
+            and not policy.is_stale(entries[a["mal_id"]], a, now)
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
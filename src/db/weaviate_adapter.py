@@ -1,5 +1,6 @@
 import random
 from enum import Enum
+from functools import cache
 from typing import Any
 
 import weaviate
@@ -14,7 +15,11 @@ from weaviate.classes.query import Rerank
 from weaviate.collections import Collection
 from weaviate.collections.classes.internal import QueryReturn
 
-client = weaviate.connect_to_local(port=8079)
+
+@cache
+def get_client() -> weaviate.WeaviateClient:  # type: ignore[no-any-unimported]
+    """Client of the local Weaviate instance, connected on first use."""
+    return weaviate.connect_to_local(port=8079)
 
 
 class QueryType(Enum):
@@ -113,6 +118,7 @@ def create_collection(  # type: ignore[no-any-unimported]
     Returns:
         The created or existing Weaviate collection.
     """
+    client = get_client()
     if client.collections.exists(name):
         logger.info(f"Collection '{name}' already exists. Returning existing.")
         return client.collections.get(name)
@@ -243,4 +249,4 @@ if __name__ == "__main__":
     description = [r.properties["description"] for r in sample.objects]
     logger.info(f"Sample documents: {description}")
 
-    client.close()
+    get_client().close()
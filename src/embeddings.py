@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.embeddings.base import Embedding
+from loguru import logger
+from pydantic import PrivateAttr
+
+from src.db.embedding_cache import EmbeddingCache
+
+
+class CachedEmbedding(BaseEmbedding):  # type: ignore[no-any-unimported]
+    """
+    Embedding model backed by a persistent `EmbeddingCache`.
+
+    Document texts are looked up by (cache key, text hash) first and only the
+    missing ones go through the wrapped model, in batches. The cache key defaults
+    to the model name. Query embeddings are not cached here, but in memory by the
+    retrievers (see `src.query_cache.QueryCache`).
+    """
+
+    _embed_model: BaseEmbedding = PrivateAttr()  # type: ignore[no-any-unimported]
+    _cache: EmbeddingCache = PrivateAttr()
+    _cache_key: str = PrivateAttr()
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,  # type: ignore[no-any-unimported]
+        cache: EmbeddingCache,
+        cache_key: str | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+        # Runtimes of the same model (e.g. quantized) must not share vectors
+        self._cache_key = cache_key or embed_model.model_name
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._embed_model.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await self._embed_model.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        found = self._cache.get_many(self._cache_key, texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            vectors = self._embed_model.get_text_embedding_batch(missing)
+            self._cache.put_many(self._cache_key, zip(missing, vectors, strict=True))
+            found.update(zip(missing, vectors, strict=True))
+        return [found[text] for text in texts]
+
+    def close(self) -> None:
+        """Release the wrapped model (e.g. its worker processes); the cache stays."""
+        if isinstance(self._embed_model, ProcessPoolEmbedding):
+            self._embed_model.close()
+
+
+# Builds the model of a worker process given its number of CPU threads
+EmbeddingFactory = Callable[[int], BaseEmbedding]  # type: ignore[no-any-unimported]
+
+# Model of a ProcessPoolEmbedding worker process, loaded by _init_worker
+_worker_model: BaseEmbedding | None = None  # type: ignore[no-any-unimported]
+
+
+def _init_worker(model_factory: EmbeddingFactory, threads: int) -> None:
+    global _worker_model
+    _worker_model = model_factory(threads)
+
+
+def _embed_texts(texts: list[str]) -> list[Embedding]:
+    assert _worker_model is not None, "worker not initialized"
+    return _worker_model.get_text_embedding_batch(texts)
+
+
+def _embed_query(query: str) -> Embedding:
+    assert _worker_model is not None, "worker not initialized"
+    return _worker_model.get_query_embedding(query)
+
+
+class ProcessPoolEmbedding(BaseEmbedding):  # type: ignore[no-any-unimported]
+    """
+    Embedding model sharding text batches across a pool of worker processes, each
+    with its own copy of the model built by `model_factory`.
+
+    Every call to `get_text_embedding_batch` is split into batches of `batch_size`
+    texts embedded in parallel, and the results are returned in the input order.
+    Each worker gets an equal share of the CPU threads, passed to `model_factory`
+    to configure its runtime, so the processes do not oversubscribe the cores.
+    The pool is started on first use, so a build whose texts are all in the
+    embedding cache never loads a model, and is stopped by `close`.
+
+    `model_factory` is sent to the workers: it must be picklable, e.g. a
+    `functools.partial` of `src.rag_index.load_embedding_backend`.
+    """
+
+    _model_factory: EmbeddingFactory = PrivateAttr()
+    _processes: int = PrivateAttr()
+    _batch_size: int = PrivateAttr()
+    _executor: ProcessPoolExecutor | None = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        model_factory: EmbeddingFactory,
+        model_name: str,
+        processes: int,
+        batch_size: int,
+        **kwargs: Any,
+    ) -> None:
+        # Large enough for one call to keep every worker busy
+        super().__init__(
+            model_name=model_name,
+            embed_batch_size=min(2048, batch_size * processes),
+            **kwargs,
+        )
+        self._model_factory = model_factory
+        self._processes = processes
+        self._batch_size = batch_size
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ProcessPoolEmbedding"
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self._processes)
+            logger.info(
+                f"Starting {self._processes} embedding processes "
+                f"({threads} threads each, batches of {self._batch_size})"
+            )
+            # Not forked: the parent may already run torch threads
+            self._executor = ProcessPoolExecutor(
+                self._processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._model_factory, threads),
+            )
+        return self._executor
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self.executor.submit(_embed_query, query).result()
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        batches = [
+            texts[start : start + self._batch_size]
+            for start in range(0, len(texts), self._batch_size)
+        ]
+        return [
+            vector
+            for vectors in self.executor.map(_embed_texts, batches)
+            for vector in vectors
+        ]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,284 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from types import TracebackType
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+from src.constants import BACKOFF_BASE_SECONDS
+from src.constants import BACKOFF_MAX_SECONDS
+from src.constants import DEFAULT_RATE_LIMIT
+from src.constants import HOST_RATE_LIMITS
+from src.constants import HTTP_CACHE_DEFAULT_TTL
+from src.constants import MAX_CONCURRENT_REQUESTS
+from src.constants import MAX_RETRIES
+from src.constants import REQUEST_TIMEOUT_SECONDS
+from src.db.http_cache import CachedResponse
+from src.db.http_cache import HttpCache
+from src.metrics import Metrics
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Asynchronous token bucket limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; every request
+    consumes one token. Waiters are served in arrival order because the lock is held
+    while sleeping for the next token.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Block the whole host for `seconds`, e.g. after a 429 with Retry-After."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header given either as delta-seconds or as an HTTP-date.
+
+    Returns:
+        float | None: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AsyncFetcher:
+    """
+    Rate-limited asynchronous HTTP client used by the ingest pipeline.
+
+    Every request goes through the token bucket of its host and a global semaphore
+    bounding the number of in-flight requests. 429 and 5xx responses, as well as
+    transport errors, are retried with full-jitter exponential backoff; a 429 honours
+    Retry-After and pauses the whole host so concurrent tasks back off together.
+
+    With a `cache`, fresh entries are served without touching the network and stale
+    ones are revalidated with a conditional request.
+
+    Requests are instrumented in `metrics`, labelled by the `endpoint` given by the
+    caller: latency of every attempt, responses by status, retries, 429s and cache
+    lookups by result.
+
+    Use:
+        async with AsyncFetcher() as fetcher:
+            resp = await fetcher.get(url, params={"page": 1})
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        rate_limits: dict[str, tuple[float, int]] | None = None,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        backoff_max: float = BACKOFF_MAX_SECONDS,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: HttpCache | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.cache = cache
+        self.metrics = Metrics() if metrics is None else metrics
+        self.rate_limits = HOST_RATE_LIMITS if rate_limits is None else rate_limits
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._timeout = timeout
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._client = httpx.AsyncClient(
+            timeout=self._timeout, transport=self._transport, follow_redirects=True
+        )
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            rate, capacity = self.rate_limits.get(host, DEFAULT_RATE_LIMIT)
+            self._buckets[host] = TokenBucket(rate=rate, capacity=capacity)
+        return self._buckets[host]
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def get(
+        self,
+        url: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        ttl: float = HTTP_CACHE_DEFAULT_TTL,
+        endpoint: str = "other",
+    ) -> httpx.Response:
+        """
+        GET `url` through the cache, if any. Only 200 responses are stored.
+
+        Args:
+            url (str): The URL to fetch.
+            params (dict[str, Any] | None): Query string parameters.
+            headers (dict[str, str] | None): Extra request headers.
+            ttl (float): Seconds the response stays fresh once stored or revalidated.
+            endpoint (str): Metrics label of the request, e.g. "search".
+
+        Returns:
+            httpx.Response: The cached or downloaded response.
+        """
+        if self.cache is None:
+            return await self._get(url, params, headers, endpoint)
+
+        key = str(httpx.URL(url, params=params))
+        cached = self.cache.get(key)
+        if cached is not None and cached.is_fresh:
+            self.cache.stats.hits += 1
+            self.metrics.inc("http_cache_total", endpoint=endpoint, result="hit")
+            return self._from_cache(key, cached)
+
+        headers = dict(headers or {})
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        resp = await self._get(url, params, headers, endpoint)
+
+        if resp.status_code == 304 and cached is not None:
+            self.cache.stats.revalidations += 1
+            self.metrics.inc(
+                "http_cache_total", endpoint=endpoint, result="revalidated"
+            )
+            self.cache.refresh(key, ttl)
+            return self._from_cache(key, cached)
+        self.cache.stats.misses += 1
+        self.metrics.inc("http_cache_total", endpoint=endpoint, result="miss")
+        if resp.status_code == 200:
+            self.cache.put(
+                key,
+                status=resp.status_code,
+                content_type=resp.headers.get("Content-Type"),
+                body=resp.content,
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                ttl=ttl,
+            )
+        return resp
+
+    @staticmethod
+    def _from_cache(key: str, cached: CachedResponse) -> httpx.Response:
+        headers = {"Content-Type": cached.content_type} if cached.content_type else {}
+        return httpx.Response(
+            cached.status,
+            content=cached.body,
+            headers=headers,
+            request=httpx.Request("GET", key),
+        )
+
+    async def _get(
+        self,
+        url: str,
+        params: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        endpoint: str,
+    ) -> httpx.Response:
+        """
+        GET `url`, retrying throttled, failed and unreachable requests.
+
+        Returns:
+            httpx.Response: The first non-retryable response, or the last response
+            once retries are exhausted.
+
+        Raises:
+            httpx.TransportError: If the host stays unreachable after all retries.
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncFetcher must be used as an async context manager")
+        bucket = self.bucket(urlsplit(url).hostname or "")
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            try:
+                async with self._semaphore:
+                    with self.metrics.time("http_request_seconds", endpoint=endpoint):
+                        resp = await self._client.get(
+                            url, params=params, headers=headers
+                        )
+            except httpx.TransportError as exc:
+                self.metrics.inc("http_network_errors_total", endpoint=endpoint)
+                if attempt == self.max_retries:
+                    raise
+                self.metrics.inc("http_retries_total", endpoint=endpoint)
+                delay = self._backoff(attempt)
+                logger.warning(
+                    f"Network error on {url}: {exc!r}, retry in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.metrics.inc(
+                "http_responses_total", endpoint=endpoint, status=resp.status_code
+            )
+            if resp.status_code == 429:
+                self.metrics.inc("http_throttled_total", endpoint=endpoint)
+            if resp.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return resp
+            self.metrics.inc("http_retries_total", endpoint=endpoint)
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if resp.status_code == 429:
+                bucket.pause(delay)
+            logger.warning(
+                f"Status {resp.status_code} on {url}, "
+                f"retry {attempt + 1} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")  # pragma: no cover
@@ -0,0 +1,129 @@
+import hashlib
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+
+from src.constants import CHUNK_SIZE
+from src.constants import EMBEDDING_BACKEND
+from src.constants import EMBEDDING_MODEL_NAME
+from src.constants import INDEX_FORMAT_VERSION
+from src.constants import INDEX_MODE
+from src.models.anime import AnimeChunk
+from src.parsers.anime import chunk_content_hash
+from src.storage import READ_ERRORS
+from src.storage import read_json
+from src.storage import write_json
+
+# Fields that must match the running code for the collection to be usable
+DRIFT_FIELDS = (
+    "model_name",
+    "embedding_backend",
+    "embed_dim",
+    "chunk_size",
+    "index_mode",
+    "format_version",
+)
+
+
+class CorpusHash:
+    """
+    Hash of chunk IDs and contents, whatever their order, updated one chunk at a
+    time: the digests of the chunks are summed modulo 2**256.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._sum = 0
+
+    @classmethod
+    def of(cls, chunks: Iterable[AnimeChunk]) -> "CorpusHash":
+        corpus = cls()
+        for chunk in chunks:
+            corpus.update(chunk)
+        return corpus
+
+    def update(self, chunk: AnimeChunk) -> None:
+        content_hash = chunk.get("content_hash") or chunk_content_hash(chunk)
+        entry = f"{chunk.get('chunk_id', '')}:{content_hash}"
+        digest = hashlib.sha256(entry.encode()).digest()
+        self._sum = (self._sum + int.from_bytes(digest)) % 2**256
+        self.count += 1
+
+    def track(self, chunks: Iterable[AnimeChunk]) -> Iterator[AnimeChunk]:
+        """Yield `chunks`, hashing them on the way."""
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        return f"{self._sum:064x}"
+
+
+def corpus_hash(chunks: Iterable[AnimeChunk]) -> str:
+    return CorpusHash.of(chunks).hexdigest()
+
+
+@dataclass(frozen=True)
+class IndexManifest:
+    """
+    What the vector collection was built from, saved next to CHROMA_DIR.
+
+    Read at startup instead of scanning the collection, and compared with the
+    current configuration to detect a collection built by another embedding
+    model, backend or vector dimension, chunk size, index mode or document
+    format (see `drift`).
+    """
+
+    model_name: str
+    embedding_backend: str
+    embed_dim: int
+    chunk_size: int
+    document_count: int
+    corpus_hash: str
+    index_mode: str = "chunk"  # Manifests saved before hierarchical indexes
+    format_version: int = INDEX_FORMAT_VERSION
+    built_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def load(cls, path: Path) -> "IndexManifest | None":
+        """The manifest saved at `path`, or None if missing or unreadable."""
+        if not path.exists():
+            return None
+        try:
+            return cls(**read_json(path))
+        except (*READ_ERRORS, TypeError):
+            return None
+
+    def save(self, path: Path) -> None:
+        write_json(path, asdict(self))
+
+    def drift(self, embed_dim: int) -> list[str]:
+        """
+        Differences between the build configuration and the current one.
+
+        Args:
+            embed_dim (int): Dimension of the vectors of the current embedding
+                model.
+
+        Returns:
+            list[str]: One "field: built -> current" entry per mismatch, empty when
+            the collection can be used as is.
+        """
+        current = {
+            "model_name": EMBEDDING_MODEL_NAME,
+            "embedding_backend": EMBEDDING_BACKEND,
+            "embed_dim": embed_dim,
+            "chunk_size": CHUNK_SIZE,
+            "index_mode": INDEX_MODE,
+            "format_version": INDEX_FORMAT_VERSION,
+        }
+        built = asdict(self)
+        return [
+            f"{name}: {built[name]} -> {current[name]}"
+            for name in DRIFT_FIELDS
+            if built[name] != current[name]
+        ]
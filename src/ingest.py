@@ -1,44 +1,270 @@
-import time
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Collection
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from time import perf_counter
 from typing import Any
+from typing import TypeVar
 
-import requests
-import requests_cache
-from bs4 import BeautifulSoup
+import httpx
 from loguru import logger
 
+from src.constants import CRAWL_WORKERS
+from src.constants import HTTP_CACHE_AIRING_TTL
+from src.constants import HTTP_CACHE_DEFAULT_TTL
+from src.constants import HTTP_CACHE_FINISHED_TTL
+from src.constants import HTTP_CACHE_MAX_BYTES
+from src.constants import HTTP_CACHE_PATH
 from src.constants import JIKAN_BASE
+from src.constants import JIKAN_EPISODES_PAGE_SIZE
+from src.constants import JIKAN_SEARCH_LIMIT
+from src.constants import JOURNAL_PATH
+from src.constants import MAX_CONCURRENT_REQUESTS
 from src.constants import META_DIR
+from src.constants import PARSE_PROCESSES
+from src.constants import PIPELINE_QUEUE_SIZE
 from src.constants import RAW_DIR
+from src.constants import REGISTRY_AIRING_MAX_AGE
+from src.constants import REGISTRY_DEFAULT_MAX_AGE
+from src.constants import REGISTRY_FINISHED_MAX_AGE
+from src.constants import REGISTRY_PATH
+from src.db.http_cache import HttpCache
+from src.db.journal import IngestJournal
+from src.db.registry import StalenessPolicy
+from src.db.registry import TitleRegistry
+from src.fetcher import AsyncFetcher
+from src.metrics import Metrics
+from src.parsers.synopsis import extract_synopsis
+from src.pipeline import Pipeline
+from src.pipeline import Stage
+from src.storage import READ_ERRORS
+from src.storage import data_path
+from src.storage import find_data_file
+from src.storage import read_json
 from src.utils import save_data
 
-requests_cache.install_cache("data/mal_cache", backend="sqlite", expire_after=86400)
+T = TypeVar("T")
 
+DEFAULT_STALENESS_POLICY = StalenessPolicy(
+    airing_max_age=REGISTRY_AIRING_MAX_AGE,
+    finished_max_age=REGISTRY_FINISHED_MAX_AGE,
+    default_max_age=REGISTRY_DEFAULT_MAX_AGE,
+)
 
-def fetch_metadata_from_myanimelist(query: str) -> list[dict[str, Any]]:
+
+def _run(
+    task: Callable[[AsyncFetcher], Awaitable[T]],
+    journal: IngestJournal | None = None,
+    metrics_file: Path | None = None,
+) -> T:
+    """
+    Run `task` on a fresh AsyncFetcher, backed by the ingest HTTP cache. The
+    `journal` used by the task, if any, is closed once it returns or fails.
+
+    The ingest metrics are logged at the end of the run and, with `metrics_file`,
+    also written there in Prometheus text format.
+    """
+    cache = HttpCache(HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES)
+    metrics = Metrics()
+
+    async def main() -> T:
+        async with AsyncFetcher(cache=cache, metrics=metrics) as fetcher:
+            return await task(fetcher)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        metrics.log_summary()
+        if metrics_file is not None:
+            metrics.write_prometheus(metrics_file)
+        cache.log_stats()
+        cache.close()
+        if journal is not None:
+            journal.log_stats()
+            journal.close()
+
+
+def open_journal(
+    resume: bool,
+    queries: list[str],
+    seasons: list[tuple[int, str]] | None = None,
+    top_pages: int = 0,
+    max_pages: int | None = None,
+    delta: bool = False,
+) -> IngestJournal:
     """
-    Fetch anime metadata from MyAnimeList (via Jikan API) for a given search query.
-    Saves the raw API response to the RAW_DIR for traceability.
+    Open the journal of a crawl, identified by its parameters. Unless `resume` is
+    set, the progress recorded by a previous run of the same crawl is discarded.
+    """
+    job = IngestJournal.job_id(
+        queries=queries,
+        seasons=seasons or [],
+        top_pages=top_pages,
+        max_pages=max_pages,
+        delta=delta,
+    )
+    journal = IngestJournal(JOURNAL_PATH, job=job)
+    if resume:
+        logger.info(f"[+] Resuming ingest job {job}")
+    else:
+        journal.reset()
+    return journal
+
+
+def cache_ttl(anime: dict[str, Any]) -> float:
+    """
+    Cache lifetime for the episode pages of an anime: long for finished titles,
+    short for airing (or not yet aired) ones whose episode list still changes.
+    """
+    status = (anime.get("status") or "").lower()
+    if status == "finished airing":
+        return HTTP_CACHE_FINISHED_TTL
+    if anime.get("airing") or status in {"currently airing", "not yet aired"}:
+        return HTTP_CACHE_AIRING_TTL
+    return HTTP_CACHE_DEFAULT_TTL
+
+
+async def afetch_anime_pages(
+    fetcher: AsyncFetcher,
+    path: str,
+    params: dict[str, Any],
+    raw_name: str,
+    max_pages: int | None = None,
+    journal: IngestJournal | None = None,
+    endpoint: str = "search",
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """
+    Iterate over the pages of a paginated Jikan anime listing (search, season,
+    top), following `pagination.has_next_page`. Every raw page is saved to RAW_DIR
+    as `{raw_name}_{page}.json.zst` as soon as it arrives, and recorded in the
+    `journal`, if any, so a resumed crawl reads it from there instead.
 
     Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
+        path (str): Jikan endpoint relative to JIKAN_BASE, e.g. "anime".
+        params (dict[str, Any]): Query parameters other than `page`.
+        raw_name (str): Prefix of the raw page files.
+        max_pages (int | None): Stop after this many pages. None follows all pages.
+        journal (IngestJournal | None): Journal of the running crawl.
+        endpoint (str): Metrics label of the requests.
+
+    Yields:
+        list[dict[str, Any]]: The anime metadata dictionaries of each page.
+    """
+    page = 1
+    while True:
+        completed = journal.page(raw_name, page) if journal else None
+        if completed is None:
+            resp = await fetcher.get(
+                f"{JIKAN_BASE}/{path}",
+                params={**params, "page": page},
+                endpoint=endpoint,
+            )
+            resp.raise_for_status()
+            result = resp.json()
+            written = save_data(data_path(RAW_DIR, f"{raw_name}_{page}"), result)
+            fetcher.metrics.inc("ingest_bytes_written_total", written, kind="raw")
+            completed = (
+                result.get("data", []),
+                bool(result.get("pagination", {}).get("has_next_page")),
+            )
+            if journal is not None:
+                journal.record_page(raw_name, page, *completed)
+        animes, has_next = completed
+        yield animes
+        if not has_next:
+            break
+        if max_pages is not None and page >= max_pages:
+            break
+        page += 1
+
+
+async def afetch_metadata_from_myanimelist(
+    fetcher: AsyncFetcher,
+    query: str,
+    max_pages: int | None = None,
+    journal: IngestJournal | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch anime metadata from MyAnimeList (via Jikan API) for a given search query,
+    across all result pages. Saves the raw API responses to the RAW_DIR for
+    traceability.
+
+    Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
         query (str): The anime search query string.
+        max_pages (int | None): Maximum number of result pages to fetch.
+        journal (IngestJournal | None): Journal of the running crawl.
 
     Returns:
         list[dict[str, Any]]: List of anime metadata dictionaries matching the query.
     """
     logger.info(f"[+] Searching MAL: {query:6>}")
-    resp = requests.get(f"{JIKAN_BASE}/anime", params={"q": query, "limit": 20})  # type: ignore[arg-type]
-    resp.raise_for_status()
-    result = resp.json()
-
-    # TODO: Check for pagination: pagination = result["pagination"]
-    page = 1
     process_query = query.replace(" ", "-").replace("/", "_")
-    save_data(RAW_DIR / f"{process_query}_{page}.json", result)
-    animes_data: list[dict[str, Any]] = result["data"]
+    params = {"q": query, "limit": JIKAN_SEARCH_LIMIT}
+    animes_data: list[dict[str, Any]] = []
     # TODO: Parse results to TypedDict
+    async for page in afetch_anime_pages(
+        fetcher, "anime", params, process_query, max_pages, journal
+    ):
+        animes_data.extend(page)
+    return animes_data
+
+
+async def afetch_season(
+    fetcher: AsyncFetcher,
+    year: int,
+    season: str,
+    max_pages: int | None = None,
+    journal: IngestJournal | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch every anime of a season, e.g. (2022, "spring")."""
+    logger.info(f"[+] Sweeping MAL season: {season} {year}")
+    path = f"seasons/{year}/{season}"
+    animes_data: list[dict[str, Any]] = []
+    async for page in afetch_anime_pages(
+        fetcher,
+        path,
+        {},
+        f"season_{year}_{season}",
+        max_pages,
+        journal,
+        endpoint="season",
+    ):
+        animes_data.extend(page)
     return animes_data
 
 
+async def afetch_top(
+    fetcher: AsyncFetcher, max_pages: int, journal: IngestJournal | None = None
+) -> list[dict[str, Any]]:
+    """Fetch the first `max_pages` pages of the MAL top anime ranking."""
+    logger.info(f"[+] Sweeping MAL top anime: {max_pages} pages")
+    animes_data: list[dict[str, Any]] = []
+    async for page in afetch_anime_pages(
+        fetcher,
+        "top/anime",
+        {"limit": JIKAN_SEARCH_LIMIT},
+        "top",
+        max_pages,
+        journal,
+        endpoint="top",
+    ):
+        animes_data.extend(page)
+    return animes_data
+
+
+def fetch_metadata_from_myanimelist(query: str) -> list[dict[str, Any]]:
+    """Synchronous wrapper of `afetch_metadata_from_myanimelist`."""
+    return _run(lambda fetcher: afetch_metadata_from_myanimelist(fetcher, query))
+
+
 def filter_anime_metadata(animes_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """
     Filter a list of anime metadata dictionaries to include only supported types:
@@ -63,100 +289,446 @@ def filter_anime_metadata(animes_data: list[dict[str, Any]]) -> list[dict[str, A
 
 def _extract_synopsis_from_mal(html: str) -> str | None:
     """Extracts the synopsis block following <h2>Synopsis</h2>."""
-    soup = BeautifulSoup(html, "html.parser")
-
     try:
-        header = soup.find("h2", string=lambda t: t and "Synopsis" in t)
-        if not header:
-            logger.warning("Synopsis header not found")
-            return None
-        synopsis_div = header.find_parent("div")
-        if synopsis_div:
-            header.extract()
-            synopsis_text = synopsis_div.get_text(separator=" ", strip=True)
-            return synopsis_text or None
-
-        logger.warning("No parent div found for synopsis header")
-        return None
-
+        return extract_synopsis(html)
     except Exception:
         logger.exception("Error parsing synopsis HTML")
         return None
 
 
-def fetch_episode_synopsis(episode_url: str) -> str | None:
-    """Fetches the synopsis of a specific anime episode by scraping HTML.
+def _timed_extract_synopsis(html: str) -> tuple[str | None, float]:
+    """
+    `_extract_synopsis_from_mal` and its duration in seconds, measured where it
+    runs: in a parse process, the time waiting in the pool queue is left out.
+    """
+    start = perf_counter()
+    synopsis = _extract_synopsis_from_mal(html)
+    return synopsis, perf_counter() - start
 
-    Args:
-        episode_url: URL of the specific anime episode page.
 
-    Returns:
-        The cleaned synopsis string if found, otherwise None.
-    """
+async def afetch_episode_page(
+    fetcher: AsyncFetcher,
+    episode_url: str | None,
+    ttl: float = HTTP_CACHE_DEFAULT_TTL,
+) -> str | None:
+    """Downloads the HTML of an episode page, None if it cannot be fetched."""
     if not episode_url:
         return None
     logger.info(f"[+] Fetching episode synopsis from: {episode_url}")
     try:
-        resp = requests.get(episode_url, timeout=10)
-    except requests.RequestException as e:
+        resp = await fetcher.get(episode_url, ttl=ttl, endpoint="episode_html")
+    except httpx.HTTPError as e:
         logger.error("Network error fetching episode {exc}", exc=str(e))
         return None
     if resp.status_code != 200:
         logger.warning(
             f"Failed to fetch episode {episode_url} — "
-            f"Status {resp.status_code}: {resp.reason}: {resp.text}",
+            f"Status {resp.status_code}: {resp.reason_phrase}: {resp.text}",
         )
         return None
+    return resp.text
+
+
+async def afetch_episode_synopsis(
+    fetcher: AsyncFetcher,
+    episode_url: str | None,
+    ttl: float = HTTP_CACHE_DEFAULT_TTL,
+) -> str | None:
+    """Fetches the synopsis of a specific anime episode by scraping HTML.
+
+    Args:
+        fetcher: Rate-limited client used for the request.
+        episode_url: URL of the specific anime episode page.
+        ttl: Cache lifetime of the page.
 
-    synopsis = _extract_synopsis_from_mal(resp.text)
+    Returns:
+        The cleaned synopsis string if found, otherwise None.
+    """
+    html = await afetch_episode_page(fetcher, episode_url, ttl=ttl)
+    if html is None:
+        return None
+    synopsis = _extract_synopsis_from_mal(html)
     if not synopsis:
         logger.info(f"No synopsis found for episode at {episode_url}")
         return None
     return synopsis
 
 
-def fetch_episodes(mal_id: int) -> list[dict[str, Any]]:
+def fetch_episode_synopsis(episode_url: str | None) -> str | None:
+    """Synchronous wrapper of `afetch_episode_synopsis`."""
+    return _run(lambda fetcher: afetch_episode_synopsis(fetcher, episode_url))
+
+
+def first_missing_page(known: Collection[int], mal_id: int) -> int:
     """
-    Fetch all episodes for a given MyAnimeList anime ID using the Jikan API.
-    Handles pagination to retrieve all available episodes.
+    Jikan episode list page holding the first episode number missing from
+    `known`: episodes are numbered from 1, JIKAN_EPISODES_PAGE_SIZE per page, so
+    the earlier pages are complete. A gap in the known episodes, e.g. an episode
+    listed late, is read again from its page rather than skipped.
+    """
+    first_missing = 1
+    while first_missing in known:
+        first_missing += 1
+    if known and max(known) > first_missing:
+        logger.warning(
+            f"Delta {mal_id}: episode {first_missing} missing among "
+            f"{len(known)} known episodes, reading from its page"
+        )
+    return (first_missing - 1) // JIKAN_EPISODES_PAGE_SIZE + 1
+
+
+async def afetch_episode_list(
+    fetcher: AsyncFetcher,
+    mal_id: int,
+    ttl: float = HTTP_CACHE_DEFAULT_TTL,
+    known_episodes: list[dict[str, Any]] | None = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Fetch the Jikan episode list of an anime, without scraping synopses.
+
+    With `known_episodes` (delta mode), the list is read from the page holding the
+    first episode number missing from them onwards (see `first_missing_page`),
+    known synopses are carried over, and the result is the known episodes merged
+    with the fetched ones.
 
     Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
         mal_id (int): MyAnimeList anime ID.
+        ttl (float): Cache lifetime of the episode list pages.
+        known_episodes (list[dict[str, Any]] | None): Episodes saved by a previous
+            ingest of this anime.
 
     Returns:
-        list[dict[str, Any]]: List of episode metadata dictionaries for the anime.
+        tuple[list[dict[str, Any]], list[dict[str, Any]]]: All the episodes, and the
+        subset (same objects) whose synopsis is new or was missing last time.
     """
-    episodes = []
-    page = 1
+    known = {ep["mal_id"]: ep for ep in known_episodes or []}
+    episodes: dict[int, dict[str, Any]] = {}
+    page = first_missing_page(known, mal_id)
     while True:
         logger.info(f"[+] Searching MAL Episodes: {mal_id:6} - Page {page:2}")
-        url = f"{JIKAN_BASE}/anime/{mal_id}/episodes?page={page}"
-        resp = requests.get(url)
+        url = f"{JIKAN_BASE}/anime/{mal_id}/episodes"
+        resp = await fetcher.get(
+            url, params={"page": page}, ttl=ttl, endpoint="episodes"
+        )
         resp.raise_for_status()
         data = resp.json()
         if not data.get("data"):
             break
         for ep in data["data"]:
-            if ep["mal_id"] % 14 == 0:
-                logger.info("Too much requests, sleeping for 1 second")
-                time.sleep(1)
-            synopsis = fetch_episode_synopsis(ep["url"])
-            ep["synopsis"] = synopsis
-            time.sleep(0.1)  # Avoid hitting API too fast
-        episodes.extend(data["data"])
+            ep["synopsis"] = known.get(ep["mal_id"], {}).get("synopsis")
+            episodes[ep["mal_id"]] = ep
         if not data.get("pagination", {}).get("has_next_page"):
             break
         page += 1
+
+    if known:
+        new = len(episodes.keys() - known.keys())
+        episodes = dict(sorted({**known, **episodes}.items()))
+        logger.info(f"[+] Delta {mal_id}: {new} new episodes")
+    missing = [ep for ep in episodes.values() if not ep.get("synopsis")]
+    return list(episodes.values()), missing
+
+
+async def afetch_episodes(
+    fetcher: AsyncFetcher,
+    mal_id: int,
+    ttl: float = HTTP_CACHE_DEFAULT_TTL,
+    known_episodes: list[dict[str, Any]] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch all episodes for a given MyAnimeList anime ID using the Jikan API.
+    Handles pagination to retrieve all available episodes, then scrapes the missing
+    synopsis pages concurrently, throttled by the fetcher rate limits.
+
+    Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
+        mal_id (int): MyAnimeList anime ID.
+        ttl (float): Cache lifetime of the episode list and synopsis pages.
+        known_episodes (list[dict[str, Any]] | None): Episodes saved by a previous
+            ingest of this anime; only new or missing synopses are scraped.
+
+    Returns:
+        list[dict[str, Any]]: List of episode metadata dictionaries for the anime.
+    """
+    episodes, missing = await afetch_episode_list(fetcher, mal_id, ttl, known_episodes)
+    synopses = await asyncio.gather(
+        *(afetch_episode_synopsis(fetcher, ep.get("url"), ttl=ttl) for ep in missing)
+    )
+    for ep, synopsis in zip(missing, synopses, strict=True):
+        ep["synopsis"] = synopsis
     return episodes
 
 
-def ingest_anime_metadata(query: str) -> list[int]:
+def fetch_episodes(mal_id: int) -> list[dict[str, Any]]:
+    """Synchronous wrapper of `afetch_episodes`."""
+    return _run(lambda fetcher: afetch_episodes(fetcher, mal_id))
+
+
+def load_anime_metadata(mal_id: int) -> dict[str, Any] | None:
+    """Read the META_DIR file of a previous ingest, None if missing or unreadable."""
+    file_path = find_data_file(META_DIR, str(mal_id))
+    if file_path is None:
+        return None
+    try:
+        data: dict[str, Any] = read_json(file_path)
+    except READ_ERRORS:
+        logger.warning(f"Ignoring unreadable metadata file {file_path}")
+        return None
+    return data
+
+
+@dataclass
+class _TitleJob:
+    """An anime travelling through the ingest pipeline."""
+
+    anime: dict[str, Any]
+    ttl: float
+    episodes: list[dict[str, Any]] = field(default_factory=list)
+    pending: int = 0  # Episodes whose synopsis is not resolved yet
+
+
+class _IngestPipeline:
+    """
+    Staged ingest pipeline connected by bounded queues:
+
+        episodes (async, `workers` titles) -> download (async episode pages)
+        -> parse (process pool running `_extract_synopsis_from_mal`) -> write
+
+    Network-bound and CPU-bound work overlap instead of alternating, and each title
+    is written to META_DIR as soon as its last synopsis is parsed.
+
+    With a `journal`, resolved episodes and saved titles are recorded as they
+    complete, and those recorded by an interrupted run are skipped. With a
+    `registry`, titles still fresh under `policy` are skipped and every saved
+    title is registered.
+
+    An episode page that fails to download or parse, whatever the error, is
+    resolved without synopsis so its title is still written. Titles that never
+    reach the write stage are counted and reported at the end of the run.
+    """
+
+    def __init__(
+        self,
+        fetcher: AsyncFetcher,
+        workers: int,
+        delta: bool,
+        parse_processes: int,
+        journal: IngestJournal | None = None,
+        registry: TitleRegistry | None = None,
+        policy: StalenessPolicy = DEFAULT_STALENESS_POLICY,
+    ) -> None:
+        self.fetcher = fetcher
+        self.delta = delta
+        self.journal = journal
+        self.registry = registry
+        self.policy = policy
+        self.done: set[int] = set()
+        self.total = 0
+        self.executor = (
+            ProcessPoolExecutor(parse_processes) if parse_processes > 0 else None
+        )
+        size = PIPELINE_QUEUE_SIZE
+        self.episodes = Stage("episodes", self._list_episodes, workers, size)
+        self.download = Stage(
+            "download", self._download_page, MAX_CONCURRENT_REQUESTS, size
+        )
+        self.parse = Stage("parse", self._parse_page, parse_processes, size)
+        self.write = Stage("write", self._write_title, 1, size)
+        self.pipeline = Pipeline([self.episodes, self.download, self.parse, self.write])
+
+    async def run(self, animes_data: list[dict[str, Any]]) -> set[int]:
+        self.total = len(animes_data)
+        animes_data = self._skip_saved(animes_data)
+        try:
+            async with self.pipeline:
+                for anime in animes_data:
+                    await self.episodes.put(
+                        _TitleJob(anime=anime, ttl=cache_ttl(anime))
+                    )
+                await self.pipeline.join()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+        self.pipeline.log_stats()
+        self._report_failed(animes_data)
+        return self.done
+
+    def _report_failed(self, animes_data: list[dict[str, Any]]) -> None:
+        failed = [a["mal_id"] for a in animes_data if a["mal_id"] not in self.done]
+        self.fetcher.metrics.inc("ingest_titles_failed_total", len(failed))
+        if failed:
+            logger.warning(f"[!] {len(failed)} titles not saved: {failed}")
+
+    def _skip_saved(self, animes_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Mark as done the titles saved by this job or still fresh elsewhere."""
+        if self.journal is not None:
+            saved = self.journal.titles()
+            self.done |= {a["mal_id"] for a in animes_data if a["mal_id"] in saved}
+            if self.done:
+                logger.info(f"[+] Resuming: {len(self.done)} titles already saved")
+        if self.registry is not None:
+            fresh = {
+                mal_id
+                for mal_id in self.registry.fresh(animes_data, self.policy)
+                if find_data_file(META_DIR, str(mal_id)) is not None
+            }
+            logger.info(f"[+] Registry: {len(fresh - self.done)} titles still fresh")
+            self.done |= fresh
+        return [a for a in animes_data if a["mal_id"] not in self.done]
+
+    async def _list_episodes(self, job: _TitleJob) -> None:
+        mal_id = job.anime["mal_id"]
+        previous = load_anime_metadata(mal_id) if self.delta else None
+        try:
+            job.episodes, missing = await afetch_episode_list(
+                self.fetcher,
+                mal_id,
+                ttl=job.ttl,
+                known_episodes=previous["episodes"] if previous else None,
+            )
+        except httpx.HTTPError:
+            logger.exception(f"Failed to ingest anime {mal_id}")
+            return
+        if self.journal is not None:
+            missing = self._skip_resolved(mal_id, missing)
+        job.pending = len(missing)
+        if not missing:
+            await self.write.put(job)
+        for ep in missing:
+            await self.download.put((job, ep))
+
+    def _skip_resolved(
+        self, mal_id: int, missing: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Fill in the episodes the journal resolved, return the others."""
+        assert self.journal is not None
+        resolved = self.journal.episodes(mal_id)
+        for ep in missing:
+            if ep["mal_id"] in resolved:
+                ep["synopsis"] = resolved[ep["mal_id"]].get("synopsis")
+        return [ep for ep in missing if ep["mal_id"] not in resolved]
+
+    async def _download_page(self, item: tuple[_TitleJob, dict[str, Any]]) -> None:
+        job, ep = item
+        try:
+            html = await afetch_episode_page(self.fetcher, ep.get("url"), ttl=job.ttl)
+        except Exception:
+            logger.exception(f"Failed to download episode page {ep.get('url')}")
+            html = None
+        if html is None:
+            await self._resolve(job, ep, None)
+        else:
+            await self.parse.put((job, ep, html))
+
+    async def _parse_page(self, item: tuple[_TitleJob, dict[str, Any], str]) -> None:
+        job, ep, html = item
+        try:
+            synopsis = await self._parse(html)
+        except Exception:  # E.g. BrokenProcessPool
+            logger.exception(f"Failed to parse episode page {ep.get('url')}")
+            synopsis = None
+        await self._resolve(job, ep, synopsis)
+
+    async def _parse(self, html: str) -> str | None:
+        metrics = self.fetcher.metrics
+        if self.executor is None:
+            synopsis, parse_seconds = _timed_extract_synopsis(html)
+        else:
+            loop = asyncio.get_running_loop()
+            start = perf_counter()
+            synopsis, parse_seconds = await loop.run_in_executor(
+                self.executor, _timed_extract_synopsis, html
+            )
+            wait_seconds = perf_counter() - start - parse_seconds
+            metrics.observe("ingest_parse_queue_seconds", max(wait_seconds, 0.0))
+        metrics.observe("ingest_parse_seconds", parse_seconds)
+        return synopsis
+
+    async def _resolve(
+        self, job: _TitleJob, ep: dict[str, Any], synopsis: str | None
+    ) -> None:
+        ep["synopsis"] = synopsis
+        if self.journal is not None:
+            self.journal.record_episode(job.anime["mal_id"], ep)
+        job.pending -= 1
+        if job.pending == 0:
+            await self.write.put(job)
+
+    async def _write_title(self, job: _TitleJob) -> None:
+        mal_id = job.anime["mal_id"]
+        data = {"summary": job.anime, "episodes": job.episodes}
+        written = save_data(file_path=data_path(META_DIR, str(mal_id)), data=data)
+        self.fetcher.metrics.inc("ingest_bytes_written_total", written, kind="meta")
+        if self.journal is not None:
+            self.journal.record_title(mal_id)
+        if self.registry is not None:
+            self.registry.record(mal_id, len(job.episodes), job.anime.get("status"))
+        self.done.add(mal_id)
+        logger.info(f"[+] Saved {len(self.done)}/{self.total} titles")
+
+
+async def _ingest_animes(
+    fetcher: AsyncFetcher,
+    animes_data: list[dict[str, Any]],
+    workers: int,
+    delta: bool = False,
+    parse_processes: int | None = None,
+    journal: IngestJournal | None = None,
+    policy: StalenessPolicy = DEFAULT_STALENESS_POLICY,
+) -> list[int]:
+    """
+    Ingest every anime through the staged `_IngestPipeline`. A title whose episode
+    list keeps failing is logged and skipped so one bad title does not abort a long
+    crawl. Per-stage throughput and the bottleneck stage are logged at the end.
+
+    Titles crawled recently by any query, according to the title registry and the
+    staleness `policy`, are not fetched again but still count as ingested.
+
+    Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
+        animes_data (list[dict[str, Any]]): Anime metadata to ingest.
+        workers (int): Titles whose episode lists are fetched at the same time.
+        delta (bool): Only fetch what is missing from previously saved files.
+        parse_processes (int | None): Size of the parsing process pool; 0 parses
+            in the event loop. Defaults to PARSE_PROCESSES.
+        journal (IngestJournal | None): Journal of the running crawl.
+        policy (StalenessPolicy): When a registered title must be crawled again.
+
+    Returns:
+        list[int]: MyAnimeList IDs of the titles that were saved or are fresh, in
+        input order.
+    """
+    if parse_processes is None:
+        parse_processes = PARSE_PROCESSES
+    registry = TitleRegistry(REGISTRY_PATH)
+    try:
+        pipeline = _IngestPipeline(
+            fetcher, workers, delta, parse_processes, journal, registry, policy
+        )
+        done = await pipeline.run(animes_data)
+    finally:
+        registry.close()
+    return [a["mal_id"] for a in animes_data if a["mal_id"] in done]
+
+
+async def aingest_anime_metadata(
+    fetcher: AsyncFetcher,
+    query: str,
+    delta: bool = False,
+    journal: IngestJournal | None = None,
+) -> list[int]:
     """
     Ingest anime metadata from MyAnimeList based on a search query.
-    Fetches metadata, filters it, retrieves episode data, and saves it to files.
+    Fetches metadata, filters it, retrieves episode data of the titles concurrently,
+    and saves it to files.
 
     Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
         query (str): The search query for anime titles.
+        delta (bool): Only fetch episodes and synopses missing from the files
+            saved by a previous ingest, and merge them in.
+        journal (IngestJournal | None): Journal recording the progress of the job.
 
     Returns:
         list[int]: List of MyAnimeList IDs for the ingested anime.
@@ -166,11 +738,177 @@ def ingest_anime_metadata(query: str) -> list[int]:
         logger.warning("No query provided for anime metadata ingestion.")
         return []
 
-    animes_data = fetch_metadata_from_myanimelist(query)
+    animes_data = await afetch_metadata_from_myanimelist(
+        fetcher, query, journal=journal
+    )
     animes_data = filter_anime_metadata(animes_data)
-    for anime in animes_data:
-        mal_id = anime["mal_id"]
-        episodes = fetch_episodes(mal_id)
-        data = {"summary": anime, "episodes": episodes}
-        save_data(file_path=META_DIR / f"{mal_id}.json", data=data)
-    return [a["mal_id"] for a in animes_data]
+    return await _ingest_animes(
+        fetcher, animes_data, CRAWL_WORKERS, delta=delta, journal=journal
+    )
+
+
+def ingest_anime_metadata(
+    query: str, delta: bool = False, resume: bool = False
+) -> list[int]:
+    """
+    Synchronous wrapper of `aingest_anime_metadata`, journaled. With `resume`, the
+    titles, pages and episodes completed by an interrupted run of the same query
+    are not fetched again.
+    """
+    journal = open_journal(resume, queries=[query], delta=delta)
+    return _run(
+        lambda fetcher: aingest_anime_metadata(fetcher, query, delta, journal),
+        journal=journal,
+    )
+
+
+async def acrawl_catalog(
+    fetcher: AsyncFetcher,
+    queries: list[str] | None = None,
+    seasons: list[tuple[int, str]] | None = None,
+    top_pages: int = 0,
+    max_pages: int | None = None,
+    workers: int = CRAWL_WORKERS,
+    delta: bool = False,
+    parse_processes: int | None = None,
+    journal: IngestJournal | None = None,
+    policy: StalenessPolicy = DEFAULT_STALENESS_POLICY,
+) -> list[int]:
+    """
+    Bulk catalog crawl: collect titles from every search query, season and the top
+    ranking, dedupe them by `mal_id`, and only then fetch episodes, so a title
+    returned by several sources is crawled once.
+
+    Args:
+        fetcher (AsyncFetcher): Rate-limited client used for the requests.
+        queries (list[str] | None): Search queries.
+        seasons (list[tuple[int, str]] | None): (year, season) pairs to sweep.
+        top_pages (int): Number of top-anime ranking pages to sweep.
+        max_pages (int | None): Maximum result pages per query or season.
+        workers (int): Titles whose episodes are fetched at the same time.
+        delta (bool): Only fetch what is missing from previously saved files.
+        parse_processes (int | None): Size of the synopsis parsing process pool.
+        journal (IngestJournal | None): Journal recording the progress of the crawl.
+        policy (StalenessPolicy): When a registered title must be crawled again.
+
+    Returns:
+        list[int]: MyAnimeList IDs of the ingested anime.
+    """
+    sources: list[Awaitable[list[dict[str, Any]]]] = [
+        afetch_metadata_from_myanimelist(fetcher, query, max_pages, journal)
+        for query in queries or []
+        if query
+    ]
+    sources += [
+        afetch_season(fetcher, year, season, max_pages, journal)
+        for year, season in seasons or []
+    ]
+    if top_pages:
+        sources.append(afetch_top(fetcher, top_pages, journal))
+
+    candidates: dict[int, dict[str, Any]] = {}
+    for animes_data in await asyncio.gather(*sources):
+        for anime in animes_data:
+            candidates.setdefault(anime["mal_id"], anime)
+    animes_data = filter_anime_metadata(list(candidates.values()))
+    logger.info(
+        f"[+] {len(candidates)} unique titles found, {len(animes_data)} supported"
+    )
+    return await _ingest_animes(
+        fetcher,
+        animes_data,
+        workers,
+        delta=delta,
+        parse_processes=parse_processes,
+        journal=journal,
+        policy=policy,
+    )
+
+
+def _parse_season(value: str) -> tuple[int, str]:
+    year, _, season = value.partition("/")
+    if season not in {"winter", "spring", "summer", "fall"}:
+        raise argparse.ArgumentTypeError(f"Expected YEAR/SEASON, got '{value}'")
+    return int(year), season
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Crawl MyAnimeList into META_DIR.")
+    parser.add_argument("--query", action="append", default=[], help="Search query")
+    parser.add_argument(
+        "--queries-file", type=Path, help="File with one search query per line"
+    )
+    parser.add_argument(
+        "--season",
+        action="append",
+        default=[],
+        type=_parse_season,
+        help="Season to sweep, e.g. 2022/spring",
+    )
+    parser.add_argument("--top-pages", type=int, default=0)
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS)
+    parser.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES)
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only fetch episodes and synopses missing from existing files",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted crawl with the same arguments",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        help="Re-crawl registered titles older than this many hours, whatever "
+        "their status (0 re-crawls everything). Defaults to the status-based policy",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=Path,
+        help="Write the ingest metrics there in Prometheus text format",
+    )
+    args = parser.parse_args()
+
+    queries = list(args.query)
+    if args.queries_file:
+        lines = args.queries_file.read_text(encoding="utf-8").splitlines()
+        queries += [line.strip() for line in lines if line.strip()]
+    if not (queries or args.season or args.top_pages):
+        parser.error("Provide --query, --queries-file, --season or --top-pages")
+
+    policy = DEFAULT_STALENESS_POLICY
+    if args.max_age is not None:
+        policy = StalenessPolicy.uniform(args.max_age * 3600)
+    journal = open_journal(
+        args.resume,
+        queries=queries,
+        seasons=args.season,
+        top_pages=args.top_pages,
+        max_pages=args.max_pages,
+        delta=args.delta,
+    )
+    mal_ids = _run(
+        lambda fetcher: acrawl_catalog(
+            fetcher,
+            queries=queries,
+            seasons=args.season,
+            top_pages=args.top_pages,
+            max_pages=args.max_pages,
+            workers=args.workers,
+            delta=args.delta,
+            parse_processes=args.parse_processes,
+            journal=journal,
+            policy=policy,
+        ),
+        journal=journal,
+        metrics_file=args.metrics_file,
+    )
+    logger.info(f"[+] Ingested {len(mal_ids)} titles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import bisect
+import math
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from time import perf_counter
+
+from loguru import logger
+
+from src.constants import METRICS_LATENCY_BUCKETS
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+@dataclass
+class Histogram:
+    """
+    Fixed-bucket histogram. `counts[i]` holds the observations in
+    (buckets[i - 1], buckets[i]]; the last slot holds those above every bucket.
+    """
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.counts = self.counts or [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the `q` quantile by linear interpolation inside its bucket, like
+        PromQL `histogram_quantile`. Values above the last bucket report its bound.
+        """
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts[:-1]):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Metrics:
+    """
+    In-process counters and histograms, keyed by name and labels.
+
+    Cheap enough to update from every request: no locking is needed because the
+    ingest only updates them from the event loop thread. Exposed as a log summary
+    and as Prometheus text exposition format.
+
+    Use:
+        metrics.inc("http_retries_total", endpoint="episodes")
+        with metrics.time("http_request_seconds", endpoint="search"):
+            ...
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = METRICS_LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: object) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        if key not in series:
+            series[key] = Histogram(self.buckets)
+        series[key].observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels: object) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start, **labels)
+
+    def value(self, name: str, **labels: object) -> float:
+        """Sum of the counter series of `name` matching all the given labels."""
+        wanted = set(_labels(labels))
+        return sum(
+            v for k, v in self.counters.get(name, {}).items() if wanted <= set(k)
+        )
+
+    def log_summary(self) -> None:
+        for name, series in sorted(self.histograms.items()):
+            for labels, h in sorted(series.items()):
+                logger.info(
+                    f"{name}{_format_labels(labels)}: {h.count} obs, "
+                    f"mean {h.mean * 1000:.1f}ms, p50 {h.quantile(0.5) * 1000:.1f}ms, "
+                    f"p95 {h.quantile(0.95) * 1000:.1f}ms"
+                )
+        for name, counters in sorted(self.counters.items()):
+            for labels, value in sorted(counters.items()):
+                logger.info(f"{name}{_format_labels(labels)}: {value:g}")
+
+    def to_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, counters in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines += [
+                f"{name}{_format_labels(labels)} {value:g}"
+                for labels, value in sorted(counters.items())
+            ]
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, h in sorted(series.items()):
+                cumulative = 0
+                for bound, n in zip((*h.buckets, math.inf), h.counts, strict=True):
+                    cumulative += n
+                    le = "+Inf" if bound == math.inf else f"{bound:g}"
+                    bucket_labels = _format_labels(labels, f'le="{le}"')
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {h.total:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        path.write_text(self.to_prometheus(), encoding="utf-8")
+        logger.info(f"Metrics written to {path}")
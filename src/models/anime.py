@@ -47,9 +47,9 @@ class Episode(TypedDict):
     title_romanji: NotRequired[str | None]
 
 
-class AnimeChunk(TypedDict):
-    """Represents a chunk of up to 13 episodes from a single anime,
-    bundled with anime-level metadata for RAG indexing.
+class AnimeRecord(TypedDict):
+    """Anime-level metadata, stored once per anime in the catalog
+    (see `src.db.catalog.AnimeCatalog`) and joined to its chunks on demand.
 
     Fields:
         mal_id: MyAnimeList anime ID (required)
@@ -79,13 +79,11 @@ class AnimeChunk(TypedDict):
         demographics: Target demographic labels
         aired_from: ISO date when airing started
         aired_to: ISO date when airing ended
-        episodes: List of up to 13 Episodes
     """
 
     mal_id: int
     url: str
     title: str
-    episodes: list[Episode]
 
     synopsis: NotRequired[str | None]
     title_english: NotRequired[str | None]
@@ -111,3 +109,30 @@ class AnimeChunk(TypedDict):
     demographics: NotRequired[str | None]
     aired_from: NotRequired[str | None]
     aired_to: NotRequired[str | None]
+
+
+class AnimeChunk(TypedDict):
+    """Represents a chunk of up to 13 episodes from a single anime, for RAG
+    indexing. The anime-level metadata is not repeated in every chunk: it is
+    stored once per anime as an AnimeRecord, referenced by `mal_id`.
+
+    Chunks written before the catalog existed carry the AnimeRecord fields
+    themselves.
+
+    Fields:
+        mal_id: MyAnimeList anime ID, key of its AnimeRecord (required)
+        title: English or romaji title (required)
+        episodes: List of up to 13 Episodes (required)
+        anime_hash: SHA-256 of the AnimeRecord, so that a change of the anime
+            metadata changes the content hash of its chunks
+        chunk_id: Stable chunk ID, "{mal_id}-{chunk index}"
+        content_hash: SHA-256 of the other fields, to detect changed chunks
+    """
+
+    mal_id: int
+    title: str
+    episodes: list[Episode]
+
+    anime_hash: NotRequired[str]
+    chunk_id: NotRequired[str]
+    content_hash: NotRequired[str]
@@ -0,0 +1,423 @@
+import math
+from collections.abc import Iterable
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
+from llama_index.core.vector_stores.types import FilterOperator
+from llama_index.core.vector_stores.types import MetadataFilter
+from llama_index.core.vector_stores.types import MetadataFilters
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from llama_index.core.vector_stores.types import VectorStoreQueryResult
+from llama_index.core.vector_stores.utils import build_metadata_filter_fn
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from loguru import logger
+from pydantic import PrivateAttr
+
+from src.constants import NUMPY_IVF_MIN_VECTORS
+from src.constants import NUMPY_IVF_PROBES
+from src.constants import NUMPY_VECTOR_DTYPE
+from src.storage import JsonlWriter
+from src.storage import atomic_dir
+from src.storage import iter_jsonl
+from src.storage import read_json
+from src.storage import write_json
+
+VECTOR_DTYPES = ("float16", "int8")
+SEARCH_BLOCK_ROWS = 16384  # Stored rows converted to float32 at a time
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64  # Training vectors per IVF list
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Unit `vectors` stored as `dtype`: float16, or int8 with one float32 scale per
+    vector (its largest absolute component maps to 127).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray | None]: The stored matrix, and the scales
+        for int8.
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        stored = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return stored, scales.astype(np.float32)
+    raise ValueError(f"Unknown vector dtype {dtype!r}: {VECTOR_DTYPES}")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)  # type: ignore[no-any-return]
+
+
+def anime_filter(  # type: ignore[no-any-unimported]
+    filters: MetadataFilters | None,
+) -> list[int] | None:
+    """
+    MyAnimeList IDs `filters` restricts the nodes to, when it is a single "mal_id"
+    filter (see `src.retrieval.title_filters`), else None.
+    """
+    if filters is None or len(filters.filters) != 1:
+        return None
+    f = filters.filters[0]
+    if not isinstance(f, MetadataFilter) or f.key != "mal_id":
+        return None
+    if f.operator == FilterOperator.EQ:
+        values: list[Any] = [f.value]
+    elif f.operator == FilterOperator.IN and isinstance(f.value, list):
+        values = f.value
+    else:
+        return None
+    mal_ids = [v for v in values if type(v) is int]  # Not bools
+    return mal_ids if len(mal_ids) == len(values) else None
+
+
+def train_ivf(vectors: np.ndarray, lists: int, seed: int = 0) -> np.ndarray:
+    """Centroids of `lists` IVF lists: spherical k-means on a sample of `vectors`."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, lists, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=lists) == 0
+        sums[empty] = centroids[empty]  # Keep the centroid of an empty list
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_ivf(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.concatenate(
+        [
+            np.argmax(vectors[i : i + SEARCH_BLOCK_ROWS] @ centroids.T, axis=1)
+            for i in range(0, len(vectors), SEARCH_BLOCK_ROWS)
+        ]
+    )
+
+
+class NumpyVectorStore(BasePydanticVectorStore):  # type: ignore[no-any-unimported]
+    """
+    In-process vector store: a memory-mapped float16 or int8 matrix of unit
+    vectors with a JSONL sidecar holding the text and metadata of each node.
+
+    Queries are exact cosine top-k searches with vectorized NumPy. Stores of at
+    least `ivf_min_vectors` vectors are partitioned into sqrt(n) IVF lists when
+    persisted: queries then only scan the `ivf_probes` lists whose centroids are
+    closest to the query, or every list with metadata filters. Filters on the
+    anime (`mal_id`) look up its rows in a sorted index of the stored rows,
+    built on loading, instead of scanning the metadata.
+
+    Nodes added or deleted after loading are searched and ignored right away, and
+    written to disk by `persist`, which rewrites the store in a temporary
+    directory swapped with the previous one.
+
+    Persisted layout of a directory (see `persist` and `from_persist_dir`):
+        store.json: dtype, dimension, number of IVF lists
+        vectors.npy: the stored matrix, memory-mapped when loaded
+        scales.npy: per-vector scales of an int8 matrix
+        centroids.npy, offsets.npy: IVF centroids, and first row of each list
+            (rows are sorted by list)
+        nodes.jsonl.zst: ID, text and metadata of each row
+    """
+
+    stores_text: bool = True
+    flat_metadata: bool = True
+    dtype: str = NUMPY_VECTOR_DTYPE
+    ivf_min_vectors: int = NUMPY_IVF_MIN_VECTORS
+    ivf_probes: int = NUMPY_IVF_PROBES
+
+    _vectors: np.ndarray | None = PrivateAttr(default=None)
+    _scales: np.ndarray | None = PrivateAttr(default=None)
+    _centroids: np.ndarray | None = PrivateAttr(default=None)
+    _offsets: np.ndarray | None = PrivateAttr(default=None)
+    # Stored rows sorted by mal_id (-1 without one), and their sorted mal_ids
+    _mal_id_rows: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(0, int))
+    _mal_ids: np.ndarray = PrivateAttr(default_factory=lambda: np.empty(0, int))
+    _pending: list[np.ndarray] = PrivateAttr(default_factory=list)
+    _entries: list[dict[str, Any]] = PrivateAttr(default_factory=list)
+    _deleted: set[int] = PrivateAttr(default_factory=set)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @classmethod
+    def from_persist_dir(
+        cls, persist_dir: str | Path, **kwargs: Any
+    ) -> "NumpyVectorStore":
+        persist_dir = Path(persist_dir)
+        info = read_json(persist_dir / "store.json")
+        store = cls(dtype=info["dtype"], **kwargs)
+        store._vectors = np.load(persist_dir / "vectors.npy", mmap_mode="r")
+        if info["dtype"] == "int8":
+            store._scales = np.load(persist_dir / "scales.npy")
+        if info["ivf_lists"]:
+            store._centroids = np.load(persist_dir / "centroids.npy")
+            store._offsets = np.load(persist_dir / "offsets.npy")
+        store._entries = list(iter_jsonl(persist_dir / "nodes.jsonl.zst"))
+        store._index_mal_ids()
+        return store
+
+    def _index_mal_ids(self) -> None:
+        mal_ids = np.asarray(
+            [
+                mal_id if type(mal_id := e["metadata"].get("mal_id")) is int else -1
+                for e in self._entries[: self.stored_rows]
+            ],
+            dtype=np.int64,
+        )
+        self._mal_id_rows = np.argsort(mal_ids, kind="stable")
+        self._mal_ids = mal_ids[self._mal_id_rows]
+
+    def _anime_rows(self, mal_ids: list[int]) -> np.ndarray:
+        """Rows of the anime with one of `mal_ids`, in row order."""
+        wanted = np.unique(np.asarray(mal_ids, dtype=np.int64))
+        starts = np.searchsorted(self._mal_ids, wanted, side="left")
+        stops = np.searchsorted(self._mal_ids, wanted, side="right")
+        stored = [self._mal_id_rows[a:b] for a, b in zip(starts, stops, strict=True)]
+        wanted_set = set(mal_ids)
+        pending = [
+            row
+            for row in range(self.stored_rows, len(self._entries))
+            if self._entries[row]["metadata"].get("mal_id") in wanted_set
+        ]
+        rows = np.concatenate([*stored, np.asarray(pending, dtype=np.int64)])
+        return np.sort(rows)
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    @property
+    def stored_rows(self) -> int:
+        return 0 if self._vectors is None else len(self._vectors)
+
+    @property
+    def count(self) -> int:
+        """Number of live vectors (not `__len__`: an empty store must be truthy)."""
+        return len(self._entries) - len(self._deleted)
+
+    def add(  # type: ignore[no-any-unimported]
+        self,
+        nodes: Sequence[BaseNode],
+        **add_kwargs: Any,  # noqa: ARG002
+    ) -> list[str]:
+        if not nodes:
+            return []
+        vectors = np.asarray([node.get_embedding() for node in nodes], np.float32)
+        self._pending.append(normalize(vectors))
+        for node in nodes:
+            self._entries.append(
+                {
+                    "id": node.node_id,
+                    "text": node.get_content(),
+                    "metadata": node_to_metadata_dict(
+                        node, remove_text=True, flat_metadata=self.flat_metadata
+                    ),
+                }
+            )
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:  # noqa: ARG002
+        self._deleted.update(
+            row
+            for row, entry in enumerate(self._entries)
+            if entry["metadata"].get("ref_doc_id") == ref_doc_id
+        )
+
+    def _matching_rows(  # type: ignore[no-any-unimported]
+        self,
+        node_ids: list[str] | None = None,
+        doc_ids: list[str] | None = None,
+        filters: MetadataFilters | None = None,
+    ) -> np.ndarray:
+        """Live rows with one of `node_ids`, of one of `doc_ids`, matching `filters`."""
+        entries = self._entries
+        rows: Iterable[int] = range(len(entries))
+        mal_ids = anime_filter(filters)
+        if mal_ids is not None:  # Only the rows of these anime are scanned
+            rows = self._anime_rows(mal_ids).tolist()
+            filters = None
+        # Looked up by node ID: the rows are passed as strings
+        matches = build_metadata_filter_fn(
+            lambda row: entries[int(row)]["metadata"], filters
+        )
+        node_id_set = set(node_ids) if node_ids else None
+        doc_id_set = set(doc_ids) if doc_ids else None
+        matching = [
+            row
+            for row in rows
+            if row not in self._deleted
+            and (node_id_set is None or entries[row]["id"] in node_id_set)
+            and (
+                doc_id_set is None
+                or entries[row]["metadata"].get("ref_doc_id") in doc_id_set
+            )
+            and matches(row)  # type: ignore[arg-type]
+        ]
+        return np.asarray(matching, dtype=np.int64)
+
+    def _probed_rows(self, query: np.ndarray) -> np.ndarray:
+        """Stored rows of the IVF lists closest to `query`, or all stored rows."""
+        if self._centroids is None or self._offsets is None:
+            return np.arange(self.stored_rows)
+        probes = min(self.ivf_probes, len(self._centroids))
+        lists = np.argpartition(-(self._centroids @ query), probes - 1)[:probes]
+        return np.concatenate(
+            [np.arange(self._offsets[i], self._offsets[i + 1]) for i in lists]
+        )
+
+    def _stored_scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Cosine similarities of stored `rows`, in blocks of float32 vectors."""
+        scores = np.empty(len(rows), dtype=np.float32)
+        if self._vectors is None:
+            return scores
+        contiguous = len(rows) > 0 and rows[-1] - rows[0] == len(rows) - 1
+        for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+            block_rows = rows[start : start + SEARCH_BLOCK_ROWS]
+            if contiguous:  # A slice of the memory map: no copy before the cast
+                block = self._vectors[block_rows[0] : block_rows[-1] + 1]
+            else:
+                block = self._vectors[block_rows]
+            block_scores = block.astype(np.float32) @ query
+            if self._scales is not None:
+                block_scores *= self._scales[block_rows]
+            scores[start : start + len(block_rows)] = block_scores
+        return scores
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        stored = rows[rows < self.stored_rows]
+        pending = rows[rows >= self.stored_rows] - self.stored_rows
+        scores = [self._stored_scores(stored, query)]
+        if len(pending):
+            if len(self._pending) > 1:  # Concatenated once per batch of additions
+                self._pending = [np.concatenate(self._pending)]
+            scores.append(self._pending[0][pending] @ query)
+        return np.concatenate(scores)
+
+    def query(  # type: ignore[no-any-unimported]
+        self,
+        query: VectorStoreQuery,
+        **kwargs: Any,  # noqa: ARG002
+    ) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("NumpyVectorStore only supports embedding queries")
+        vector = normalize(np.asarray(query.query_embedding, dtype=np.float32))
+        if query.filters or query.doc_ids or query.node_ids:
+            rows = self._matching_rows(query.node_ids, query.doc_ids, query.filters)
+        else:
+            pending = np.arange(self.stored_rows, len(self._entries))
+            rows = np.concatenate([self._probed_rows(vector), pending])
+            if self._deleted:
+                rows = rows[~np.isin(rows, list(self._deleted))]
+        scores = self._scores(rows, vector)
+        k = min(query.similarity_top_k, len(rows))
+        if k == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        nodes = [self._node(int(rows[i])) for i in top]
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=scores[top].tolist(),
+            ids=[node.node_id for node in nodes],
+        )
+
+    def _node(self, row: int) -> BaseNode:  # type: ignore[no-any-unimported]
+        entry = self._entries[row]
+        return metadata_dict_to_node(entry["metadata"], text=entry["text"])
+
+    def get_nodes(  # type: ignore[no-any-unimported]
+        self,
+        node_ids: list[str] | None = None,
+        filters: MetadataFilters | None = None,
+    ) -> list[BaseNode]:
+        return [
+            self._node(int(row)) for row in self._matching_rows(node_ids, None, filters)
+        ]
+
+    def _live_vectors(self) -> np.ndarray:
+        """All live vectors as float32, in row order."""
+        parts = []
+        if self._vectors is not None:
+            stored = np.asarray(self._vectors, dtype=np.float32)
+            if self._scales is not None:
+                stored *= self._scales[:, None]
+            parts.append(stored)
+        parts.extend(self._pending)
+        if not parts:
+            return np.empty((0, 0), dtype=np.float32)
+        vectors = np.concatenate(parts)
+        if self._deleted:
+            vectors = np.delete(vectors, sorted(self._deleted), axis=0)
+        return vectors
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:  # noqa: ARG002
+        """
+        Write the store to the `persist_path` directory and memory-map it again.
+        The files are written to a temporary directory first, which then replaces
+        the previous one (see `src.storage.atomic_dir`).
+
+        Rows are sorted by IVF list when the store has at least `ivf_min_vectors`
+        vectors.
+        """
+        persist_dir = Path(persist_path)
+        with atomic_dir(persist_dir) as tmp_dir:
+            lists, entries = self._write(tmp_dir)
+        logger.info(
+            f"Persisted {len(entries)} {self.dtype} vectors to {persist_dir}"
+            + (f" in {lists} IVF lists" if lists else "")
+        )
+        reloaded = self.from_persist_dir(persist_dir)
+        self._vectors, self._scales = reloaded._vectors, reloaded._scales
+        self._centroids, self._offsets = reloaded._centroids, reloaded._offsets
+        self._mal_id_rows, self._mal_ids = reloaded._mal_id_rows, reloaded._mal_ids
+        self._entries, self._pending, self._deleted = entries, [], set()
+
+    def _write(self, persist_dir: Path) -> tuple[int, list[dict[str, Any]]]:
+        """
+        Write the live vectors and entries to `persist_dir`.
+
+        Returns:
+            tuple[int, list[dict[str, Any]]]: The number of IVF lists, and the
+            entries in stored row order.
+        """
+        vectors = self._live_vectors()
+        entries = [e for i, e in enumerate(self._entries) if i not in self._deleted]
+        lists = math.isqrt(len(vectors)) if len(vectors) >= self.ivf_min_vectors else 0
+        if lists:
+            centroids = train_ivf(vectors, lists)
+            assignment = assign_ivf(vectors, centroids)
+            order = np.argsort(assignment, kind="stable")
+            vectors = vectors[order]
+            entries = [entries[i] for i in order]
+            offsets = np.concatenate(
+                [[0], np.cumsum(np.bincount(assignment, minlength=lists))]
+            )
+            np.save(persist_dir / "centroids.npy", centroids)
+            np.save(persist_dir / "offsets.npy", offsets)
+        stored, scales = quantize(vectors, self.dtype)
+        np.save(persist_dir / "vectors.npy", stored)
+        if scales is not None:
+            np.save(persist_dir / "scales.npy", scales)
+        with JsonlWriter(persist_dir / "nodes.jsonl.zst") as writer:
+            for entry in entries:
+                writer.write(entry)
+        write_json(
+            persist_dir / "store.json",
+            {
+                "dtype": self.dtype,
+                "dimension": vectors.shape[1] if len(vectors) else 0,
+                "ivf_lists": lists,
+            },
+        )
+        return lists, entries
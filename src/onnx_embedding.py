@@ -0,0 +1,150 @@
+import argparse
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import onnxruntime as ort  # type: ignore[import-untyped]
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.embeddings.base import Embedding
+from loguru import logger
+from pydantic import PrivateAttr
+from tokenizers import Tokenizer  # type: ignore[import-untyped]
+
+from src.constants import EMBEDDING_MODEL_NAME
+from src.constants import ONNX_MODEL_DIR
+
+ONNX_MAX_LENGTH = 512  # bge-small maximum sequence length
+# As llama_index.embeddings.huggingface for bge English models, which is not
+# imported here: it imports torch
+BGE_QUERY_INSTRUCTION = "Represent this question for searching relevant passages: "
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def onnx_model_path(model_dir: Path, quantized: bool) -> Path:
+    return model_dir / ("model_int8.onnx" if quantized else "model.onnx")
+
+
+def export_onnx_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    model_dir: Path = ONNX_MODEL_DIR,
+    quantize: bool = True,
+) -> None:
+    """
+    Export a Hugging Face BERT-style encoder and its tokenizer to `model_dir`.
+
+    Writes `model.onnx` (float32) and, with `quantize`, `model_int8.onnx` whose
+    weights are dynamically quantized to int8. Needs torch, transformers and onnx,
+    which the PyTorch backend already installs; serving only needs onnxruntime.
+    """
+    import torch
+    from onnxruntime import quantization
+    from transformers import AutoModel
+    from transformers import AutoTokenizer
+
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(model_dir)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["An anime episode"], return_tensors="pt")
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in INPUT_NAMES),
+        onnx_model_path(model_dir, quantized=False),
+        input_names=list(INPUT_NAMES),
+        output_names=["last_hidden_state"],
+        dynamic_axes=dict.fromkeys((*INPUT_NAMES, "last_hidden_state"), axes),
+        opset_version=17,
+        dynamo=False,
+    )
+    if quantize:
+        quantization.quantize_dynamic(
+            onnx_model_path(model_dir, quantized=False),
+            onnx_model_path(model_dir, quantized=True),
+            weight_type=quantization.QuantType.QInt8,
+        )
+    logger.info(f"Exported {model_name} to {model_dir}")
+
+
+class OnnxEmbedding(BaseEmbedding):  # type: ignore[no-any-unimported]
+    """
+    bge embedding model run by ONNX Runtime, optionally int8-quantized.
+
+    A drop-in replacement for `HuggingFaceEmbedding` on CPU: same instructions,
+    CLS pooling and normalization, without importing torch. The model is exported
+    to `model_dir` on first use if missing (see `export_onnx_model`).
+    """
+
+    _session: ort.InferenceSession = PrivateAttr()  # type: ignore[no-any-unimported]
+    _tokenizer: Tokenizer = PrivateAttr()  # type: ignore[no-any-unimported]
+    _query_instruction: str = PrivateAttr()
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        model_dir: Path = ONNX_MODEL_DIR,
+        quantized: bool = True,
+        threads: int = 0,
+        query_instruction: str = BGE_QUERY_INSTRUCTION,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(model_name=model_name, **kwargs)
+        self._query_instruction = query_instruction
+        path = onnx_model_path(model_dir, quantized)
+        if not path.exists():
+            export_onnx_model(model_name, model_dir, quantize=quantized)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads  # 0 lets ONNX Runtime choose
+        self._session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        self._tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(ONNX_MAX_LENGTH)
+        self._tokenizer.enable_padding()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    def _embed(self, texts: list[str]) -> list[Embedding]:
+        encodings = self._tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        wanted = {i.name for i in self._session.get_inputs()}
+        (hidden,) = self._session.run(
+            ["last_hidden_state"], {k: v for k, v in inputs.items() if k in wanted}
+        )
+        pooled = hidden[:, 0]  # CLS pooling, as bge
+        vectors = pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+        return vectors.tolist()  # type: ignore[no-any-return]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._embed([f"{self._query_instruction} {query}".strip()])[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return self._embed(texts)  # bge embeds documents without instruction
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the ONNX embedding model.")
+    parser.add_argument("--model-dir", type=Path, default=ONNX_MODEL_DIR)
+    parser.add_argument(
+        "--no-quantize", action="store_true", help="Only export the float32 model"
+    )
+    args = parser.parse_args()
+    export_onnx_model(model_dir=args.model_dir, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+import hashlib
+import json
 from typing import Any
 
 from src.models.anime import AnimeChunk
+from src.models.anime import AnimeRecord
 from src.models.anime import Episode
 
 
@@ -20,9 +23,73 @@ def parse_episode(ep: dict[str, Any]) -> Episode:
     )
 
 
+def chunk_content_hash(chunk: AnimeChunk) -> str:
+    """Hash of everything indexed from a chunk, i.e. all but its id and hash."""
+    content = {k: v for k, v in chunk.items() if k not in {"chunk_id", "content_hash"}}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def parse_anime_record(summary: dict[str, Any]) -> AnimeRecord:
+    return AnimeRecord(
+        mal_id=summary["mal_id"],
+        url=summary["url"],
+        title=summary["title"],
+        synopsis=summary.get("synopsis"),
+        title_english=summary.get("title_english"),
+        title_japanese=summary.get("title_japanese"),
+        title_synonyms=" ".join(summary.get("title_synonyms", [])),
+        score=summary.get("score"),
+        scored_by=summary.get("scored_by"),
+        rank=summary.get("rank"),
+        popularity=summary.get("popularity"),
+        members=summary.get("members"),
+        favorites=summary.get("favorites"),
+        season=summary.get("season"),
+        year=summary.get("year"),
+        status=summary.get("status"),
+        duration=summary.get("duration"),
+        rating=summary.get("rating"),
+        type=summary.get("type"),
+        source=summary.get("source"),
+        studios=" ".join([s["name"] for s in summary.get("studios", [])]),
+        genres=" ".join([g["name"] for g in summary.get("genres", [])]),
+        explicit_genres=" ".join(
+            [g["name"] for g in summary.get("explicit_genres", [])]
+        ),
+        themes=" ".join([t["name"] for t in summary.get("themes", [])]),
+        demographics=" ".join([d["name"] for d in summary.get("demographics", [])]),
+        aired_from=summary.get("aired", {}).get("from"),
+        aired_to=summary.get("aired", {}).get("to"),
+    )
+
+
+def anime_titles(summary: dict[str, Any]) -> list[str]:
+    """
+    Every title of an anime: its title, English and Japanese titles, and synonyms
+    (kept apart, unlike in the AnimeRecord), without duplicates.
+    """
+    titles = [
+        summary.get("title"),
+        summary.get("title_english"),
+        summary.get("title_japanese"),
+        *(summary.get("title_synonyms") or []),
+    ]
+    return list(dict.fromkeys(t.strip() for t in titles if t and t.strip()))
+
+
+def anime_record_hash(record: AnimeRecord) -> str:
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def parse_anime(
     data: dict[str, Any], max_episodes_per_chunk: int = 13
 ) -> list[AnimeChunk]:
+    """
+    Split the episodes of an anime into chunks referencing its AnimeRecord
+    (see `parse_anime_record`) by `mal_id`.
+    """
     summary = data["summary"]
     episodes_raw = data.get("episodes", [])
     episodes: list[Episode] = [parse_episode(ep) for ep in episodes_raw]
@@ -30,38 +97,17 @@ def parse_anime(
         episodes[i : i + max_episodes_per_chunk]
         for i in range(0, len(episodes), max_episodes_per_chunk)
     ]
-    return [
+    anime_hash = anime_record_hash(parse_anime_record(summary))
+    chunks = [
         AnimeChunk(
             mal_id=summary["mal_id"],
-            url=summary["url"],
             title=summary["title"],
-            synopsis=summary.get("synopsis"),
-            title_english=summary.get("title_english"),
-            title_japanese=summary.get("title_japanese"),
-            title_synonyms=" ".join(summary.get("title_synonyms", [])),
-            score=summary.get("score"),
-            scored_by=summary.get("scored_by"),
-            rank=summary.get("rank"),
-            popularity=summary.get("popularity"),
-            members=summary.get("members"),
-            favorites=summary.get("favorites"),
-            season=summary.get("season"),
-            year=summary.get("year"),
-            status=summary.get("status"),
-            duration=summary.get("duration"),
-            rating=summary.get("rating"),
-            type=summary.get("type"),
-            source=summary.get("source"),
-            studios=" ".join([s["name"] for s in summary.get("studios", [])]),
-            genres=" ".join([g["name"] for g in summary.get("genres", [])]),
-            explicit_genres=" ".join(
-                [g["name"] for g in summary.get("explicit_genres", [])]
-            ),
-            themes=" ".join([t["name"] for t in summary.get("themes", [])]),
-            demographics=" ".join([d["name"] for d in summary.get("demographics", [])]),
-            aired_from=summary.get("aired", {}).get("from"),
-            aired_to=summary.get("aired", {}).get("to"),
             episodes=episodes_batch,
+            anime_hash=anime_hash,
         )
         for episodes_batch in episode_batches
     ]
+    for i, chunk in enumerate(chunks):
+        chunk["chunk_id"] = f"{summary['mal_id']}-{i}"
+        chunk["content_hash"] = chunk_content_hash(chunk)
+    return chunks
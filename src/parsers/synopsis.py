@@ -0,0 +1,137 @@
+import html
+import re
+
+from bs4 import BeautifulSoup
+from loguru import logger
+
+# Attributes of a tag, whose quoted values may contain ">"
+_ATTRS = r"""(?:"[^"]*"|'[^']*'|[^'">])*"""
+# Only the tags that matter to locate the synopsis block. Comments, <script> and
+# <style> are matched as a whole so markup inside them is never mistaken for a tag.
+_TOKEN_RE = re.compile(
+    r"<!--.*?-->"
+    rf"|<(?P<raw>script|style)\b{_ATTRS}>.*?</(?P=raw)\s*>"
+    rf"|<(?P<close>/?)(?P<tag>div|h2)\b{_ATTRS}>",
+    re.IGNORECASE | re.DOTALL,
+)
+_H2_END_RE = re.compile(r"</h2\s*>", re.IGNORECASE)
+_TEXT_SKIP_RE = re.compile(
+    rf"<!--.*?-->|<(script|style)\b{_ATTRS}>.*?</\1\s*>|<{_ATTRS}>",
+    re.IGNORECASE | re.DOTALL,
+)
+# A fragment made of a single comment, or of a single element
+_COMMENT_RE = re.compile(r"<!--((?:(?!-->).)*)-->", re.DOTALL)
+_ELEMENT_RE = re.compile(
+    rf"<(?P<tag>[a-z][\w-]*)\b{_ATTRS}>(?P<content>.*)</(?P=tag)\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _get_text(fragment: str) -> str:
+    """Equivalent of BeautifulSoup `get_text(separator=" ", strip=True)`."""
+    texts = _TEXT_SKIP_RE.split(fragment)[::2]  # Without the captured tag names
+    parts = (html.unescape(p).strip() for p in texts if p)
+    return " ".join(p for p in parts if p)
+
+
+def _only_string(fragment: str) -> str | None:
+    """
+    Equivalent of BeautifulSoup `.string` for an element whose content is
+    `fragment`: its text when it is its only child, recursively through a single
+    child element, else None.
+    """
+    while _TEXT_SKIP_RE.search(fragment):
+        comment = _COMMENT_RE.fullmatch(fragment)
+        if comment:
+            return comment[1]
+        element = _ELEMENT_RE.fullmatch(fragment)
+        if element is None:
+            return None  # Several children, or a void element
+        fragment = element["content"]
+    return html.unescape(fragment) if fragment else None
+
+
+def _find_synopsis_header(page: str) -> tuple[int, int, list[int]] | None:
+    """
+    Locate the first <h2> whose only content is a text containing "Synopsis".
+
+    Returns:
+        tuple[int, int, list[int]] | None: Start and end offsets of the header and
+        the content offsets of the <div> elements still open at that point.
+    """
+    open_divs: list[int] = []
+    for token in _TOKEN_RE.finditer(page):
+        tag = (token["tag"] or "").lower()
+        if tag == "div" and not token["close"]:
+            open_divs.append(token.end())
+        elif tag == "div" and open_divs:
+            open_divs.pop()
+        elif tag == "h2" and not token["close"]:
+            h2_end = _H2_END_RE.search(page, token.end())
+            header_stop = h2_end.start() if h2_end else len(page)
+            text = _only_string(page[token.end() : header_stop])
+            if text is not None and "Synopsis" in text:
+                return token.start(), h2_end.end() if h2_end else len(page), open_divs
+    return None
+
+
+def _closing_div_offset(page: str, start: int) -> int:
+    """Offset of the </div> closing the div open at `start` (or end of page)."""
+    depth = 0
+    for token in _TOKEN_RE.finditer(page, start):
+        if (token["tag"] or "").lower() != "div":
+            continue
+        if not token["close"]:
+            depth += 1
+        elif depth == 0:
+            return token.start()
+        else:
+            depth -= 1
+    return len(page)
+
+
+def extract_synopsis(page: str) -> str | None:
+    """
+    Extracts the synopsis block following <h2>Synopsis</h2>.
+
+    Single regex pass over the tags of the page: it tracks the open <div> elements
+    until the first <h2> whose only text contains "Synopsis", then reads its parent div
+    up to the matching </div> and stops. Returns the same text as the BeautifulSoup
+    version (`extract_synopsis_bs4`) without building a DOM.
+    """
+    found = _find_synopsis_header(page)
+    if found is None:
+        logger.warning("Synopsis header not found")
+        return None
+    header_start, header_end, open_divs = found
+    if not open_divs:
+        logger.warning("No parent div found for synopsis header")
+        return None
+
+    content_start = open_divs[-1]
+    content_stop = _closing_div_offset(page, header_end)
+    fragment = page[content_start:header_start] + page[header_end:content_stop]
+    return _get_text(fragment) or None
+
+
+def extract_synopsis_bs4(page: str) -> str | None:
+    """Reference DOM-based implementation, kept for benchmarks and parity tests."""
+    soup = BeautifulSoup(page, "html.parser")
+
+    try:
+        header = soup.find("h2", string=lambda t: t and "Synopsis" in t)
+        if not header:
+            logger.warning("Synopsis header not found")
+            return None
+        synopsis_div = header.find_parent("div")
+        if synopsis_div:
+            header.extract()
+            synopsis_text = synopsis_div.get_text(separator=" ", strip=True)
+            return synopsis_text or None
+
+        logger.warning("No parent div found for synopsis header")
+        return None
+
+    except Exception:
+        logger.exception("Error parsing synopsis HTML")
+        return None
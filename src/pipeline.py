@@ -0,0 +1,157 @@
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from time import perf_counter
+from types import TracebackType
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    """
+    Counters of a pipeline stage.
+
+    Fields:
+        name: Stage name
+        workers: Number of concurrent workers
+        items: Items handled
+        errors: Items whose handler raised
+        busy_seconds: Wall time spent inside the handler, summed over workers
+        backpressure_seconds: Time producers waited because the stage queue was
+            full. A stage that makes its producers wait is the bottleneck.
+    """
+
+    name: str
+    workers: int
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    backpressure_seconds: float = 0.0
+
+    def throughput(self, elapsed: float) -> float:
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        capacity = elapsed * self.workers
+        return self.busy_seconds / capacity if capacity > 0 else 0.0
+
+
+class Stage(Generic[T]):
+    """
+    A pool of async workers consuming a bounded queue. Handlers push their results
+    to the next stage with `await next_stage.put(item)`, which blocks while that
+    stage is full, so memory stays flat whatever the input size.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[T], Awaitable[None]],
+        workers: int,
+        maxsize: int,
+    ) -> None:
+        self.handler = handler
+        self.queue: asyncio.Queue[T] = asyncio.Queue(maxsize=maxsize)
+        self.stats = StageStats(name=name, workers=max(1, workers))
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def put(self, item: T) -> None:
+        start = perf_counter()
+        await self.queue.put(item)
+        self.stats.backpressure_seconds += perf_counter() - start
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.stats.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            item = await self.queue.get()
+            start = perf_counter()
+            try:
+                await self.handler(item)
+            except Exception:
+                self.stats.errors += 1
+                logger.exception(f"Pipeline stage '{self.stats.name}' failed")
+            finally:
+                self.stats.items += 1
+                self.stats.busy_seconds += perf_counter() - start
+                self.queue.task_done()
+
+
+class Pipeline:
+    """
+    Runs a chain of stages. Stages must be listed in data-flow order (a stage only
+    feeds stages after it) so `join` can drain them one after the other.
+
+    Use:
+        async with Pipeline([fetch, parse, write]) as pipeline:
+            for item in items:
+                await fetch.put(item)
+            await pipeline.join()
+        pipeline.log_stats()
+    """
+
+    def __init__(self, stages: list[Stage[Any]]) -> None:
+        self.stages = stages
+        self._started_at = 0.0
+        self.elapsed = 0.0
+
+    async def __aenter__(self) -> "Pipeline":
+        self._started_at = perf_counter()
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        for stage in self.stages:
+            await stage.stop()
+        self.elapsed = perf_counter() - self._started_at
+
+    async def join(self) -> None:
+        for stage in self.stages:
+            await stage.queue.join()
+
+    @property
+    def stats(self) -> list[StageStats]:
+        return [stage.stats for stage in self.stages]
+
+    def bottleneck(self) -> StageStats | None:
+        """The stage producers waited on the most, else the busiest one."""
+        if not self.stages:
+            return None
+        return max(
+            self.stats,
+            key=lambda s: (s.backpressure_seconds, s.utilization(self.elapsed)),
+        )
+
+    def log_stats(self) -> None:
+        for s in self.stats:
+            logger.info(
+                f"Stage {s.name:<9} x{s.workers:<2}: {s.items:6} items "
+                f"{s.throughput(self.elapsed):8.1f}/s, "
+                f"busy {s.utilization(self.elapsed):6.1%}, "
+                f"backpressure {s.backpressure_seconds:7.1f}s, {s.errors} errors"
+            )
+        bottleneck = self.bottleneck()
+        if bottleneck is not None:
+            logger.info(f"Pipeline bottleneck: {bottleneck.name}")
@@ -0,0 +1,303 @@
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Collection
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Generic
+from typing import TypeVar
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import QueryBundle
+from loguru import logger
+
+from src.constants import ANSWER_CACHE_SIZE
+from src.constants import ANSWER_CACHE_THRESHOLD
+from src.constants import ANSWER_CACHE_TTL
+from src.constants import QUERY_CACHE_TTL
+from src.constants import QUERY_EMBEDDING_CACHE_SIZE
+from src.constants import RETRIEVAL_CACHE_SIZE
+from src.db.http_cache import CacheStats
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def normalize_query(query: str) -> str:
+    """NFKC-normalized `query` with whitespace collapsed. Case is kept."""
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Bounded in-process cache: the least recently used entries are evicted past
+    `max_entries`, and entries expire `ttl` seconds after being stored.
+
+    Entries belong to a version (e.g. of the index they were computed from): a
+    lookup or store with another version first clears the cache. Shared by the
+    server threads, behind a lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.version = ""
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str) -> None:
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Index version changed: {self.size} entries dropped")
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: K, version: str = "") -> V | None:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.stats.evictions += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def put(self, key: K, value: V, version: str = "") -> None:
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+RetrievalKey = tuple[str, int, tuple[int, ...]]
+
+
+class QueryCache:
+    """
+    Query embeddings by normalized query, and retrieved nodes by (query
+    embedding, top k, anime filter), so repeated questions skip the embedding
+    model and the vector store.
+
+    Both caches are cleared when `version()` changes: it identifies the index
+    build (see `src.rag_index.index_version`), and is read on every lookup.
+    Cached nodes are copied in and out, as postprocessors edit their metadata.
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self,
+        embed_model: BaseEmbedding,
+        version: Callable[[], str],
+        embedding_size: int = QUERY_EMBEDDING_CACHE_SIZE,
+        retrieval_size: int = RETRIEVAL_CACHE_SIZE,
+        ttl: float = QUERY_CACHE_TTL,
+    ) -> None:
+        self.embed_model = embed_model
+        self.version = version
+        self.embeddings: LRUCache[str, list[float]] = LRUCache(embedding_size, ttl)
+        self.results: LRUCache[RetrievalKey, list[NodeWithScore]] = LRUCache(  # type: ignore[no-any-unimported]
+            retrieval_size, ttl
+        )
+
+    def embed(self, query_bundle: QueryBundle) -> QueryBundle:  # type: ignore[no-any-unimported]
+        """
+        `query_bundle` with its query normalized and its embedding set, from
+        the cache or the embedding model.
+        """
+        if query_bundle.embedding is not None:
+            return query_bundle
+        query = normalize_query(query_bundle.query_str)
+        return QueryBundle(query_str=query, embedding=self.embed_query(query))
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embedding of `query`, once normalized, from the cache or the model."""
+        query = normalize_query(query)
+        version = self.version()
+        embedding = self.embeddings.get(query, version)
+        if embedding is None:
+            embedding = self.embed_model.get_query_embedding(query)
+            self.embeddings.put(query, embedding, version)
+        return embedding
+
+    def retrieve(  # type: ignore[no-any-unimported]
+        self,
+        query_bundle: QueryBundle,
+        similarity_top_k: int,
+        mal_ids: Collection[int],
+        retrieve: Callable[[QueryBundle], list[NodeWithScore]],
+    ) -> list[NodeWithScore]:
+        """
+        Nodes retrieved for `query_bundle` (embedded first, see `embed`) by
+        `retrieve`, unless cached.
+        """
+        query_bundle = self.embed(query_bundle)
+        embedding = np.asarray(query_bundle.embedding, np.float32).tobytes()
+        key = (
+            hashlib.sha256(embedding).hexdigest(),
+            similarity_top_k,
+            tuple(sorted(mal_ids)),
+        )
+        version = self.version()
+        nodes = self.results.get(key, version)
+        if nodes is None:
+            nodes = retrieve(query_bundle)
+            self.results.put(key, _copy(nodes), version)
+            return nodes
+        return _copy(nodes)
+
+    def log_stats(self) -> None:
+        for name, cache in (
+            ("Query embedding", self.embeddings),
+            ("Retrieval", self.results),
+        ):
+            s = cache.stats
+            logger.info(
+                f"{name} cache: {s.hits} hits, {s.misses} misses, "
+                f"{s.evictions} evicted, hit ratio {s.hit_ratio:.1%}, "
+                f"{cache.size} entries"
+            )
+
+
+def _copy(nodes: list[NodeWithScore]) -> list[NodeWithScore]:  # type: ignore[no-any-unimported]
+    return [
+        NodeWithScore(node=n.node.model_copy(deep=True), score=n.score) for n in nodes
+    ]
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    key: Hashable
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    Semantic cache of chat answers: a question gets the answer of a cached one
+    whose embedding has a cosine similarity of at least `threshold` with its own.
+
+    Only questions with the same `key` are compared, e.g. the anime and episode
+    numbers they name, as embeddings barely tell "episode 1" from "episode 2".
+    Answers belong to a scope (prompt, LLM and index version, see
+    `src.query_engine.answer_scope`), read on every lookup: the cache is cleared
+    when it changes. The least recently used answers are evicted past
+    `max_entries`, and answers expire `ttl` seconds after being stored.
+
+    Embeddings are kept in one matrix, so a lookup is one matrix product.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], list[float]],
+        scope: Callable[[], str],
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.embed = embed
+        self.scope = scope
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.stats = CacheStats()
+        self._clock = clock
+        self._scope = ""
+        self._answers: OrderedDict[int, CachedAnswer] = OrderedDict()  # By row
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        self._vectors: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._answers)
+
+    def _unit_vector(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed(question), np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _check_scope(self, scope: str) -> None:
+        if scope != self._scope:
+            if self._answers:
+                logger.info(f"Answer cache scope changed: {self.size} answers dropped")
+            self._answers.clear()
+            self._free_rows = list(range(self.max_entries - 1, -1, -1))
+            self._scope = scope
+
+    def _drop_expired(self) -> None:
+        now = self._clock()
+        for row in [r for r, a in self._answers.items() if a.expires_at <= now]:
+            del self._answers[row]
+            self._free_rows.append(row)
+            self.stats.evictions += 1
+
+    def lookup(self, question: str, key: Hashable = None) -> CachedAnswer | None:
+        """The cached answer of the question most similar to `question`, if any."""
+        vector = self._unit_vector(question)
+        scope = self.scope()
+        with self._lock:
+            self._check_scope(scope)
+            self._drop_expired()
+            rows = [row for row, answer in self._answers.items() if answer.key == key]
+            if rows and self._vectors is not None:
+                similarities = self._vectors[rows] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._answers.move_to_end(rows[best])
+                    self.stats.hits += 1
+                    return self._answers[rows[best]]
+            self.stats.misses += 1
+            return None
+
+    def store(self, question: str, answer: str, key: Hashable = None) -> None:
+        vector = self._unit_vector(question)
+        scope = self.scope()
+        with self._lock:
+            self._check_scope(scope)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), np.float32)
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row, _ = self._answers.popitem(last=False)
+                self.stats.evictions += 1
+            self._vectors[row] = vector
+            self._answers[row] = CachedAnswer(
+                question, answer, key, self._clock() + self.ttl
+            )
+
+    def log_stats(self) -> None:
+        s = self.stats
+        logger.info(
+            f"Answer cache: {s.hits} hits, {s.misses} misses, "
+            f"{s.evictions} evicted, hit ratio {s.hit_ratio:.1%}, "
+            f"{self.size} answers"
+        )
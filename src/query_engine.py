@@ -1,77 +1,185 @@
+import re
+from collections.abc import Hashable
+from functools import cache
 from typing import Any
 
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.chat_engine import ContextChatEngine
 from llama_index.core.chat_engine.types import AgentChatResponse
 from llama_index.core.chat_engine.types import BaseChatEngine
+from llama_index.core.llms import ChatMessage
+from llama_index.core.llms import MessageRole
+from llama_index.core.memory import BaseMemory
 from llama_index.core.memory import Memory
-from llama_index.llms.groq import Groq
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
 from loguru import logger
 
+from src.chat_sessions import DEFAULT_SESSION_ID
+from src.chat_sessions import ChatEnginePool
+from src.constants import ANSWER_CACHE
+from src.constants import CHAT_MEMORY_TOKEN_LIMIT
 from src.constants import GROQ_MODEL_NAME
+from src.constants import INDEX_MODE
+from src.constants import PROMPT_VERSION
+from src.constants import RETRIEVAL_MODE
 from src.constants import SIMILARITY_TOP_K
 from src.prompts.manager import load_prompt
+from src.query_cache import AnswerCache
+from src.query_cache import normalize_query
 from src.rag_index import build_and_persist_vector_index
-from src.settings import settings
+from src.rag_index import get_catalog
+from src.rag_index import get_query_cache
+from src.rag_index import get_title_index
+from src.rag_index import index_version
+from src.rag_index import load_bm25_index
+from src.retrieval import CatalogJoin
+from src.retrieval import HybridRetriever
+from src.retrieval import ParentNodeExpansion
+from src.retrieval import TitleFilteredRetriever
+from src.settings import get_settings
+
+
+class AnimeChatEngine(ContextChatEngine):  # type: ignore[no-any-unimported]
+    """
+    ContextChatEngine exposing its chat memory, so that the turns answered from
+    the answer cache can be added to it (see `record_turn`).
+    """
+
+    @property
+    def memory(self) -> BaseMemory:  # type: ignore[no-any-unimported]
+        return self._memory
 
 
-def init_model() -> BaseChatEngine:  # type: ignore[no-any-unimported]
+def init_model() -> ChatEnginePool:
     """
     Initializes and configures the anime assistant chat model.
 
     This function performs the following steps:
     1. Builds and persists a vector index for efficient context retrieval.
     2. Instantiates a language model (LLM) using the Groq API.
-    3. Sets up a chat memory buffer to summarize and manage conversation history.
-    4. Creates a chat engine that:
-        - Uses the vector index for context-aware responses.
+    3. Creates a pool of chat engines, one per chat session, sharing the index,
+       retriever and LLM client. Each has its own chat memory buffer to
+       summarize and manage its conversation history. A chat engine:
+        - Uses the vector index for context-aware responses, fused with a BM25
+          index of the same nodes with RETRIEVAL_MODE "hybrid", and restricted
+          to the anime whose titles the question names; with a hierarchical
+          index, the retrieved episodes come with their anime. The anime
+          metadata is joined to the retrieved nodes from the catalog. Query
+          embeddings and retrieved nodes are cached until the index changes.
         - Applies a system prompt with strict answering rules for anime-related queries.
         - Restricts answers to information present in the provided context.
         - Formats responses in markdown with clear, concise language.
 
     Returns:
-        chat_engine: An instance of the configured chat engine ready to answer
-        anime-related questions.
+        ChatEnginePool: The chat engines of the sessions, created on their first
+        anime-related question.
     """
+    # Imported here: it pulls in transformers, which takes seconds
+    from llama_index.llms.groq import Groq
+
     logger.info("Start Model Init")
     index = build_and_persist_vector_index()
-    llm = Groq(model=GROQ_MODEL_NAME, api_key=settings.GROQ_API)
-    memory = Memory(llm=llm, token_limit=512)
-    chat_engine = index.as_chat_engine(
-        chat_mode="context",
-        llm=llm,
-        memory=memory,
-        similarity_top_k=SIMILARITY_TOP_K,
-        system_prompt=load_prompt(),
-    )
+    llm = Groq(model=GROQ_MODEL_NAME, api_key=get_settings().GROQ_API)
+    node_postprocessors: list[BaseNodePostprocessor] = []  # type: ignore[no-any-unimported]
+    if INDEX_MODE == "hierarchical":
+        node_postprocessors.append(ParentNodeExpansion(vector_store=index.vector_store))
+    node_postprocessors.append(CatalogJoin(catalog=get_catalog()))
+    retriever: BaseRetriever  # type: ignore[no-any-unimported]
+    cache = get_query_cache()
+    if RETRIEVAL_MODE == "hybrid":
+        bm25 = load_bm25_index(index.vector_store)
+        retriever = HybridRetriever(
+            index,
+            bm25,
+            get_title_index(),
+            similarity_top_k=SIMILARITY_TOP_K,
+            cache=cache,
+        )
+    else:
+        retriever = TitleFilteredRetriever(
+            index, get_title_index(), similarity_top_k=SIMILARITY_TOP_K, cache=cache
+        )
+    system_prompt = load_prompt(PROMPT_VERSION)
+
+    def new_chat_engine() -> BaseChatEngine:  # type: ignore[no-any-unimported]
+        return AnimeChatEngine.from_defaults(
+            retriever=retriever,
+            llm=llm,
+            memory=Memory(llm=llm, token_limit=CHAT_MEMORY_TOKEN_LIMIT),
+            node_postprocessors=node_postprocessors,
+            system_prompt=system_prompt,
+        )
+
     logger.info("Model loaded!")
-    return chat_engine
+    return ChatEnginePool(new_chat_engine)
+
+
+@cache
+def get_chat_engines() -> ChatEnginePool:
+    """The chat engines of all sessions, initialized on first use."""
+    return init_model()
+
+
+def answer_scope() -> str:
+    """Cached answers are only reused with the prompt, LLM and index they came from."""
+    return f"{PROMPT_VERSION}:{GROQ_MODEL_NAME}:{index_version()}"
 
 
-class ChatEngineManager:
+def answer_key(message: str) -> Hashable:
     """
-    ChatEngineManager is a singleton-style manager for a chat model instance.
+    Anime and numbers named in `message`: cached answers are only reused for
+    questions naming the same ones (see `AnswerCache`).
+    """
+    mal_ids = tuple(sorted(get_title_index().match(message)))
+    return mal_ids, tuple(re.findall(r"\d+", normalize_query(message)))
+
+
+@cache
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache(get_query_cache().embed_query, answer_scope)
 
-    Class Attributes:
-        _model: Holds the singleton instance of the chat model.
 
-    Methods:
-        instance():
-            Returns the singleton instance of the chat model.
-            Initializes the model using `init_model()` if it does not already exist.
-    Use:
-        chat_engine = ChatEngineManager.instance()
+def record_turn(chat_engine: AnimeChatEngine, message: str, answer: str) -> None:
     """
+    Add a turn answered from the answer cache to the memory of `chat_engine`, as
+    `chat` would have, so that follow-up questions keep their context.
+    """
+    chat_engine.memory.put(ChatMessage(content=message, role=MessageRole.USER))
+    chat_engine.memory.put(ChatMessage(content=answer, role=MessageRole.ASSISTANT))
 
-    _model = None
 
-    @classmethod
-    def instance(cls) -> BaseChatEngine:  # type: ignore[no-any-unimported]
-        if cls._model is None:
-            cls._model = init_model()
-        return cls._model
+def chat(  # type: ignore[no-any-unimported]
+    chat_engine: BaseChatEngine, message: str, first_turn: bool
+) -> str:
+    """
+    Answer of `chat_engine` to `message`. With ANSWER_CACHE, the first question
+    of a chat, which does not depend on the previous turns, is answered from
+    the answer cache when a similar one was, and its answer cached otherwise.
+    Chat engines whose memory is not exposed (see `AnimeChatEngine`) always
+    answer themselves: a cached answer would be missing from their history.
+    """
+    use_cache = False
+    if ANSWER_CACHE and first_turn and isinstance(chat_engine, AnimeChatEngine):
+        use_cache = True
+        key = answer_key(message)
+        cached = get_answer_cache().lookup(message, key)
+        if cached is not None:
+            logger.info(f"Answer cache hit: {cached.question!r}")
+            record_turn(chat_engine, message, cached.answer)
+            return cached.answer
+    response = chat_engine.chat(message)
+    log_metadata(response)
+    get_query_cache().log_stats()
+    if use_cache:
+        get_answer_cache().store(message, response.response, key)
+        get_answer_cache().log_stats()
+    return response.response
 
 
 def run_rag_chatbot(
-    message: str, chat_history: list[dict[str, Any]] | None = None
+    message: str,
+    chat_history: list[dict[str, Any]] | None = None,
+    session_id: str = DEFAULT_SESSION_ID,
 ) -> tuple[str, list[dict[str, Any]]]:
     """
     Runs a Retrieval-Augmented Generation (RAG) chatbot with the provided user message
@@ -89,6 +197,8 @@ def run_rag_chatbot(
             {'role': 'user', 'content': 'Hello'},
             {'role': 'assistant', 'content': "Hello again! ..."}
         ]
+        session_id (str, optional): The chat session: its chat engine remembers
+            the conversation, apart from the other sessions.
 
     Returns:
         tuple[str, list[dict[str, Any]]]: A tuple containing:
@@ -99,13 +209,12 @@ def run_rag_chatbot(
     if chat_history is None:
         chat_history = []
     logger.info(f"Chatbot input: {message}")
-    chat_engine = ChatEngineManager.instance()
-    response = chat_engine.chat(message)
-    log_metadata(response)
+    with get_chat_engines().session(session_id) as chat_engine:
+        answer = chat(chat_engine, message, first_turn=not chat_history)
     chat_history.append({"role": "user", "content": message})
-    chat_history.append({"role": "assistant", "content": response.response})
-    logger.info(f"Chatbot response: {response.response}")
-    return response.response, chat_history
+    chat_history.append({"role": "assistant", "content": answer})
+    logger.info(f"Chatbot response: {answer}")
+    return answer, chat_history
 
 
 def log_metadata(response: AgentChatResponse) -> None:  # type: ignore[no-any-unimported]
@@ -122,12 +231,12 @@ def log_metadata(response: AgentChatResponse) -> None:  # type: ignore[no-any-un
         pass
 
 
-def reset_chat() -> list[dict[str, Any]]:
+def reset_chat(session_id: str = DEFAULT_SESSION_ID) -> list[dict[str, Any]]:
     """
-    Resets the chat engine to its initial state.
+    Resets the chat engine of `session_id` to its initial state, leaving the
+    other sessions as they are.
     """
-    chat_engine = ChatEngineManager.instance()
-    chat_engine.reset()
+    get_chat_engines().reset(session_id)
     return []
 
 
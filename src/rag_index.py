@@ -1,55 +1,238 @@
-import json
+import argparse
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+from functools import lru_cache
+from functools import partial
+from itertools import count
+from itertools import islice
 from pathlib import Path
 from time import time
 from typing import Any
+from zipfile import BadZipFile
 
 import chromadb
 from llama_index.core import Document
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.core.indices.vector_store import VectorStoreIndex
+from llama_index.core.ingestion import run_transformations
 from llama_index.core.storage import StorageContext
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from loguru import logger
 
+from src.bm25 import BM25Index
+from src.constants import BM25_INDEX_PATH
+from src.constants import CATALOG_PATH
 from src.constants import CHROMA_DIR
 from src.constants import CHUNK_SIZE
 from src.constants import CHUNKS_JSON
+from src.constants import CHUNKS_PATH
+from src.constants import EMBED_BATCH_SIZE
+from src.constants import EMBED_PROCESSES
+from src.constants import EMBEDDING_BACKEND
+from src.constants import EMBEDDING_CACHE_MAX_BYTES
+from src.constants import EMBEDDING_CACHE_PATH
 from src.constants import EMBEDDING_MODEL_NAME
+from src.constants import INDEX_INSERT_BATCH_SIZE
+from src.constants import INDEX_MANIFEST_PATH
+from src.constants import INDEX_MODE
+from src.constants import NUMPY_STORE_DIR
+from src.constants import RETRIEVAL_MODE
+from src.constants import VECTOR_STORE
+from src.db.catalog import AnimeCatalog
+from src.db.embedding_cache import EmbeddingCache
+from src.embeddings import CachedEmbedding
+from src.embeddings import ProcessPoolEmbedding
+from src.index_manifest import CorpusHash
+from src.index_manifest import IndexManifest
 from src.ingest import META_DIR
 from src.models.anime import AnimeChunk
+from src.models.anime import AnimeRecord
+from src.numpy_vector_store import NumpyVectorStore
+from src.parsers.anime import anime_titles
 from src.parsers.anime import parse_anime
+from src.parsers.anime import parse_anime_record
+from src.query_cache import QueryCache
+from src.storage import READ_ERRORS
+from src.storage import JsonlWriter
+from src.storage import iter_data_files
+from src.storage import iter_jsonl
+from src.storage import read_json
+from src.title_index import TitleIndex
 
 
 class ChromaEmbeddingWrapper:
-    def __init__(self, model_name: str) -> None:
-        self.model = HuggingFaceEmbedding(model_name=model_name)
+    """
+    Chroma embedding function sharing the LlamaIndex embedding model. The model
+    is only loaded when Chroma first embeds something.
+    """
+
+    @property
+    def model(self) -> CachedEmbedding:
+        return get_embed_model()
 
-    def __call__(self, input: str) -> Any:
-        return self.model.embed(input)
+    def __call__(self, input: list[str]) -> Any:
+        return self.model.get_text_embedding_batch(input)
 
     def name(self) -> Any:
-        return self.model.model_name
+        return EMBEDDING_MODEL_NAME
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_embedding_backend(  # type: ignore[no-any-unimported]
+    backend: str, threads: int = 0
+) -> BaseEmbedding:
+    """
+    EMBEDDING_MODEL_NAME run by PyTorch ("torch") or by ONNX Runtime, in float32
+    ("onnx") or int8-quantized ("onnx-int8"), on `threads` CPU threads (0 keeps
+    the default of the runtime).
+    """
+    # Imported here: importing torch alone takes seconds
+    if backend == "torch":
+        import torch
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+        if threads > 0:
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbedding(model_name=EMBEDDING_MODEL_NAME)
+    if backend in {"onnx", "onnx-int8"}:
+        from src.onnx_embedding import OnnxEmbedding
+
+        return OnnxEmbedding(
+            EMBEDDING_MODEL_NAME, quantized=backend == "onnx-int8", threads=threads
+        )
+    raise ValueError(f"Unknown embedding backend {backend!r}: {EMBEDDING_BACKENDS}")
 
 
-EMBED_MODEL = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL_NAME)
-EMBED_MODEL_CH = ChromaEmbeddingWrapper(model_name=EMBEDDING_MODEL_NAME)
+def embedding_cache_key(backend: str) -> str:
+    """Embedding cache key: vectors differ slightly from one backend to another."""
+    if backend == "torch":
+        return EMBEDDING_MODEL_NAME
+    return f"{EMBEDDING_MODEL_NAME}:{backend}"
 
 
-def build_documents(chunks: list[AnimeChunk]) -> list[Document]:  # type: ignore[no-any-unimported]
+@cache
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, max_bytes=EMBEDDING_CACHE_MAX_BYTES)
+
+
+@cache
+def get_catalog() -> AnimeCatalog:
+    return AnimeCatalog(CATALOG_PATH)
+
+
+@cache
+def get_title_index() -> TitleIndex:
+    """Index of the titles of the catalog, built in memory on first use."""
+    return TitleIndex.from_aliases(get_catalog().iter_aliases())
+
+
+@cache
+def get_query_cache() -> QueryCache:
+    """Caches of query embeddings and retrieved nodes, until the index changes."""
+    return QueryCache(get_embed_model(), index_version)
+
+
+@cache
+def get_embed_model() -> CachedEmbedding:
     """
-    Converts a list of AnimeChunk objects into a list of Document objects,
-    formatting each anime's metadata and episodes into a structured text.
+    The EMBEDDING_BACKEND model, loaded on first use and then shared by queries,
+    index builds and the Chroma embedding function.
+    """
+    return CachedEmbedding(
+        load_embedding_backend(EMBEDDING_BACKEND),
+        get_embedding_cache(),
+        cache_key=embedding_cache_key(EMBEDDING_BACKEND),
+    )
+
+
+def build_embed_model(processes: int, batch_size: int) -> CachedEmbedding:
+    """
+    Cached embedding model for index builds.
 
     Args:
-        chunks (list[AnimeChunk]): A list of AnimeChunk objects, where each chunk
-                                   contains anime metadata and a list of episodes.
+        processes (int): Worker processes embedding batches in parallel, each with
+            its own copy of the EMBEDDING_BACKEND model. 0 embeds in this process
+            with the shared model (see `get_embed_model`).
+        batch_size (int): Texts per batch sent to a worker process.
+    """
+    if processes <= 0:
+        return get_embed_model()
+    pool = ProcessPoolEmbedding(
+        partial(load_embedding_backend, EMBEDDING_BACKEND),
+        model_name=EMBEDDING_MODEL_NAME,
+        processes=processes,
+        batch_size=batch_size,
+    )
+    return CachedEmbedding(
+        pool, get_embedding_cache(), cache_key=embedding_cache_key(EMBEDDING_BACKEND)
+    )
 
-    Returns:
-        list[Document]: A list of Document objects, each containing the formatted text
-                        and associated metadata for an anime.
+
+INDEX_BOOKKEEPING_KEYS = ("chunk_id", "content_hash")
+# Metadata of chunk documents: the anime-level fields are joined at query time
+CHUNK_METADATA_KEYS = ("mal_id", "title", *INDEX_BOOKKEEPING_KEYS)
+INDEX_MODES = ("chunk", "hierarchical")
+VECTOR_STORES = ("chroma", "numpy")
+# Links of hierarchical documents, only used to expand the retrieved nodes
+HIERARCHY_KEYS = ("node_type", "parent_id")
+
+
+@dataclass
+class IndexSyncStats:
+    """Outcome of an incremental index update, in chunks."""
+
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+
+def join_records(
+    chunks: Iterable[AnimeChunk], catalog: AnimeCatalog | None = None
+) -> Iterator[tuple[AnimeChunk, AnimeRecord]]:
+    """
+    Pair each chunk with the AnimeRecord of its anime, looked up in `catalog` once
+    per run of chunks of the same anime. Without a catalog, or for anime missing
+    from it, the record fields are read from the chunk itself, as written before
+    the catalog existed.
     """
-    docs = []
+    record: AnimeRecord | None = None
     for chunk in chunks:
+        if record is None or record["mal_id"] != chunk["mal_id"]:
+            record = catalog.get(chunk["mal_id"]) if catalog else None
+            if record is None:
+                fields = {k: v for k, v in chunk.items() if k != "episodes"}
+                record = AnimeRecord(**fields)  # type: ignore[typeddict-item]
+        yield chunk, record
+
+
+def iter_documents(  # type: ignore[no-any-unimported]
+    chunks: Iterable[AnimeChunk], catalog: AnimeCatalog | None = None
+) -> Iterator[Document]:
+    """
+    Lazily converts AnimeChunk objects into Document objects, formatting each
+    anime's synopsis and episodes into a structured text.
+
+    Args:
+        chunks (Iterable[AnimeChunk]): AnimeChunk objects, where each chunk contains
+                                       a list of episodes of an anime.
+        catalog (AnimeCatalog | None): Catalog of the anime records of the chunks
+                                       (see `join_records`).
+
+    Yields:
+        Document: The formatted text and associated metadata of each chunk. The
+                  metadata only identifies the anime and chunk: the other anime
+                  fields are joined to the retrieved nodes from the catalog.
+    """
+    for chunk, record in join_records(chunks, catalog):
         episode_texts = [
             f"Score {ep.get('score', 'unknown')}; Episode {ep['episode_id']}: "
             f"{ep['title']}\n{ep.get('synopsis', '')}"
@@ -57,91 +240,447 @@ def build_documents(chunks: list[AnimeChunk]) -> list[Document]:  # type: ignore
         ]
         text = (
             f"Anime: {chunk['title']} (ID: {chunk['mal_id']})\n"
-            f"Synopsis: {chunk.get('synopsis', '')}\n"
+            f"Synopsis: {record.get('synopsis', '')}\n"
             f"Episodes:\n" + "\n\n".join(episode_texts)
         )
-        metadata: dict[str, Any] = chunk.copy()  # type: ignore[assignment]
-        metadata.pop("episodes")
+        metadata = {k: v for k, v in chunk.items() if k in CHUNK_METADATA_KEYS}
         doc = Document(text=text, metadata=metadata)
-        docs.append(doc)
-    return docs
+        if "chunk_id" in chunk:
+            doc.id_ = chunk["chunk_id"]
+        # Bookkeeping only: keep them out of the embedded and prompted text
+        doc.excluded_embed_metadata_keys = list(INDEX_BOOKKEEPING_KEYS)
+        doc.excluded_llm_metadata_keys = list(INDEX_BOOKKEEPING_KEYS)
+        yield doc
+
+
+def anime_parent_id(mal_id: int) -> str:
+    """Document ID of the anime parent of the episode documents."""
+    return f"{mal_id}-anime"
+
+
+def _hierarchical_document(  # type: ignore[no-any-unimported]
+    doc_id: str, text: str, metadata: dict[str, Any]
+) -> Document:
+    doc = Document(id_=doc_id, text=text, metadata=metadata)
+    hidden = [*INDEX_BOOKKEEPING_KEYS, *HIERARCHY_KEYS]
+    doc.excluded_embed_metadata_keys = hidden
+    doc.excluded_llm_metadata_keys = hidden
+    return doc
+
+
+def iter_hierarchical_documents(  # type: ignore[no-any-unimported]
+    chunks: Iterable[AnimeChunk], catalog: AnimeCatalog | None = None
+) -> Iterator[Document]:
+    """
+    Lazily converts AnimeChunk objects into one Document per episode, and one
+    parent Document per anime with the synopsis and metadata of its AnimeRecord
+    (see `join_records`).
+
+    Episode documents only carry the anime title and ID, and link to their parent
+    with the "parent_id" metadata: the parent is added to the retrieved episodes
+    at query time (see `src.retrieval.ParentNodeExpansion`), once per anime
+    instead of once per chunk of CHUNK_SIZE episodes.
+
+    Every document keeps the chunk ID and content hash of the chunk it comes
+    from, so `sync_vector_index` replaces them along with their chunk. The parent
+    belongs to the first chunk of its anime.
+
+    Yields:
+        Document: The anime parent, then its episodes, of each chunk.
+    """
+    parents: set[int] = set()
+    for chunk, record in join_records(chunks, catalog):
+        mal_id = chunk["mal_id"]
+        header = f"Anime: {chunk['title']} (ID: {mal_id})"
+        bookkeeping = {k: v for k, v in chunk.items() if k in INDEX_BOOKKEEPING_KEYS}
+        if mal_id not in parents and chunk.get("chunk_id", "-0").endswith("-0"):
+            parents.add(mal_id)
+            metadata = {k: v for k, v in record.items() if k != "synopsis"}
+            yield _hierarchical_document(
+                anime_parent_id(mal_id),
+                f"{header}\nSynopsis: {record.get('synopsis', '')}",
+                {**metadata, **bookkeeping, "node_type": "anime"},
+            )
+        for ep in chunk["episodes"]:
+            yield _hierarchical_document(
+                f"{mal_id}-ep{ep['episode_id']}",
+                f"{header}\nScore {ep.get('score', 'unknown')}; Episode "
+                f"{ep['episode_id']}: {ep['title']}\n{ep.get('synopsis', '')}",
+                {
+                    "mal_id": mal_id,
+                    "title": chunk["title"],
+                    "episode_id": ep["episode_id"],
+                    "score": ep.get("score"),
+                    **bookkeeping,
+                    "node_type": "episode",
+                    "parent_id": anime_parent_id(mal_id),
+                },
+            )
+
+
+def iter_index_documents(  # type: ignore[no-any-unimported]
+    chunks: Iterable[AnimeChunk],
+    index_mode: str = INDEX_MODE,
+    catalog: AnimeCatalog | None = None,
+) -> Iterator[Document]:
+    """The documents indexed in `index_mode` ("chunk" or "hierarchical")."""
+    if index_mode == "chunk":
+        return iter_documents(chunks, catalog)
+    if index_mode == "hierarchical":
+        return iter_hierarchical_documents(chunks, catalog)
+    raise ValueError(f"Unknown index mode {index_mode!r}: {INDEX_MODES}")
+
+
+def build_documents(  # type: ignore[no-any-unimported]
+    chunks: list[AnimeChunk], catalog: AnimeCatalog | None = None
+) -> list[Document]:
+    """
+    Converts a list of AnimeChunk objects into a list of Document objects
+    (see `iter_documents`).
+
+    Args:
+        chunks (list[AnimeChunk]): A list of AnimeChunk objects, where each chunk
+                                   contains a list of episodes of an anime.
+        catalog (AnimeCatalog | None): Catalog of the anime records of the chunks.
+
+    Returns:
+        list[Document]: A list of Document objects, each containing the formatted text
+                        and associated metadata for an anime.
+    """
+    return list(iter_documents(chunks, catalog))
+
+
+def iter_metadata_files(metadata_dir: Path) -> Iterator[dict[str, Any]]:
+    """
+    Lazily loads the metadata files of the specified directory, zstd-compressed
+    (`.json.zst`) or legacy plain JSON, one at a time.
+    """
+    for file in iter_data_files(metadata_dir):
+        yield read_json(file)
 
 
 def load_metadata_files(metadata_dir: Path) -> list[dict[str, Any]]:
     """
-    Loads all JSON metadata files from the specified directory.
+    Loads all metadata files from the specified directory, zstd-compressed
+    (`.json.zst`) or legacy plain JSON.
 
     Args:
-        metadata_dir (Path): The directory containing JSON metadata files.
+        metadata_dir (Path): The directory containing the metadata files.
 
     Returns:
         list[dict[str, Any]]: A list of dictionaries, each representing the contents
-                              of a JSON metadata file.
+                              of a metadata file.
     """
-    files = list(metadata_dir.glob("*.json"))
-    anime_objs = []
-    for file in files:
-        with open(file, encoding="utf-8") as f:
-            anime_objs.append(json.load(f))
-    return anime_objs
+    return list(iter_metadata_files(metadata_dir))
 
 
-def load_or_create_chunks(force_recreate: bool) -> list[AnimeChunk]:
+def iter_chunks(
+    force_recreate: bool, catalog: AnimeCatalog | None = None
+) -> Iterator[AnimeChunk]:
     """
-    Loads or creates anime chunks from metadata files.
+    Streams the anime chunks, one metadata file at a time.
+
+    If the CHUNKS_PATH file (or the legacy CHUNKS_JSON one) exists, it streams the
+    chunks from that file. Otherwise, it parses the metadata files of META_DIR into
+    chunks, and writes them to CHUNKS_PATH for future use as they are yielded. The
+    file only replaces the previous one once the stream is fully consumed. The
+    AnimeRecord and titles of each anime are written to `catalog` (by default the
+    shared one, see `get_catalog`) before its chunks are yielded, replacing its
+    previous content, so anime removed from META_DIR leave the catalog too.
+
+    Yields:
+        AnimeChunk: The chunks, in metadata file order.
+    """
+    if CHUNKS_PATH.exists() and not force_recreate:
+        yield from iter_jsonl(CHUNKS_PATH)
+    elif CHUNKS_JSON.exists() and not force_recreate:
+        yield from read_json(CHUNKS_JSON)  # Single document: migrate it to CHUNKS_PATH
+    else:
+        catalog = catalog or get_catalog()
+        catalog.clear()  # Committed with the new records
+        with JsonlWriter(CHUNKS_PATH) as writer:
+            for anime in iter_metadata_files(META_DIR):
+                summary = anime["summary"]
+                catalog.put(parse_anime_record(summary), anime_titles(summary))
+                for chunk in parse_anime(anime, max_episodes_per_chunk=CHUNK_SIZE):
+                    writer.write(chunk)
+                    yield chunk
+        catalog.commit()
+
+
+def index_documents(  # type: ignore[no-any-unimported]
+    index: VectorStoreIndex,
+    docs: Iterable[Document],
+    batch_size: int = INDEX_INSERT_BATCH_SIZE,
+) -> int:
+    """
+    Split, embed and insert `docs` into `index` one batch of documents at a time,
+    so that only a batch and its nodes are held in memory whatever the number of
+    documents.
 
-    If the CHUNKS_JSON file exists, it loads the chunks from that file.
-    Otherwise, it loads metadata files from META_DIR, parses them into chunks,
-    and saves the chunks to CHUNKS_JSON for future use.
+    Returns:
+        int: The number of documents inserted.
+    """
+    count = 0
+    docs = iter(docs)
+    while batch := list(islice(docs, batch_size)):
+        nodes = run_transformations(batch, Settings.transformations)
+        index.insert_nodes(nodes)
+        for doc in batch:
+            index.docstore.set_document_hash(doc.id_, doc.hash)
+        count += len(batch)
+        logger.info(f"Indexed {count} documents ({len(nodes)} nodes in last batch)")
+    return count
+
+
+def plan_index_sync(
+    indexed: dict[str, list[str | None]], chunks: Iterable[AnimeChunk]
+) -> tuple[list[AnimeChunk], list[str], IndexSyncStats]:
+    """
+    Compare the chunks in the collection with the current ones.
+
+    Args:
+        indexed (dict[str, list[str | None]]): Content hashes of the collection
+            entries by chunk ID. Entries without a chunk ID (indexed before chunks
+            had one) must be keyed by their Chroma ID with a None hash.
+        chunks (Iterable[AnimeChunk]): Current chunks, as returned by `parse_anime`.
+            Streamed: only the IDs of the chunks and the changed ones are kept.
 
     Returns:
-        list[AnimeChunk]: A list of AnimeChunk objects containing parsed anime data.
+        tuple[list[AnimeChunk], list[str], IndexSyncStats]: The chunks to embed
+        (new or changed), the chunk IDs whose entries must be deleted (changed or
+        gone), and the counts.
     """
-    all_chunks: list[AnimeChunk]
-    if CHUNKS_JSON.exists() and not force_recreate:
-        with open(CHUNKS_JSON, encoding="utf-8") as f:
-            all_chunks = json.load(f)
-    else:
-        anime_objs = load_metadata_files(META_DIR)
-        all_chunks = []
-        for anime in anime_objs:
-            all_chunks.extend(parse_anime(anime, max_episodes_per_chunk=CHUNK_SIZE))
-        with open(CHUNKS_JSON, "w", encoding="utf-8") as f:
-            json.dump(all_chunks, f, indent=2, ensure_ascii=False)
-    return all_chunks
+    stats = IndexSyncStats()
+    to_embed: list[AnimeChunk] = []
+    to_delete: list[str] = []
+    current: set[str] = set()
+    for chunk in chunks:
+        chunk_id = chunk["chunk_id"]
+        if chunk_id in current:
+            continue
+        current.add(chunk_id)
+        hashes = indexed.get(chunk_id)
+        if hashes is None:
+            stats.added += 1
+            to_embed.append(chunk)
+        elif set(hashes) == {chunk["content_hash"]}:
+            stats.unchanged += 1
+        else:
+            stats.updated += 1
+            to_embed.append(chunk)
+            to_delete.append(chunk_id)
+    stale = [chunk_id for chunk_id in indexed if chunk_id not in current]
+    stats.deleted = len(stale)
+    return to_embed, to_delete + stale, stats
+
+
+def _indexed_hashes(
+    chroma_collection: chromadb.Collection,
+) -> dict[str, list[str | None]]:
+    """Content hashes of the entries of the collection, by chunk ID."""
+    entries = chroma_collection.get(include=["metadatas"])
+    indexed: dict[str, list[str | None]] = {}
+    for entry_id, metadata in zip(
+        entries["ids"], entries["metadatas"] or [], strict=True
+    ):
+        chunk_id = metadata.get("chunk_id") if metadata else None
+        content_hash = metadata.get("content_hash") if metadata else None
+        key = str(chunk_id) if chunk_id is not None else entry_id
+        indexed.setdefault(key, []).append(str(content_hash) if content_hash else None)
+    return indexed
+
+
+def sync_vector_index(  # type: ignore[no-any-unimported]
+    chroma_collection: chromadb.Collection,
+    chunks: Iterable[AnimeChunk],
+    embed_model: BaseEmbedding | None = None,  # type: ignore[no-any-unimported]
+    catalog: AnimeCatalog | None = None,
+) -> tuple[VectorStoreIndex, IndexSyncStats]:
+    """
+    Bring the collection in line with `chunks`: embed and insert new and changed
+    chunks, and delete the entries of changed and removed ones. Unchanged chunks
+    are not embedded again.
+
+    Returns:
+        tuple[VectorStoreIndex, IndexSyncStats]: The index over the updated
+        collection and the per-chunk counts.
+    """
+    to_embed, to_delete, stats = plan_index_sync(
+        _indexed_hashes(chroma_collection), chunks
+    )
+    if to_delete:
+        # Entries of a chunk are matched by chunk ID, legacy ones by Chroma ID
+        where = {"chunk_id": {"$in": to_delete}}
+        chroma_collection.delete(where=where)  # type: ignore[arg-type]
+        chroma_collection.delete(ids=to_delete)
+    vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
+    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    index = VectorStoreIndex(
+        [],
+        storage_context=storage_context,
+        embed_model=embed_model or get_embed_model(),
+    )
+    index_documents(
+        index, iter_index_documents(to_embed, catalog=catalog or get_catalog())
+    )
+    logger.info(
+        f"Index sync: {stats.added} added, {stats.updated} updated, "
+        f"{stats.deleted} deleted, {stats.unchanged} unchanged chunks"
+    )
+    return index, stats
 
 
-def build_and_persist_vector_index(force_recreate: bool = False) -> VectorStoreIndex:  # type: ignore[no-any-unimported]
+def embedding_dim(model: BaseEmbedding) -> int:  # type: ignore[no-any-unimported]
+    """Dimension of the vectors of `model`."""
+    return len(model.get_text_embedding("dimension"))
+
+
+def has_drifted(manifest: IndexManifest | None, rebuild_on_drift: bool) -> bool:
+    """
+    Whether the manifest shows the index was built with another configuration,
+    and must be rebuilt.
+
+    Raises:
+        RuntimeError: On configuration drift without `rebuild_on_drift`.
+    """
+    drift = manifest.drift(embedding_dim(get_embed_model())) if manifest else []
+    if drift and not rebuild_on_drift:
+        raise RuntimeError(
+            f"Index built with another configuration ({'; '.join(drift)}), "
+            "rebuild it with --force-recreate"
+        )
+    if drift:
+        logger.warning(f"Index configuration changed ({'; '.join(drift)}): rebuild")
+    return bool(drift)
+
+
+def open_collection(  # type: ignore[no-any-unimported]
+    chroma_client: chromadb.ClientAPI,
+    manifest: IndexManifest | None,
+    reset: bool,
+    rebuild_on_drift: bool,
+) -> tuple[chromadb.Collection, bool]:
+    """
+    Get the anime collection, emptied first with `reset` or when the manifest
+    shows it was built with another configuration.
+
+    Returns:
+        tuple[chromadb.Collection, bool]: The collection and whether it was reset.
+
+    Raises:
+        RuntimeError: On configuration drift without `rebuild_on_drift`.
+    """
+    reset = reset or has_drifted(manifest, rebuild_on_drift)
+    if reset and "anime" in [c.name for c in chroma_client.list_collections()]:
+        chroma_client.delete_collection("anime")
+        INDEX_MANIFEST_PATH.unlink(missing_ok=True)
+    collection = chroma_client.get_or_create_collection(
+        name="anime", embedding_function=ChromaEmbeddingWrapper()
+    )
+    return collection, reset
+
+
+def save_manifest(  # type: ignore[no-any-unimported]
+    document_count: int,
+    corpus: CorpusHash,
+    model: BaseEmbedding,
+    path: Path | None = None,
+) -> IndexManifest:
+    """
+    Record what the collection was just built from in `path`, by default
+    INDEX_MANIFEST_PATH.
+    """
+    manifest = IndexManifest(
+        model_name=EMBEDDING_MODEL_NAME,
+        embedding_backend=EMBEDDING_BACKEND,
+        embed_dim=embedding_dim(model),
+        chunk_size=CHUNK_SIZE,
+        document_count=document_count,
+        corpus_hash=corpus.hexdigest(),
+        index_mode=INDEX_MODE,
+    )
+    manifest.save(path or INDEX_MANIFEST_PATH)
+    return manifest
+
+
+def build_and_persist_vector_index(  # type: ignore[no-any-unimported]
+    force_recreate: bool = False,
+    incremental: bool = False,
+    embed_processes: int = EMBED_PROCESSES,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    rebuild_on_drift: bool = True,
+) -> VectorStoreIndex:
     """
     Build and persists a vector index of anime documents.
 
     Loads or creates anime chunks, builds LlamaIndex documents, sets up ChromaDB,
     indexes the documents using a HuggingFace embedding model, and persists the index.
+
+    An existing collection is loaded as is when its manifest (INDEX_MANIFEST_PATH)
+    matches the current configuration, without scanning it. When it does not, the
+    collection is rebuilt from scratch, or a RuntimeError raised without
+    `rebuild_on_drift`.
+
+    With `incremental`, chunks are rebuilt from META_DIR and only the new, changed
+    and removed ones are applied to the existing collection (see
+    `sync_vector_index`).
+
+    Documents are embedded by `embed_processes` worker processes in batches of
+    `embed_batch_size` texts (see `build_embed_model`).
+
+    With VECTOR_STORE "numpy", the index is stored in NUMPY_STORE_DIR instead
+    (see `build_numpy_vector_index`).
     """
+    if VECTOR_STORE == "numpy":
+        return build_numpy_vector_index(
+            force_recreate,
+            incremental,
+            embed_processes,
+            embed_batch_size,
+            rebuild_on_drift,
+        )
+    if VECTOR_STORE != "chroma":
+        raise ValueError(f"Unknown vector store {VECTOR_STORE!r}: {VECTOR_STORES}")
     logger.info("Setting up ChromaDB persistent client and collection...")
     chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    manifest = IndexManifest.load(INDEX_MANIFEST_PATH)
 
-    logger.info(f"Using embedding model: {EMBED_MODEL.model_name}")
-    chroma_collection = chroma_client.get_or_create_collection(
-        name="anime", embedding_function=EMBED_MODEL_CH
+    logger.info(f"Using embedding model: {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND})")
+    logger.info(f"Index mode: {INDEX_MODE}")
+    chroma_collection, force_recreate = open_collection(
+        chroma_client, manifest, force_recreate, rebuild_on_drift
     )
-    collection_size = len(chroma_collection.get()["ids"])
+    if incremental and not force_recreate:
+        # Rewrites CHUNKS_PATH, streamed again below
+        corpus = CorpusHash.of(iter_chunks(force_recreate=True))
+        if manifest and manifest.corpus_hash == corpus.hexdigest():
+            logger.info("Index up to date with the chunks.")
+            return load_index(chroma_collection=chroma_collection)
+        with closing(build_embed_model(embed_processes, embed_batch_size)) as model:
+            sync_vector_index(chroma_collection, iter_chunks(False), model)
+        get_embedding_cache().log_stats()
+        save_manifest(corpus.count, corpus, get_embed_model())
+        # Queried with the shared model, not the build worker pool
+        return load_index(chroma_collection=chroma_collection)
 
-    if collection_size > 0 and not force_recreate:
+    if manifest and not force_recreate:
         logger.info(
-            f"Load ChromaDB collection '{chroma_collection.name}' "
-            f"with {collection_size} documents."
+            f"Load ChromaDB collection '{chroma_collection.name}' with "
+            f"{manifest.document_count} documents built "
+            f"{datetime.fromtimestamp(manifest.built_at):%Y-%m-%d %H:%M}."
         )
         return load_index(chroma_collection=chroma_collection)
 
-    start_time = time()
-    logger.info("Loading or creating anime chunks...")
-    all_chunks = load_or_create_chunks(force_recreate=force_recreate)
-    logger.info(f"Loaded {len(all_chunks)} chunks in {time() - start_time:.2f}s.")
+    collection_size = chroma_collection.count()
 
-    logger.info("Building LlamaIndex documents...")
-    docs = build_documents(all_chunks)
-    logger.info(f"Built {len(docs)} documents.")
+    if collection_size > 0 and not force_recreate:
+        logger.warning(
+            f"Load ChromaDB collection '{chroma_collection.name}' "
+            f"with {collection_size} documents, without manifest: its configuration "
+            "cannot be checked, rebuild it with --force-recreate."
+        )
+        return load_index(chroma_collection=chroma_collection)
 
     logger.info(f"ChromaDB:'{chroma_collection.name}': #{collection_size} docs")
     vector_store = ChromaVectorStore(
@@ -150,16 +689,161 @@ def build_and_persist_vector_index(force_recreate: bool = False) -> VectorStoreI
     logger.info("ChromaVectorStore initialized.")
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
 
+    # Streamed from the metadata files to the vector store, one batch at a time
+    start_time = time()
     logger.info("Indexing documents with HuggingFace embedding model...")
-    index = VectorStoreIndex.from_documents(
-        docs,
-        storage_context=storage_context,
-        embed_model=EMBED_MODEL,
-        show_progress=True,
-    )
+    corpus = CorpusHash()
+    chunks = corpus.track(iter_chunks(force_recreate=force_recreate))
+    docs = iter_index_documents(chunks, catalog=get_catalog())
+    with closing(build_embed_model(embed_processes, embed_batch_size)) as model:
+        index = VectorStoreIndex([], storage_context=storage_context, embed_model=model)
+        count = index_documents(index, docs)
+    logger.info(f"Indexed {count} documents in {time() - start_time:.2f}s.")
+    get_embedding_cache().log_stats()
     logger.info("Persist index to disk.")
     index.storage_context.persist(persist_dir=str(CHROMA_DIR))
+    save_manifest(count, corpus, get_embed_model())
     logger.info("RAG pipeline completed successfully.")
+    return load_index(chroma_collection=chroma_collection)
+
+
+def build_numpy_vector_index(  # type: ignore[no-any-unimported]
+    force_recreate: bool = False,
+    incremental: bool = False,
+    embed_processes: int = EMBED_PROCESSES,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    rebuild_on_drift: bool = True,
+) -> VectorStoreIndex:
+    """
+    Build and persist the vector index in a `NumpyVectorStore` in NUMPY_STORE_DIR,
+    or load it when its manifest matches the current configuration (see
+    `build_and_persist_vector_index` for the arguments).
+
+    The store is rewritten as a whole on every build, so `incremental` only skips
+    the build when the chunks did not change; unchanged chunks are not embedded
+    again anyway, their vectors come from the embedding cache.
+    """
+    manifest_path = index_manifest_path("numpy")
+    manifest = IndexManifest.load(manifest_path)
+    force_recreate = force_recreate or has_drifted(manifest, rebuild_on_drift)
+    if incremental and not force_recreate:
+        # Rewrites CHUNKS_PATH, streamed again below
+        current = CorpusHash.of(iter_chunks(force_recreate=True)).hexdigest()
+        if manifest and manifest.corpus_hash == current:
+            logger.info("Index up to date with the chunks.")
+            return load_numpy_index()
+    elif manifest and not force_recreate:
+        logger.info(f"Load NumPy vector store with {manifest.document_count} documents")
+        return load_numpy_index()
+
+    start_time = time()
+    store = NumpyVectorStore()
+    storage_context = StorageContext.from_defaults(vector_store=store)
+    corpus = CorpusHash()
+    chunks = corpus.track(iter_chunks(force_recreate=force_recreate))
+    docs = iter_index_documents(chunks, catalog=get_catalog())
+    with closing(build_embed_model(embed_processes, embed_batch_size)) as model:
+        index = VectorStoreIndex([], storage_context=storage_context, embed_model=model)
+        count = index_documents(index, docs)
+    logger.info(f"Indexed {count} documents in {time() - start_time:.2f}s.")
+    get_embedding_cache().log_stats()
+    store.persist(str(NUMPY_STORE_DIR))
+    save_manifest(count, corpus, get_embed_model(), path=manifest_path)
+    return VectorStoreIndex.from_vector_store(store, embed_model=get_embed_model())
+
+
+def index_manifest_path(vector_store: str = VECTOR_STORE) -> Path:
+    """Manifest of the vector index stored in `vector_store`."""
+    if vector_store == "numpy":
+        return NUMPY_STORE_DIR / "manifest.json"
+    return INDEX_MANIFEST_PATH
+
+
+def iter_indexed_nodes(  # type: ignore[no-any-unimported]
+    vector_store: BasePydanticVectorStore, page_size: int = 5000
+) -> Iterator[tuple[str, str, int | None]]:
+    """
+    Node ID, text and MyAnimeList ID of the nodes of `vector_store`, from Chroma
+    a page at a time.
+    """
+    if not isinstance(vector_store, ChromaVectorStore):
+        for node in vector_store.get_nodes():
+            yield node.node_id, node.get_content(), node.metadata.get("mal_id")
+        return
+    for offset in count(0, page_size):
+        page = vector_store.client.get(
+            include=["documents", "metadatas"], limit=page_size, offset=offset
+        )
+        if not page["ids"]:
+            return
+        for node_id, text, metadata in zip(
+            page["ids"], page["documents"] or [], page["metadatas"] or [], strict=True
+        ):
+            mal_id = metadata.get("mal_id") if metadata else None
+            yield node_id, text, int(mal_id) if mal_id is not None else None
+
+
+def index_version(vector_store: str = VECTOR_STORE) -> str:
+    """
+    Identifies the build of the vector index, from the corpus hash and build time
+    of its manifest: changed by every rebuild or incremental update, including
+    by another process. Empty without manifest.
+
+    Cheap enough to call on every query: the manifest is only read again when
+    replaced (it is written atomically, to a new inode) or modified.
+    """
+    path = index_manifest_path(vector_store)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return ""
+    return _manifest_version(vector_store, path, (stat.st_ino, stat.st_mtime_ns))
+
+
+@lru_cache(maxsize=4)
+def _manifest_version(
+    vector_store: str,
+    path: Path,
+    file_id: tuple[int, int],  # noqa: ARG001
+) -> str:
+    manifest = IndexManifest.load(path)
+    return (
+        f"{vector_store}:{manifest.corpus_hash}:{manifest.built_at}" if manifest else ""
+    )
+
+
+def load_bm25_index(  # type: ignore[no-any-unimported]
+    vector_store: BasePydanticVectorStore,
+) -> BM25Index:
+    """
+    The BM25 index of the nodes of `vector_store`, loaded from BM25_INDEX_PATH
+    when it was built from the current vector index, else built and saved there.
+
+    The vector index is identified by the corpus hash and build time of its
+    manifest, so a rebuild or incremental update of the vector index invalidates
+    the BM25 index. Without a manifest, it is built again on every load.
+    """
+    version = index_version()
+    if version and BM25_INDEX_PATH.exists():
+        try:
+            bm25 = BM25Index.load(BM25_INDEX_PATH)
+        except (*READ_ERRORS, BadZipFile, KeyError) as e:
+            logger.warning(f"Unreadable BM25 index {BM25_INDEX_PATH}, rebuild: {e}")
+        else:
+            if bm25.version == version:
+                logger.info(f"BM25 index loaded: {len(bm25.node_ids)} nodes")
+                return bm25
+            logger.info("BM25 index out of date with the vector index: rebuild")
+    bm25 = BM25Index.build(iter_indexed_nodes(vector_store), version=version)
+    bm25.save(BM25_INDEX_PATH)
+    return bm25
+
+
+def load_numpy_index() -> VectorStoreIndex:  # type: ignore[no-any-unimported]
+    """Load the vector index from the memory-mapped store of NUMPY_STORE_DIR."""
+    store = NumpyVectorStore.from_persist_dir(NUMPY_STORE_DIR)
+    index = VectorStoreIndex.from_vector_store(store, embed_model=get_embed_model())
+    logger.info(f"NumPy vector store loaded: {store.count} vectors.")
     return index
 
 
@@ -171,10 +855,54 @@ def load_index(chroma_collection: chromadb.Collection) -> VectorStoreIndex:  # t
         VectorStoreIndex: The loaded vector store index.
     """
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
-    index = VectorStoreIndex.from_vector_store(vector_store, embed_model=EMBED_MODEL)
+    index = VectorStoreIndex.from_vector_store(
+        vector_store, embed_model=get_embed_model()
+    )
     logger.info("Vector index loaded successfully.")
     return index
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the anime vector index.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--force-recreate",
+        action="store_true",
+        help="Rebuild the chunks and re-embed every document",
+    )
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only embed new or changed chunks and delete removed ones",
+    )
+    parser.add_argument(
+        "--embed-processes",
+        type=int,
+        default=EMBED_PROCESSES,
+        help="Worker processes embedding documents; 0 embeds in this process",
+    )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help="Documents per batch sent to an embedding process",
+    )
+    parser.add_argument(
+        "--no-rebuild-on-drift",
+        action="store_true",
+        help="Fail instead of rebuilding an index built with another configuration",
+    )
+    args = parser.parse_args()
+    index = build_and_persist_vector_index(
+        force_recreate=args.force_recreate,
+        incremental=args.incremental,
+        embed_processes=args.embed_processes,
+        embed_batch_size=args.embed_batch_size,
+        rebuild_on_drift=not args.no_rebuild_on_drift,
+    )
+    if RETRIEVAL_MODE == "hybrid":
+        load_bm25_index(index.vector_store)  # Ready for the next server start
+
+
 if __name__ == "__main__":
-    build_and_persist_vector_index()
+    main()
@@ -0,0 +1,316 @@
+from collections.abc import Collection
+from collections.abc import Iterable
+from collections.abc import Sequence
+from typing import Any
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.indices.vector_store import VectorStoreIndex
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import BaseNode
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import QueryBundle
+from llama_index.core.vector_stores.types import BasePydanticVectorStore
+from llama_index.core.vector_stores.types import FilterOperator
+from llama_index.core.vector_stores.types import MetadataFilter
+from llama_index.core.vector_stores.types import MetadataFilters
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from llama_index.vector_stores.chroma import ChromaVectorStore
+from loguru import logger
+from pydantic import ConfigDict
+from pydantic import Field
+
+from src.bm25 import BM25Index
+from src.constants import HYBRID_CANDIDATES
+from src.constants import RRF_K
+from src.constants import SIMILARITY_TOP_K
+from src.db.catalog import AnimeCatalog
+from src.query_cache import QueryCache
+from src.title_index import TitleIndex
+
+
+def fetch_nodes(  # type: ignore[no-any-unimported]
+    vector_store: BasePydanticVectorStore,
+    node_ids: list[str] | None = None,
+    ref_doc_ids: list[str] | None = None,
+) -> list[BaseNode]:
+    """Nodes of `vector_store` with one of `node_ids`, or of one of `ref_doc_ids`."""
+    if isinstance(vector_store, ChromaVectorStore):
+        # Queried directly: ChromaVectorStore.get_nodes sends Chroma an empty ID
+        # list along with a filter, which Chroma 1.x rejects
+        entries = vector_store.client.get(
+            ids=node_ids,
+            where={"ref_doc_id": {"$in": ref_doc_ids}} if ref_doc_ids else None,
+            include=["documents", "metadatas"],
+        )
+        return [
+            metadata_dict_to_node(metadata, text=text)
+            for text, metadata in zip(
+                entries["documents"] or [], entries["metadatas"] or [], strict=True
+            )
+        ]
+    filters = None
+    if ref_doc_ids:
+        filters = MetadataFilters(
+            filters=[
+                MetadataFilter(
+                    key="ref_doc_id", value=ref_doc_ids, operator=FilterOperator.IN
+                )
+            ]
+        )
+    return vector_store.get_nodes(node_ids=node_ids, filters=filters)  # type: ignore[no-any-return]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[str]], k: int = RRF_K
+) -> list[tuple[str, float]]:
+    """
+    Fuse rankings of node IDs, best first: each node scores the sum of
+    1 / (`k` + rank) over the rankings it appears in, ranks starting at 1.
+
+    Returns:
+        list[tuple[str, float]]: Node IDs and fused scores, best first.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking, start=1):
+            scores[node_id] = scores.get(node_id, 0.0) + 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def title_filters(mal_ids: Collection[int]) -> MetadataFilters:  # type: ignore[no-any-unimported]
+    """Metadata filter on the nodes of the anime with one of `mal_ids`."""
+    return MetadataFilters(
+        filters=[
+            MetadataFilter(
+                key="mal_id", value=sorted(mal_ids), operator=FilterOperator.IN
+            )
+        ]
+    )
+
+
+def dense_retrieve(  # type: ignore[no-any-unimported]
+    index: VectorStoreIndex,
+    query_bundle: QueryBundle,
+    similarity_top_k: int,
+    mal_ids: Collection[int] = (),
+) -> list[NodeWithScore]:
+    """
+    Vector search of `index`, among the nodes of the anime with one of `mal_ids`
+    if any: a Chroma `where` filter, applied before the similarity search.
+    """
+    filters = title_filters(mal_ids) if mal_ids else None
+    retriever = index.as_retriever(similarity_top_k=similarity_top_k, filters=filters)
+    return retriever.retrieve(query_bundle)  # type: ignore[no-any-return]
+
+
+class TitleFilteredRetriever(BaseRetriever):  # type: ignore[no-any-unimported]
+    """
+    Retrieves from the vector index, among the nodes of the anime named in the
+    question (see `src.title_index.TitleIndex`) when it names some, so that
+    other shows do not reach the LLM; from the whole index otherwise, or when
+    none of their nodes is found.
+
+    With `cache`, query embeddings and retrieved nodes are cached.
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self,
+        index: VectorStoreIndex,
+        titles: TitleIndex,
+        similarity_top_k: int = SIMILARITY_TOP_K,
+        cache: QueryCache | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._index = index
+        self._titles = titles
+        self._similarity_top_k = similarity_top_k
+        self._cache = cache
+        super().__init__(**kwargs)
+
+    def _search(  # type: ignore[no-any-unimported]
+        self, query_bundle: QueryBundle, mal_ids: Collection[int]
+    ) -> list[NodeWithScore]:
+        if mal_ids:
+            logger.info(f"Retrieval restricted to anime {sorted(mal_ids)}")
+            nodes = dense_retrieve(
+                self._index, query_bundle, self._similarity_top_k, mal_ids
+            )
+            if nodes:
+                return nodes
+        return dense_retrieve(self._index, query_bundle, self._similarity_top_k)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:  # type: ignore[no-any-unimported]
+        mal_ids = self._titles.match(query_bundle.query_str)
+        if self._cache is None:
+            return self._search(query_bundle, mal_ids)
+        return self._cache.retrieve(
+            query_bundle,
+            self._similarity_top_k,
+            mal_ids,
+            lambda bundle: self._search(bundle, mal_ids),
+        )
+
+
+class HybridRetriever(BaseRetriever):  # type: ignore[no-any-unimported]
+    """
+    Retrieves from the vector index and the BM25 index of its nodes, and fuses
+    both rankings by reciprocal rank (see `reciprocal_rank_fusion`).
+
+    Dense retrieval misses exact title and character-name matches that BM25
+    ranks first; RRF only uses ranks, so the cosine and BM25 scores do not need
+    to be comparable. The `candidates` best nodes of each retriever are fused,
+    and the `similarity_top_k` best fused nodes returned, scored by RRF. Nodes
+    only found by BM25 are fetched from the vector store.
+
+    With `titles`, both searches are restricted to the anime named in the
+    question, as by `TitleFilteredRetriever`. With `cache`, query embeddings and
+    fused nodes are cached.
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self,
+        index: VectorStoreIndex,
+        bm25: BM25Index,
+        titles: TitleIndex | None = None,
+        similarity_top_k: int = SIMILARITY_TOP_K,
+        candidates: int = HYBRID_CANDIDATES,
+        rrf_k: int = RRF_K,
+        cache: QueryCache | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._index = index
+        self._bm25 = bm25
+        self._titles = titles
+        self._similarity_top_k = similarity_top_k
+        self._candidates = candidates
+        self._rrf_k = rrf_k
+        self._cache = cache
+        super().__init__(**kwargs)
+
+    def _fuse(  # type: ignore[no-any-unimported]
+        self, query_bundle: QueryBundle, mal_ids: Collection[int] = ()
+    ) -> list[NodeWithScore]:
+        dense = dense_retrieve(self._index, query_bundle, self._candidates, mal_ids)
+        sparse = self._bm25.search(query_bundle.query_str, self._candidates, mal_ids)
+        fused = reciprocal_rank_fusion(
+            [[n.node.node_id for n in dense], [node_id for node_id, _ in sparse]],
+            self._rrf_k,
+        )[: self._similarity_top_k]
+        nodes = {n.node.node_id: n.node for n in dense}
+        missing = [node_id for node_id, _ in fused if node_id not in nodes]
+        if missing:
+            fetched = fetch_nodes(self._index.vector_store, node_ids=missing)
+            nodes.update((node.node_id, node) for node in fetched)
+        return [
+            NodeWithScore(node=nodes[node_id], score=score)
+            for node_id, score in fused
+            if node_id in nodes
+        ]
+
+    def _search(  # type: ignore[no-any-unimported]
+        self, query_bundle: QueryBundle, mal_ids: Collection[int]
+    ) -> list[NodeWithScore]:
+        if mal_ids:
+            logger.info(f"Retrieval restricted to anime {sorted(mal_ids)}")
+            if nodes := self._fuse(query_bundle, mal_ids):
+                return nodes
+        return self._fuse(query_bundle)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:  # type: ignore[no-any-unimported]
+        mal_ids = self._titles.match(query_bundle.query_str) if self._titles else set()
+        if self._cache is None:
+            return self._search(query_bundle, mal_ids)
+        return self._cache.retrieve(
+            query_bundle,
+            self._similarity_top_k,
+            mal_ids,
+            lambda bundle: self._search(bundle, mal_ids),
+        )
+
+
+class ParentNodeExpansion(BaseNodePostprocessor):  # type: ignore[no-any-unimported]
+    """
+    Adds the anime parent of the retrieved episode nodes of a hierarchical index
+    (see `src.rag_index.iter_hierarchical_documents`).
+
+    Each anime comes once, scored as its best episode, followed by its retrieved
+    episodes, so the prompt gets the series synopsis and metadata once for any
+    number of episodes. Nodes without a parent are left in place.
+    """
+
+    vector_store: BasePydanticVectorStore = Field(  # type: ignore[no-any-unimported]
+        description="Vector store holding the parent nodes."
+    )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ParentNodeExpansion"
+
+    def _fetch_parents(self, parent_ids: list[str]) -> dict[str, NodeWithScore]:  # type: ignore[no-any-unimported]
+        if not parent_ids:
+            return {}
+        nodes = fetch_nodes(self.vector_store, ref_doc_ids=parent_ids)
+        return {str(node.ref_doc_id): NodeWithScore(node=node) for node in nodes}
+
+    def _postprocess_nodes(  # type: ignore[no-any-unimported]
+        self,
+        nodes: list[NodeWithScore],
+        query_bundle: QueryBundle | None = None,  # noqa: ARG002
+    ) -> list[NodeWithScore]:
+        # Nodes grouped by parent, in order of their best node
+        groups: dict[str, list[NodeWithScore]] = {}
+        for node in nodes:
+            metadata = node.node.metadata
+            key = metadata.get("parent_id") or node.node.ref_doc_id or node.node_id
+            groups.setdefault(key, []).append(node)
+        retrieved = {node.node.ref_doc_id for node in nodes}
+        parents = self._fetch_parents([key for key in groups if key not in retrieved])
+        expanded: list[NodeWithScore] = []
+        for key, group in groups.items():
+            if parent := parents.get(key):
+                parent.score = group[0].score
+                expanded.append(parent)
+            # A retrieved parent comes before its episodes
+            expanded.extend(sorted(group, key=lambda n: n.node.ref_doc_id != key))
+        return expanded
+
+
+class CatalogJoin(BaseNodePostprocessor):  # type: ignore[no-any-unimported]
+    """
+    Adds the anime-level fields of the catalog (genres, score, studios, ...) to
+    the metadata of the retrieved nodes, which only identify their anime by
+    `mal_id` (see `src.rag_index.iter_documents`), so the LLM still sees them.
+
+    Fields the node already has are kept, and the synopsis is left out: it is
+    part of the chunk or anime parent text. Episode nodes of hierarchical indexes
+    are left as they are: their anime parent, added to the results by
+    `ParentNodeExpansion`, carries the fields once for all of them.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    catalog: AnimeCatalog = Field(description="Catalog of the anime records.")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CatalogJoin"
+
+    def _postprocess_nodes(  # type: ignore[no-any-unimported]
+        self,
+        nodes: list[NodeWithScore],
+        query_bundle: QueryBundle | None = None,  # noqa: ARG002
+    ) -> list[NodeWithScore]:
+        identified = [
+            n
+            for n in nodes
+            if "mal_id" in n.node.metadata
+            and n.node.metadata.get("node_type") != "episode"
+        ]
+        records = self.catalog.get_many(n.node.metadata["mal_id"] for n in identified)
+        for node in identified:
+            record = records.get(node.node.metadata["mal_id"])
+            if record is None:
+                continue
+            for key, value in record.items():
+                if key != "synopsis" and value not in (None, ""):
+                    node.node.metadata.setdefault(key, value)
+        return nodes
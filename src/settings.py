@@ -1,3 +1,5 @@
+from functools import cache
+
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -11,4 +13,7 @@ class Settings(BaseSettings):  # type: ignore[no-any-unimported]
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
-settings = Settings()
+@cache
+def get_settings() -> Settings:
+    """Settings read from the environment and `.env` on first use."""
+    return Settings()
@@ -1,23 +1,32 @@
 import base64
 import os
+from functools import cache
 
-from src.settings import settings
+from src.settings import get_settings
 
-os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = "https://cloud.langfuse.com/api/public/otel"
 
-LANGFUSE_AUTH = base64.b64encode(
-    f"{settings.LANGFUSE_PUBLIC_KEY}:{settings.LANGFUSE_SECRET_KEY}".encode()
-).decode()
-os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = settings.LANGFUSE_HOST + "/api/public/otel"
-os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"Authorization=Basic {LANGFUSE_AUTH}"
+@cache
+def init_telemetry() -> None:
+    """
+    Send the LlamaIndex traces to Langfuse over OpenTelemetry. Call it once at
+    startup, before the first query; later calls do nothing.
+    """
+    settings = get_settings()
+    langfuse_auth = base64.b64encode(
+        f"{settings.LANGFUSE_PUBLIC_KEY}:{settings.LANGFUSE_SECRET_KEY}".encode()
+    ).decode()
+    os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = (
+        settings.LANGFUSE_HOST + "/api/public/otel"
+    )
+    os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"Authorization=Basic {langfuse_auth}"
 
-from langfuse import Langfuse  # noqa: E402, I001
-from openinference.instrumentation.llama_index import LlamaIndexInstrumentor  # noqa: E402
+    # Imported once the exporter is configured: it is read on import
+    from langfuse import Langfuse
+    from openinference.instrumentation.llama_index import LlamaIndexInstrumentor
 
-
-langfuse = Langfuse(
-    secret_key=settings.LANGFUSE_SECRET_KEY,
-    public_key=settings.LANGFUSE_PUBLIC_KEY,
-    host=settings.LANGFUSE_HOST,
-)
-LlamaIndexInstrumentor().instrument(langfuse=langfuse)
+    langfuse = Langfuse(
+        secret_key=settings.LANGFUSE_SECRET_KEY,
+        public_key=settings.LANGFUSE_PUBLIC_KEY,
+        host=settings.LANGFUSE_HOST,
+    )
+    LlamaIndexInstrumentor().instrument(langfuse=langfuse)
@@ -0,0 +1,294 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import ExitStack
+from contextlib import contextmanager
+from pathlib import Path
+from types import TracebackType
+from typing import IO
+from typing import Any
+
+import zstandard
+from loguru import logger
+
+from src.constants import CHUNKS_JSON
+from src.constants import CHUNKS_PATH
+from src.constants import META_DIR
+from src.constants import RAW_DIR
+from src.constants import ZSTD_LEVEL
+
+# Data files are compact JSON (one document) or JSON Lines (one record per line)
+# compressed with zstd. Plain `.json` files written by older versions stay readable.
+LEGACY_SUFFIX = ".json"
+COMPACT_SUFFIX = ".json.zst"
+# Raised when reading a truncated or corrupted data file
+READ_ERRORS = (OSError, ValueError, zstandard.ZstdError)
+
+
+def _is_compressed(path: Path) -> bool:
+    return path.suffix == ".zst"
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def data_path(directory: Path, stem: str) -> Path:
+    """Path of the compressed data file `stem` in `directory`."""
+    return directory / f"{stem}{COMPACT_SUFFIX}"
+
+
+def find_data_file(directory: Path, stem: str) -> Path | None:
+    """
+    Locate the data file `stem` in `directory`, compressed or legacy.
+
+    Returns:
+        Path | None: The compressed file if present, else the legacy `.json` one,
+        else None.
+    """
+    for path in (data_path(directory, stem), directory / f"{stem}{LEGACY_SUFFIX}"):
+        if path.exists():
+            return path
+    return None
+
+
+def iter_data_files(directory: Path) -> Iterator[Path]:
+    """
+    Iterate over the data files of `directory`, one per stem. When a file exists
+    in both formats (an interrupted migration), the compressed one wins.
+    """
+    compact = {
+        p.name.removesuffix(COMPACT_SUFFIX): p
+        for p in directory.glob(f"*{COMPACT_SUFFIX}")
+    }
+    yield from sorted(compact.values())
+    for path in sorted(directory.glob(f"*{LEGACY_SUFFIX}")):
+        if path.stem not in compact:
+            yield path
+
+
+@contextmanager
+def atomic_open(path: Path) -> Iterator[IO[bytes]]:
+    """
+    Open a temporary file next to `path` for writing. It replaces `path` only once
+    fully written and synced, so a crash never leaves a truncated file behind.
+    Missing parent directories are created.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def atomic_dir(path: Path) -> Iterator[Path]:
+    """
+    Create a temporary directory next to `path` to write files into. It replaces
+    the `path` directory only once the block completes, so readers never see a
+    mix of old and new files. A crash between the two renames of the swap leaves
+    the previous directory next to `path`, as `.<name>.old`.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    old = path.with_name(f".{path.name}.old")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        yield tmp
+        shutil.rmtree(old, ignore_errors=True)
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def write_json(path: Path, data: Any) -> int:
+    """
+    Atomically write `data` as a single JSON document. The format follows the
+    suffix: compact zstd-compressed JSON for `.json.zst`, indented plain JSON
+    otherwise. Returns the number of bytes written.
+    """
+    if _is_compressed(path):
+        body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(_dumps(data))
+    else:
+        body = json.dumps(data, indent=2, ensure_ascii=False).encode()  # Japanese
+    with atomic_open(path) as f:
+        f.write(body)
+    return len(body)
+
+
+def read_json(path: Path) -> Any:
+    """Read a JSON document written by `write_json`, compressed or not."""
+    if _is_compressed(path):
+        with open(path, "rb") as raw:
+            return json.loads(zstandard.ZstdDecompressor().stream_reader(raw).read())
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_jsonl(path: Path) -> Iterator[Any]:
+    """
+    Stream the records of a JSON Lines file, compressed or not, without loading
+    the whole file.
+    """
+    with open(path, "rb") as raw:
+        stream: IO[bytes] = raw
+        if _is_compressed(path):
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        with io.TextIOWrapper(stream, encoding="utf-8") as text:
+            for line in text:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class JsonlWriter:
+    """
+    Streaming JSON Lines writer, zstd-compressed when the path ends in `.zst`. The
+    file is written atomically: it only replaces `path` once the block exits
+    without error.
+
+    Use:
+        with JsonlWriter(CHUNKS_PATH) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = 0
+        self._stack = ExitStack()
+        self._stream: IO[bytes] | None = None
+
+    def __enter__(self) -> "JsonlWriter":
+        with ExitStack() as stack:
+            self._stream = stack.enter_context(atomic_open(self.path))
+            if _is_compressed(self.path):
+                compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+                self._stream = stack.enter_context(
+                    compressor.stream_writer(self._stream, closefd=False)
+                )
+            self._stack = stack.pop_all()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._stream = None
+        self._stack.__exit__(exc_type, exc, tb)  # Ends the zstd frame, then renames
+
+    def write(self, record: Any) -> None:
+        if self._stream is None:
+            raise RuntimeError("JsonlWriter must be used as a context manager")
+        self._stream.write(_dumps(record) + b"\n")
+        self.count += 1
+
+
+def write_jsonl(path: Path, records: Iterable[Any]) -> int:
+    """Write `records` as JSON Lines. Returns the number of records written."""
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def migrate_file(path: Path, keep: bool = False) -> Path:
+    """
+    Convert a legacy `.json` data file to compressed `.json.zst`.
+
+    Args:
+        path (Path): The legacy file.
+        keep (bool): Keep the legacy file instead of deleting it.
+
+    Returns:
+        Path: The compressed file.
+    """
+    target = data_path(path.parent, path.stem)
+    write_json(target, read_json(path))
+    if not keep:
+        path.unlink()
+    return target
+
+
+def migrate_dir(directory: Path, keep: bool = False) -> tuple[int, int, int]:
+    """
+    Convert every legacy `.json` file of `directory`.
+
+    Returns:
+        tuple[int, int, int]: Files migrated, bytes before and bytes after.
+    """
+    migrated = before = after = 0
+    for path in sorted(directory.glob(f"*{LEGACY_SUFFIX}")):
+        size = path.stat().st_size
+        try:
+            target = migrate_file(path, keep=keep)
+        except READ_ERRORS:
+            logger.warning(f"Skipping unreadable data file {path}")
+            continue
+        migrated += 1
+        before += size
+        after += target.stat().st_size
+    return migrated, before, after
+
+
+def migrate_chunks(
+    legacy: Path = CHUNKS_JSON, target: Path = CHUNKS_PATH, keep: bool = False
+) -> int:
+    """
+    Convert the legacy chunks array to compressed JSON Lines.
+
+    Returns:
+        int: Number of chunks migrated, 0 if there is no legacy file.
+    """
+    if not legacy.exists():
+        return 0
+    count = write_jsonl(target, read_json(legacy))
+    if not keep:
+        legacy.unlink()
+    return count
+
+
+def migrate(keep: bool = False) -> None:
+    """Convert the existing RAW_DIR, META_DIR and chunks files in place."""
+    for directory in (RAW_DIR, META_DIR):
+        migrated, before, after = migrate_dir(directory, keep=keep)
+        ratio = before / after if after else 0.0
+        logger.info(
+            f"Migrated {migrated} files in {directory}: "
+            f"{before / 2**20:.1f} MiB -> {after / 2**20:.1f} MiB ({ratio:.1f}x)"
+        )
+    logger.info(f"Migrated {migrate_chunks(keep=keep)} chunks to {CHUNKS_PATH}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the on-disk data files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = commands.add_parser(
+        "migrate", help="Convert legacy JSON data files to zstd-compressed ones."
+    )
+    migrate_cmd.add_argument(
+        "--keep", action="store_true", help="Keep the legacy files."
+    )
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate(keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable
+from itertools import islice
+
+from loguru import logger
+
+from src.constants import TITLE_ALIAS_MIN_CHARS
+from src.constants import TITLE_FILTER_MAX_ANIME
+
+# Kana and CJK ideographs: one token per character, as Japanese has no spaces
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+TOKEN_PATTERN = re.compile(rf"[{CJK}]|[^\W_{CJK}]+")
+
+
+def title_tokens(text: str) -> list[str]:
+    """
+    Tokens of `text` as matched against titles: words, or CJK characters, after
+    NFKC normalization (full-width letters, half-width kana). Case is kept.
+    """
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text))
+
+
+def title_key(tokens: Iterable[str]) -> str:
+    return " ".join(token.casefold() for token in tokens)
+
+
+class TitleIndex:
+    """
+    In-memory index of anime titles (romaji, English, Japanese and synonyms),
+    matched against the questions to restrict retrieval to the anime they name.
+
+    Titles are keyed by their normalized tokens, and kept sorted so that the
+    titles starting with some tokens are a range of keys. A question names the
+    anime of the longest runs of its tokens that are, leftmost first:
+    - a title of several words, case-insensitive; it also names the titles it
+      starts, so "Kaguya-sama: Love is War" names every season;
+    - the start of titles, of at least two words, capitalized ("Kaguya-sama");
+    - a title of one word of at least `min_chars` letters, capitalized, so that
+      common words do not name an anime ("Another", "Monster").
+    Capitalized means not as the first word of the question, which always is.
+    """
+
+    def __init__(self, min_chars: int = TITLE_ALIAS_MIN_CHARS) -> None:
+        self.min_chars = min_chars
+        self._ids: dict[str, set[int]] = {}
+        self._sorted_keys: list[str] = []
+        self._max_tokens = 0
+
+    @classmethod
+    def from_aliases(
+        cls, aliases: Iterable[tuple[str, int]], **kwargs: int
+    ) -> "TitleIndex":
+        """Index of (title, MyAnimeList ID) pairs, see `AnimeCatalog.iter_aliases`."""
+        index = cls(**kwargs)
+        for alias, mal_id in aliases:
+            index.add(alias, mal_id)
+        index._sorted_keys = sorted(index._ids)
+        logger.info(f"Title index built: {len(index._ids)} titles")
+        return index
+
+    def add(self, alias: str, mal_id: int) -> None:
+        tokens = title_tokens(alias)
+        if len(tokens) == 1 and not self._matchable_word(tokens[0]):
+            return
+        if tokens:
+            self._ids.setdefault(title_key(tokens), set()).add(mal_id)
+            self._max_tokens = max(self._max_tokens, len(tokens))
+            self._sorted_keys = []  # Sorted again on the next match
+
+    def _matchable_word(self, token: str) -> bool:
+        return len(token) >= self.min_chars and not re.match(f"[{CJK}]", token)
+
+    def _starting_with(self, key: str) -> set[int]:
+        """Anime of the titles starting with the tokens of `key`."""
+        if not self._sorted_keys:
+            self._sorted_keys = sorted(self._ids)
+        ids: set[int] = set()
+        start = bisect_left(self._sorted_keys, key)
+        for other in islice(self._sorted_keys, start, None):
+            if not other.startswith(key):
+                break
+            if len(other) == len(key) or other[len(key)] == " ":
+                ids |= self._ids[other]
+        return ids
+
+    def _named_at(self, tokens: list[str], start: int) -> tuple[int, set[int]]:
+        """End and anime of the longest title named from `tokens[start]` on."""
+        # The first word of a question is capitalized whatever it is
+        capitalized = start > 0 and tokens[start][0].isupper()
+        for end in range(min(len(tokens), start + self._max_tokens), start, -1):
+            key = title_key(tokens[start:end])
+            if end - start == 1:
+                ids = self._ids.get(key, set()) if capitalized else set()
+            elif key in self._ids or capitalized:
+                ids = self._starting_with(key)
+            else:
+                continue
+            if ids:
+                return end, ids
+        return start + 1, set()
+
+    def match(self, question: str) -> set[int]:
+        """
+        MyAnimeList IDs of the anime named in `question`: empty when it names none,
+        or more than TITLE_FILTER_MAX_ANIME.
+        """
+        tokens = title_tokens(question)
+        ids: set[int] = set()
+        start = 0
+        while start < len(tokens):
+            start, named = self._named_at(tokens, start)
+            ids |= named
+        if len(ids) > TITLE_FILTER_MAX_ANIME:
+            logger.info(f"Question names {len(ids)} anime: not filtered")
+            return set()
+        return ids
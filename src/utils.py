@@ -1,19 +1,23 @@
-import json
 from pathlib import Path
 from typing import Any
 
+from src.storage import write_json
 
-def save_data(file_path: str | Path, data: dict[str, Any]) -> None:
+
+def save_data(file_path: str | Path, data: dict[str, Any]) -> int:
     """
-    Save the provided data as a JSON file to the specified file path.
+    Save the provided data to the specified file path.
 
     Args:
-        file_path (str): The path where the JSON file will be saved.
-                         file_path example: DIR / f"{process_query}_{page}.json"
+        file_path (str): The path where the file will be saved. The format follows
+                         the suffix: zstd-compressed compact JSON for `.json.zst`,
+                         indented JSON for `.json` (see src.storage).
+                         file_path example: data_path(DIR, f"{process_query}_{page}")
         data (dict[str, Any]): The data to be saved. If empty, nothing is written.
+
+    Returns:
+        int: The number of bytes written.
     """
     if not data:
-        return
-    file_path = Path(file_path)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)  # Handle Japanese
+        return 0
+    return write_json(Path(file_path), data)
@@ -0,0 +1,53 @@
+from src.bm25 import BM25Index
+from src.bm25 import tokenize
+
+DOCS = [
+    ("a", "Anime: Kaguya-sama wa Kokurasetai (ID: 1)\nKaguya and Shirogane", 1),
+    ("b", "Anime: Spy x Family (ID: 2)\nLoid, Yor and Anya Forger", 2),
+    ("c", "Anime: Frieren (ID: 3)\nFrieren travels after the demon king", 3),
+    ("d", "Anime: Kaguya-hime no Monogatari (ID: 4)\nA princess from the moon", 4),
+    ("e", "Kaguya", None),
+]
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Spy x Family: Anya's (ID: 2)") == [
+        "spy",
+        "x",
+        "family",
+        "anya",
+        "s",
+        "id",
+        "2",
+    ]
+
+
+def test_bm25_ranks_exact_name_matches_first():
+    bm25 = BM25Index.build(DOCS)
+
+    assert [node_id for node_id, _ in bm25.search("Who is Anya Forger?", 2)] == ["b"]
+    kaguya = bm25.search("kaguya shirogane", 3)
+    assert [node_id for node_id, _ in kaguya] == ["a", "e", "d"]
+    assert kaguya[0][1] > kaguya[1][1] > kaguya[2][1] > 0
+    assert [node_id for node_id, _ in bm25.search("kaguya", 3, [4])] == ["d"]
+    assert bm25.search("unknown words", 3) == []
+    assert len(bm25.search("anime", 2)) == 2
+
+
+def test_bm25_save_and_load_round_trip(tmp_path):
+    bm25 = BM25Index.build(DOCS, version="v1")
+    bm25.save(tmp_path / "bm25.npz")
+
+    loaded = BM25Index.load(tmp_path / "bm25.npz")
+
+    assert loaded.version == "v1"
+    assert loaded.node_ids == bm25.node_ids
+    assert loaded.mal_ids.tolist() == [1, 2, 3, 4, -1]
+    assert loaded.search("frieren demon", 4) == bm25.search("frieren demon", 4)
+
+
+def test_bm25_empty_index(tmp_path):
+    bm25 = BM25Index.build([])
+    bm25.save(tmp_path / "bm25.npz")
+
+    assert BM25Index.load(tmp_path / "bm25.npz").search("anime", 5) == []
@@ -0,0 +1,27 @@
+from src.db.catalog import AnimeCatalog
+
+
+def test_catalog_round_trip(tmp_path):
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    catalog.put({"mal_id": 1, "url": "u1", "title": "A", "genres": "Comedy"})
+    catalog.put({"mal_id": 2, "url": "u2", "title": "B"})
+    catalog.put({"mal_id": 1, "url": "u1", "title": "A", "genres": "Drama"})
+    catalog.commit()
+    catalog.close()
+
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    assert catalog.get(1) == {"mal_id": 1, "url": "u1", "title": "A", "genres": "Drama"}
+    assert catalog.get(3) is None
+    assert set(catalog.get_many([2, 1, 2, 3])) == {1, 2}
+    catalog.close()
+
+
+def test_catalog_replaces_the_titles_of_an_anime(tmp_path):
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    catalog.put({"mal_id": 1, "url": "u1", "title": "A"}, ["A", "Old title"])
+    catalog.put({"mal_id": 2, "url": "u2", "title": "B"}, ["B", "B"])
+    catalog.put({"mal_id": 1, "url": "u1", "title": "A"}, ["A", "New title"])
+    catalog.commit()
+
+    assert sorted(catalog.iter_aliases()) == [("A", 1), ("B", 2), ("New title", 1)]
+    catalog.close()
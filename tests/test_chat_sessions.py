@@ -0,0 +1,122 @@
+import threading
+from unittest.mock import MagicMock
+
+from llama_index.core.chat_engine.types import BaseChatEngine
+from llama_index.core.llms import ChatMessage
+
+from src.chat_sessions import ChatEnginePool
+
+
+class FakeChatEngine:
+    def __init__(self) -> None:
+        self.chat_history: list[ChatMessage] = []
+
+    def chat(self, message: str) -> str:
+        self.chat_history += [
+            ChatMessage(role="user", content=message),
+            ChatMessage(role="assistant", content="ok"),
+        ]
+        return "ok"
+
+    def reset(self) -> None:
+        self.chat_history = []
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def chat(pool: ChatEnginePool, session_id: str, message: str) -> BaseChatEngine:
+    with pool.session(session_id) as chat_engine:
+        chat_engine.chat(message)
+    return chat_engine
+
+
+def test_sessions_keep_their_own_history():
+    pool = ChatEnginePool(FakeChatEngine)
+    alice = chat(pool, "alice", "Who is Frieren?")
+    bob = chat(pool, "bob", "Who is Anya?")
+
+    assert chat(pool, "alice", "And Fern?") is alice
+    assert [m.content for m in alice.chat_history] == [
+        "Who is Frieren?",
+        "ok",
+        "And Fern?",
+        "ok",
+    ]
+    assert len(bob.chat_history) == 2
+    assert pool.chars == len("Who is Frieren?okAnd Fern?ok") + len("Who is Anya?ok")
+
+    pool.reset("alice")
+    assert alice.chat_history == []
+    assert len(bob.chat_history) == 2
+    assert pool.chars == len("Who is Anya?ok")
+    pool.reset("carol")  # Unknown sessions are not created
+    assert pool.size == 2
+
+
+def test_least_recently_used_sessions_are_dropped_past_the_limits():
+    pool = ChatEnginePool(FakeChatEngine, max_sessions=2, max_chars=30)
+    chat(pool, "a", "1")
+    chat(pool, "b", "2")
+    chat(pool, "a", "3")
+    chat(pool, "c", "4")  # "b" is the least recently used
+    assert pool.size == 2
+    assert [m.content for m in chat(pool, "b", "5").chat_history] == ["5", "ok"]
+
+    chat(pool, "c", "x" * 20)  # Over 30 characters: "a" is dropped
+    assert (pool.size, pool.chars) == (2, len("4okxxxxxxxxxxxxxxxxxxxxok5ok"))
+    assert pool.evictions == 2
+
+
+def test_idle_sessions_are_dropped():
+    clock = Clock()
+    pool = ChatEnginePool(FakeChatEngine, idle_ttl=60, clock=clock)
+    chat(pool, "a", "1")
+    clock.now = 30
+    chat(pool, "b", "2")
+    clock.now = 61
+
+    chat(pool, "c", "3")
+    assert pool.size == 2
+    assert pool.chars == len("2ok3ok")
+
+
+def test_sessions_in_use_are_not_dropped():
+    new_engine = MagicMock(side_effect=FakeChatEngine)
+    pool = ChatEnginePool(new_engine, max_sessions=1)
+    with pool.session("a") as chat_engine:
+        chat(pool, "b", "1")  # "a", in use, is kept over the limit, "b" dropped
+    assert pool.size == 1
+    with pool.session("a") as again:
+        assert again is chat_engine
+    assert new_engine.call_count == 2
+
+
+def test_calls_of_a_session_are_serialized():
+    pool = ChatEnginePool(FakeChatEngine)
+    inside = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def first() -> None:
+        with pool.session("a"):
+            inside.set()
+            release.wait()
+            order.append("first")
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    inside.wait()
+    with pool.session("b"):  # Other sessions do not wait
+        order.append("other")
+    release.set()
+    with pool.session("a"):
+        order.append("second")
+    thread.join()
+
+    assert order == ["other", "first", "second"]
@@ -0,0 +1,33 @@
+import pytest
+
+from src.db.embedding_cache import EmbeddingCache
+
+
+def test_embedding_cache_put_and_get(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=1024)
+    cache.put_many("bge", [("hello", [0.5, 1.0]), ("world", [2.0, 3.0])])
+    cache.close()
+
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=1024)
+    found = cache.get_many("bge", ["hello", "missing"])
+    assert found == {"hello": pytest.approx([0.5, 1.0])}
+    assert cache.get_many("other-model", ["hello"]) == {}
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=16)
+    cache.put_many("bge", [("a", [1.0, 1.0])])  # 8 bytes as float32
+    cache.put_many("bge", [("b", [1.0, 1.0])])
+    cache.get_many("bge", ["a"])
+    cache.put_many("bge", [("c", [1.0, 1.0])])
+    assert set(cache.get_many("bge", ["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats.evictions == 1
+
+
+def test_embedding_cache_put_existing_text_is_counted_once(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=16)
+    for _ in range(3):
+        cache.put_many("bge", [("a", [1.0, 1.0])])
+    cache.put_many("bge", [("b", [1.0, 1.0])])
+    assert cache.stats.evictions == 0
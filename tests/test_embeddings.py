@@ -0,0 +1,70 @@
+from typing import ClassVar
+
+from llama_index.core.embeddings import MockEmbedding
+
+from src.db.embedding_cache import EmbeddingCache
+from src.embeddings import CachedEmbedding
+from src.embeddings import ProcessPoolEmbedding
+
+
+class CountingEmbedding(MockEmbedding):
+    calls: ClassVar[list[list[str]]] = []
+
+    def _get_text_embeddings(self, texts):
+        self.calls.append(texts)
+        return super()._get_text_embeddings(texts)
+
+
+def test_cached_embedding_only_embeds_missing_texts(tmp_path):
+    inner = CountingEmbedding(embed_dim=4)
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=2**20)
+    model = CachedEmbedding(inner, cache)
+
+    first = model.get_text_embedding_batch(["a", "b", "a"])
+    second = model.get_text_embedding_batch(["b", "c"])
+
+    assert len(first) == 3
+    assert second[0] == first[1]
+    assert inner.calls == [["a", "b"], ["c"]]
+    assert cache.stats.hits == 1
+    assert model.get_query_embedding("q") == inner.get_query_embedding("q")
+
+
+def test_cached_embedding_cache_key_separates_backends(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", max_bytes=2**20)
+    CachedEmbedding(MockEmbedding(embed_dim=4), cache).get_text_embedding("a")
+    inner = CountingEmbedding(embed_dim=4)
+    CachedEmbedding(inner, cache, cache_key="mock:onnx").get_text_embedding("a")
+    assert inner.calls[-1] == ["a"]
+
+
+class LengthEmbedding(MockEmbedding):
+    def _get_vector(self, text):
+        return [float(len(text))] * self.embed_dim
+
+    def _get_text_embedding(self, text):
+        return self._get_vector(text)
+
+    def _get_query_embedding(self, query):
+        return self._get_vector(query)
+
+
+def length_embedding(threads: int) -> LengthEmbedding:
+    assert threads >= 1
+    return LengthEmbedding(embed_dim=2)
+
+
+def test_process_pool_embedding_keeps_order():
+    model = ProcessPoolEmbedding(
+        length_embedding,
+        model_name="length",
+        processes=2,
+        batch_size=2,
+    )
+    texts = ["a" * n for n in range(1, 8)]
+    try:
+        vectors = model.get_text_embedding_batch(texts)
+        assert [v[0] for v in vectors] == [float(n) for n in range(1, 8)]
+        assert model.get_query_embedding("abc") == [3.0, 3.0]
+    finally:
+        model.close()
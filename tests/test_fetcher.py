@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.fetcher import AsyncFetcher
+from src.fetcher import TokenBucket
+from src.fetcher import parse_retry_after
+from src.metrics import Metrics
+
+
+def run_get(handler, url="https://api.jikan.moe/v4/anime", **kwargs):
+    async def main():
+        fetcher = AsyncFetcher(
+            transport=httpx.MockTransport(handler), backoff_base=0.0, **kwargs
+        )
+        async with fetcher:
+            return await fetcher.get(url)
+
+    return asyncio.run(main())
+
+
+def test_parse_retry_after_when_seconds():
+    assert parse_retry_after("3") == 3.0
+
+
+def test_parse_retry_after_when_http_date_in_past():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_parse_retry_after_when_invalid():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_token_bucket_when_burst_exhausted():
+    async def main():
+        bucket = TokenBucket(rate=20.0, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # Two tokens are free, the next two wait 1/20s each.
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_fetcher_get_when_429_then_success():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"ok": True})
+
+    metrics = Metrics()
+    resp = run_get(handler, metrics=metrics)
+    assert resp.status_code == 200
+    assert len(calls) == 2
+    assert metrics.value("http_throttled_total") == 1
+    assert metrics.value("http_retries_total") == 1
+    assert metrics.value("http_responses_total", status=200) == 1
+    assert (
+        metrics.histograms["http_request_seconds"][(("endpoint", "other"),)].count == 2
+    )
+
+
+def test_fetcher_get_when_retries_exhausted_returns_last_response():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    resp = run_get(handler, max_retries=2)
+    assert resp.status_code == 503
+    assert len(calls) == 3
+
+
+def test_fetcher_get_when_not_retryable():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    assert run_get(handler).status_code == 404
+    assert len(calls) == 1
+
+
+def test_fetcher_get_when_network_down_raises():
+    def handler(request):
+        raise httpx.ConnectError("down")
+
+    metrics = Metrics()
+    with pytest.raises(httpx.ConnectError):
+        run_get(handler, max_retries=1, metrics=metrics)
+    assert metrics.value("http_network_errors_total") == 2
+    assert metrics.value("http_retries_total") == 1
+
+
+def test_fetcher_get_outside_context_manager_raises():
+    with pytest.raises(RuntimeError):
+        asyncio.run(AsyncFetcher().get("https://api.jikan.moe/v4/anime"))
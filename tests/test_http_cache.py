@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+
+from src.db.http_cache import HttpCache
+from src.fetcher import AsyncFetcher
+
+URL = "https://api.jikan.moe/v4/anime/1/episodes"
+
+
+def fetch_twice(cache, handler, ttl):
+    async def main():
+        fetcher = AsyncFetcher(
+            transport=httpx.MockTransport(handler), rate_limits={}, cache=cache
+        )
+        async with fetcher:
+            first = await fetcher.get(URL, params={"page": 1}, ttl=ttl)
+            second = await fetcher.get(URL, params={"page": 1}, ttl=ttl)
+        return first, second
+
+    return asyncio.run(main())
+
+
+def test_http_cache_put_and_get(tmp_path):
+    cache = HttpCache(tmp_path / "cache.sqlite", max_bytes=1024)
+    cache.put("k", 200, "application/json", b"{}", '"v1"', None, ttl=60)
+    entry = cache.get("k")
+    assert entry.body == b"{}"
+    assert entry.etag == '"v1"'
+    assert entry.is_fresh
+    assert cache.get("missing") is None
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path / "cache.sqlite", max_bytes=10)
+    cache.put("a", 200, None, b"12345", None, None, ttl=60)
+    cache.put("b", 200, None, b"12345", None, None, ttl=60)
+    cache.get("a")
+    cache.put("c", 200, None, b"12345", None, None, ttl=60)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_http_cache_commits_the_access_time_of_reads(tmp_path):
+    cache = HttpCache(tmp_path / "cache.sqlite", max_bytes=1024)
+    cache.put("k", 200, None, b"{}", None, None, ttl=60)
+    cache.conn.execute("UPDATE responses SET accessed_at = 0")
+    cache.conn.commit()
+
+    cache.get("k")
+
+    assert not cache.conn.in_transaction
+    other = HttpCache(tmp_path / "cache.sqlite", max_bytes=1024)
+    assert other.conn.execute("SELECT accessed_at FROM responses").fetchone()[0] > 0
+
+
+def test_fetcher_get_when_fresh_skips_network(tmp_path):
+    cache = HttpCache(tmp_path / "cache.sqlite", max_bytes=2**20)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"data": [1]})
+
+    first, second = fetch_twice(cache, handler, ttl=60)
+    assert len(calls) == 1
+    assert second.json() == first.json() == {"data": [1]}
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+
+
+def test_fetcher_get_when_stale_revalidates_with_etag(tmp_path):
+    cache = HttpCache(tmp_path / "cache.sqlite", max_bytes=2**20)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"data": [1]}, headers={"ETag": '"v1"'})
+
+    _, second = fetch_twice(cache, handler, ttl=-1)
+    assert len(calls) == 2
+    assert "If-None-Match" not in calls[0].headers
+    assert second.status_code == 200
+    assert second.json() == {"data": [1]}
+    assert cache.stats.revalidations == 1
@@ -0,0 +1,50 @@
+from dataclasses import replace
+
+from src.index_manifest import IndexManifest
+from src.index_manifest import corpus_hash
+
+MANIFEST = IndexManifest(
+    model_name="BAAI/bge-small-en-v1.5",
+    embedding_backend="torch",
+    embed_dim=384,
+    chunk_size=13,
+    document_count=2,
+    corpus_hash="abc",
+)
+
+
+def test_manifest_round_trip(tmp_path):
+    path = tmp_path / "chroma_manifest.json"
+    assert IndexManifest.load(path) is None
+    MANIFEST.save(path)
+    assert IndexManifest.load(path) == MANIFEST
+
+
+def test_manifest_unreadable_is_ignored(tmp_path):
+    path = tmp_path / "chroma_manifest.json"
+    path.write_text('{"model_name": "x"}', encoding="utf-8")
+    assert IndexManifest.load(path) is None
+
+
+def test_manifest_drift():
+    assert MANIFEST.drift(embed_dim=384) == []
+    drifted = replace(MANIFEST, model_name="other", chunk_size=20)
+    assert drifted.drift(embed_dim=384) == [
+        "model_name: other -> BAAI/bge-small-en-v1.5",
+        "chunk_size: 20 -> 13",
+    ]
+    hierarchical = replace(MANIFEST, index_mode="hierarchical")
+    assert hierarchical.drift(embed_dim=384) == ["index_mode: hierarchical -> chunk"]
+    assert MANIFEST.drift(embed_dim=768) == ["embed_dim: 384 -> 768"]
+
+
+def test_manifest_drift_when_only_the_backend_changes():
+    onnx = replace(MANIFEST, embedding_backend="onnx-int8")
+    assert onnx.drift(embed_dim=384) == ["embedding_backend: onnx-int8 -> torch"]
+
+
+def test_corpus_hash_ignores_order_and_sees_changes():
+    a = {"chunk_id": "1-0", "content_hash": "h1"}
+    b = {"chunk_id": "2-0", "content_hash": "h2"}
+    assert corpus_hash([a, b]) == corpus_hash([b, a])
+    assert corpus_hash([a, b]) != corpus_hash([a, {**b, "content_hash": "h3"}])
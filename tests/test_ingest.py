@@ -1,16 +1,46 @@
-from unittest.mock import Mock
+import json
+from functools import partial
+from unittest.mock import AsyncMock
 from unittest.mock import patch
 
+import httpx
 import pytest
-from requests.exceptions import RequestException
 
+from src.fetcher import AsyncFetcher
 from src.ingest import _extract_synopsis_from_mal
+from src.ingest import _run
+from src.ingest import _timed_extract_synopsis
+from src.ingest import acrawl_catalog
+from src.ingest import afetch_episode_list
+from src.ingest import afetch_episodes
+from src.ingest import afetch_metadata_from_myanimelist
+from src.ingest import cache_ttl
 from src.ingest import fetch_episode_synopsis
+from src.ingest import fetch_episodes
 from src.ingest import fetch_metadata_from_myanimelist
 from src.ingest import filter_anime_metadata
 from src.ingest import ingest_anime_metadata
 
 
+@pytest.fixture(autouse=True)
+def tmp_http_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.ingest.HTTP_CACHE_PATH", tmp_path / "http_cache.sqlite")
+    monkeypatch.setattr("src.ingest.JOURNAL_PATH", tmp_path / "journal.sqlite")
+    monkeypatch.setattr("src.ingest.REGISTRY_PATH", tmp_path / "registry.sqlite")
+
+
+def mock_fetcher(handler):
+    """Patch src.ingest.AsyncFetcher so every request is answered by `handler`."""
+    factory = partial(
+        AsyncFetcher,
+        transport=httpx.MockTransport(handler),
+        rate_limits={},
+        backoff_base=0.0,
+        max_retries=1,
+    )
+    return patch("src.ingest.AsyncFetcher", factory)
+
+
 def test_filter_anime_metadata_filters_types():
     input_data = [
         {"type": "TV", "title": "Show 1"},
@@ -63,6 +93,13 @@ def test_extract_synopsis_from_mal_no_parent_div():
     assert result is None
 
 
+def test_timed_extract_synopsis_returns_the_parse_time():
+    synopsis, seconds = _timed_extract_synopsis("<div><h2>Synopsis</h2>S1</div>")
+
+    assert synopsis == "S1"
+    assert 0 <= seconds < 1
+
+
 def test_extract_synopsis_from_mal_empty_html():
     html = ""
     result = _extract_synopsis_from_mal(html)
@@ -71,61 +108,117 @@ def test_extract_synopsis_from_mal_empty_html():
 
 def test_fetch_episode_synopsis_success():
     html = "<div><h2>Synopsis</h2>Some summary here.</div>"
-    mock_resp = Mock(status_code=200, text=html)
-    with patch("src.ingest.requests.get", return_value=mock_resp):
+    with mock_fetcher(lambda request: httpx.Response(200, text=html)):
         result = fetch_episode_synopsis("http://fake-url")
         assert "Some summary" in result
 
 
 def test_fetch_episode_synopsis_network_error():
-    with patch("src.ingest.requests.get", side_effect=RequestException("fail")):
+    def handler(request):
+        raise httpx.ConnectError("fail")
+
+    with mock_fetcher(handler):
         assert fetch_episode_synopsis("http://fake-url") is None
 
 
 def test_fetch_episode_synopsis_no_synopsis():
     html = "<div><h2>Other</h2>No synopsis here.</div>"
-    mock_resp = Mock(status_code=200, text=html)
-    with patch("src.ingest.requests.get", return_value=mock_resp):
+    with mock_fetcher(lambda request: httpx.Response(200, text=html)):
         assert fetch_episode_synopsis("http://fake-url") is None
 
 
-@patch("src.ingest.requests.get")
-@patch("src.ingest.save_data")
-def test_fetch_metadata_from_myanimelist_success(mock_save_data, mock_get):
-    mock_response = Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "data": [
-            {"type": "TV", "title": "Show 1"},
-            {"type": "Movie", "title": "Movie 2"},
-        ]
-    }
-    mock_get.return_value = mock_response
+def test_fetch_episode_synopsis_when_not_found():
+    with mock_fetcher(lambda request: httpx.Response(404, text="Not Found")):
+        assert fetch_episode_synopsis("http://fake-url") is None
+
 
-    result = fetch_metadata_from_myanimelist("Kaguya Sama")
+@patch("src.ingest.save_data", return_value=0)
+def test_fetch_metadata_from_myanimelist_success(mock_save_data):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    {"type": "TV", "title": "Show 1"},
+                    {"type": "Movie", "title": "Movie 2"},
+                ]
+            },
+        )
+
+    with mock_fetcher(handler):
+        result = fetch_metadata_from_myanimelist("Kaguya Sama")
     assert isinstance(result, list)
     assert result[0]["title"] == "Show 1"
     assert result[1]["title"] == "Movie 2"
     assert mock_save_data.called
-    mock_get.assert_called_once_with(
-        "https://api.jikan.moe/v4/anime", params={"q": "Kaguya Sama", "limit": 20}
-    )
+    assert len(requests) == 1
+    assert requests[0].url.path == "/v4/anime"
+    assert dict(requests[0].url.params) == {
+        "q": "Kaguya Sama",
+        "limit": "25",
+        "page": "1",
+    }
+
+
+@patch("src.ingest.save_data", return_value=0)
+def test_fetch_metadata_from_myanimelist_follows_pagination(mock_save_data):
+    def handler(request):
+        page = int(request.url.params["page"])
+        return httpx.Response(
+            200,
+            json={
+                "data": [{"mal_id": page, "type": "TV"}],
+                "pagination": {"has_next_page": page < 3},
+            },
+        )
 
+    with mock_fetcher(handler):
+        result = fetch_metadata_from_myanimelist("Kaguya Sama")
+    assert [a["mal_id"] for a in result] == [1, 2, 3]
+    saved = [str(call.args[0]) for call in mock_save_data.call_args_list]
+    assert saved[-1].endswith("Kaguya-Sama_3.json.zst")
 
-@patch("src.ingest.requests.get")
-@patch("src.ingest.save_data")
-def test_fetch_metadata_from_myanimelist_http_error(mock_save_data, mock_get):
-    mock_response = Mock()
-    mock_response.raise_for_status.side_effect = RequestException("HTTP error")
-    mock_get.return_value = mock_response
-    with pytest.raises(RequestException):
+
+@patch("src.ingest.save_data", return_value=0)
+def test_fetch_metadata_from_myanimelist_http_error(mock_save_data):
+    with (
+        mock_fetcher(lambda request: httpx.Response(400)),
+        pytest.raises(httpx.HTTPStatusError),
+    ):
         fetch_metadata_from_myanimelist("bad query")
     assert mock_save_data.call_count == 0
 
 
-@patch("src.ingest.save_data")
-@patch("src.ingest.fetch_episodes")
-@patch("src.ingest.fetch_metadata_from_myanimelist")
+def test_fetch_episodes_follows_pagination_and_scrapes_synopses():
+    pages = {
+        "1": {
+            "data": [{"mal_id": 1, "url": "https://myanimelist.net/ep/1"}],
+            "pagination": {"has_next_page": True},
+        },
+        "2": {
+            "data": [{"mal_id": 2, "url": "https://myanimelist.net/ep/2"}],
+            "pagination": {"has_next_page": False},
+        },
+    }
+
+    def handler(request):
+        if request.url.host == "myanimelist.net":
+            ep = request.url.path.rsplit("/", 1)[-1]
+            return httpx.Response(200, text=f"<div><h2>Synopsis</h2>S{ep}</div>")
+        return httpx.Response(200, json=pages[request.url.params["page"]])
+
+    with mock_fetcher(handler):
+        episodes = fetch_episodes(123)
+    assert [ep["mal_id"] for ep in episodes] == [1, 2]
+    assert [ep["synopsis"] for ep in episodes] == ["S1", "S2"]
+
+
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
 def test_ingest_anime_metadata_happy_path(
     mock_fetch_metadata, mock_fetch_episodes, mock_save_data
 ):
@@ -133,10 +226,10 @@ def test_ingest_anime_metadata_happy_path(
         {"mal_id": 123, "type": "TV", "title": "Show 1"},
         {"mal_id": 456, "type": "Movie", "title": "Movie 2"},
     ]
-    mock_fetch_episodes.side_effect = lambda mal_id: [
-        {"episode": 1, "synopsis": "Ep1"},
-        {"episode": 2, "synopsis": "Ep2"},
-    ]
+    mock_fetch_episodes.side_effect = lambda fetcher, mal_id, **kwargs: (
+        [{"episode": 1, "synopsis": "Ep1"}, {"episode": 2, "synopsis": "Ep2"}],
+        [],
+    )
 
     result = ingest_anime_metadata("Kaguya Sama")
     assert result == [123, 456]
@@ -147,3 +240,311 @@ def test_ingest_anime_metadata_happy_path(
     called_files = [call.kwargs["file_path"] for call in mock_save_data.call_args_list]
     assert any("123.json" in str(f) for f in called_files)
     assert any("456.json" in str(f) for f in called_files)
+
+
+def test_cache_ttl_when_airing_is_shorter_than_finished():
+    finished = cache_ttl({"status": "Finished Airing", "airing": False})
+    airing = cache_ttl({"status": "Currently Airing", "airing": True})
+    unknown = cache_ttl({})
+    assert airing < unknown < finished
+
+
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+def test_acrawl_catalog_dedupes_before_fetching_episodes(
+    mock_fetch_episodes, mock_save_data
+):
+    def handler(request):
+        if request.url.path == "/v4/anime":
+            ids = {"Kaguya Sama": [1, 2], "Kaguya-sama Love is War": [2, 3]}
+            data = [{"mal_id": i, "type": "TV"} for i in ids[request.url.params["q"]]]
+        else:  # Season sweep
+            data = [{"mal_id": 3, "type": "TV"}, {"mal_id": 4, "type": "Music"}]
+        return httpx.Response(200, json={"data": data})
+
+    mock_fetch_episodes.return_value = ([], [])
+    with mock_fetcher(handler):
+        result = _run(
+            lambda fetcher: acrawl_catalog(
+                fetcher,
+                queries=["Kaguya Sama", "Kaguya-sama Love is War"],
+                seasons=[(2022, "spring")],
+            )
+        )
+    assert sorted(result) == [1, 2, 3]
+    fetched = sorted(call.args[1] for call in mock_fetch_episodes.call_args_list)
+    assert fetched == [1, 2, 3]
+
+
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_when_a_title_fails(
+    mock_fetch_metadata, mock_fetch_episodes, mock_save_data
+):
+    mock_fetch_metadata.return_value = [
+        {"mal_id": 1, "type": "TV"},
+        {"mal_id": 2, "type": "TV"},
+    ]
+
+    async def fetch(fetcher, mal_id, **kwargs):
+        if mal_id == 1:
+            raise httpx.ConnectError("down")
+        return [], []
+
+    mock_fetch_episodes.side_effect = fetch
+    assert ingest_anime_metadata("Kaguya Sama") == [2]
+    assert mock_save_data.call_count == 1
+
+
+def test_fetch_episodes_when_delta_only_fetches_new_and_missing():
+    known = [
+        {"mal_id": 1, "url": "https://myanimelist.net/ep/1", "synopsis": "Old S1"},
+        {"mal_id": 2, "url": "https://myanimelist.net/ep/2", "synopsis": None},
+    ]
+    page = {
+        "data": [
+            {"mal_id": 1, "url": "https://myanimelist.net/ep/1"},
+            {"mal_id": 2, "url": "https://myanimelist.net/ep/2"},
+            {"mal_id": 3, "url": "https://myanimelist.net/ep/3"},
+        ],
+        "pagination": {"has_next_page": False},
+    }
+    scraped = []
+
+    def handler(request):
+        if request.url.host == "myanimelist.net":
+            ep = request.url.path.rsplit("/", 1)[-1]
+            scraped.append(ep)
+            return httpx.Response(200, text=f"<div><h2>Synopsis</h2>S{ep}</div>")
+        return httpx.Response(200, json=page)
+
+    with mock_fetcher(handler):
+        episodes = _run(
+            lambda fetcher: afetch_episodes(fetcher, 123, known_episodes=known)
+        )
+    assert sorted(scraped) == ["2", "3"]
+    assert [ep["synopsis"] for ep in episodes] == ["Old S1", "S2", "S3"]
+
+
+def test_fetch_episodes_when_delta_skips_complete_pages():
+    known = [{"mal_id": i, "synopsis": f"S{i}"} for i in range(1, 151)]
+    pages = []
+
+    def handler(request):
+        pages.append(request.url.params["page"])
+        return httpx.Response(200, json={"data": [], "pagination": {}})
+
+    with mock_fetcher(handler):
+        episodes = _run(
+            lambda fetcher: afetch_episodes(fetcher, 123, known_episodes=known)
+        )
+    assert pages == ["2"]
+    assert len(episodes) == 150
+
+
+def test_fetch_episodes_when_delta_reads_again_from_the_first_gap():
+    known = [{"mal_id": i, "synopsis": f"S{i}"} for i in range(1, 251) if i != 120]
+    pages = []
+
+    def handler(request):
+        page = int(request.url.params["page"])
+        pages.append(page)
+        data = [{"mal_id": 120}] if page == 2 else []
+        return httpx.Response(
+            200, json={"data": data, "pagination": {"has_next_page": page < 3}}
+        )
+
+    with mock_fetcher(handler):
+        episodes, missing = _run(
+            lambda fetcher: afetch_episode_list(fetcher, 123, known_episodes=known)
+        )
+    assert pages == [2, 3]
+    assert len(episodes) == 250
+    assert [ep["mal_id"] for ep in missing] == [120]
+
+
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_when_delta_reads_previous_file(
+    mock_fetch_metadata, mock_fetch_episodes, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("src.ingest.META_DIR", tmp_path)
+    (tmp_path / "123.json").write_text(
+        json.dumps({"summary": {}, "episodes": [{"mal_id": 1, "synopsis": "S1"}]})
+    )
+    mock_fetch_metadata.return_value = [{"mal_id": 123, "type": "TV"}]
+    mock_fetch_episodes.return_value = ([{"mal_id": 1, "synopsis": "S1"}], [])
+
+    assert ingest_anime_metadata("Kaguya Sama", delta=True) == [123]
+    known = mock_fetch_episodes.call_args.kwargs["known_episodes"]
+    assert known == [{"mal_id": 1, "synopsis": "S1"}]
+
+
+@pytest.mark.parametrize("parse_processes", [0, 1])
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_pipeline_scrapes_and_parses(
+    mock_fetch_metadata, mock_save_data, parse_processes, monkeypatch
+):
+    monkeypatch.setattr("src.ingest.PARSE_PROCESSES", parse_processes)
+    monkeypatch.setattr("src.ingest.PIPELINE_QUEUE_SIZE", 1)
+    mock_fetch_metadata.return_value = [
+        {"mal_id": i, "type": "TV", "status": "Finished Airing"} for i in (10, 20)
+    ]
+
+    def handler(request):
+        if request.url.host == "myanimelist.net":
+            ep = request.url.path.rsplit("/", 1)[-1]
+            if ep == "404":
+                return httpx.Response(404)
+            return httpx.Response(200, text=f"<div><h2>Synopsis</h2>S{ep}</div>")
+        mal_id = int(request.url.path.split("/")[3])
+        eps = [1, 2, 3] if mal_id == 10 else [404]
+        data = [{"mal_id": e, "url": f"https://myanimelist.net/ep/{e}"} for e in eps]
+        return httpx.Response(200, json={"data": data})
+
+    with mock_fetcher(handler):
+        assert ingest_anime_metadata("Kaguya Sama") == [10, 20]
+    saved = {
+        call.kwargs["file_path"].name: call.kwargs["data"]["episodes"]
+        for call in mock_save_data.call_args_list
+    }
+    assert [ep["synopsis"] for ep in saved["10.json.zst"]] == ["S1", "S2", "S3"]
+    assert [ep["synopsis"] for ep in saved["20.json.zst"]] == [None]
+
+
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_episode_page", new_callable=AsyncMock)
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_pipeline_writes_titles_whose_pages_fail(
+    mock_fetch_metadata,
+    mock_fetch_episodes,
+    mock_fetch_page,
+    mock_save_data,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.setattr("src.ingest.PARSE_PROCESSES", 0)
+    mock_fetch_metadata.return_value = [{"mal_id": i, "type": "TV"} for i in (10, 20)]
+
+    async def episode_list(fetcher, mal_id, ttl, known_episodes):
+        if mal_id == 20:
+            raise httpx.ConnectError("down")
+        eps = [{"mal_id": e, "url": f"ep/{e}"} for e in (1, 2, 3)]
+        return eps, eps
+
+    async def page(fetcher, url, ttl):
+        if url == "ep/1":
+            raise RuntimeError("unexpected")
+        return "<div><h2>Synopsis</h2>S</div>" if url == "ep/2" else "bad"
+
+    def parse(html):
+        if html == "bad":
+            raise ValueError("unparsable")
+        return "S", 0.0
+
+    mock_fetch_episodes.side_effect = episode_list
+    mock_fetch_page.side_effect = page
+    monkeypatch.setattr("src.ingest._timed_extract_synopsis", parse)
+    metrics_file = tmp_path / "ingest.prom"
+    with mock_fetcher(lambda request: httpx.Response(404)):
+        done = _run(
+            lambda fetcher: acrawl_catalog(fetcher, ["Kaguya"], parse_processes=0),
+            metrics_file=metrics_file,
+        )
+
+    assert done == [10]
+    episodes = mock_save_data.call_args.kwargs["data"]["episodes"]
+    assert [ep["synopsis"] for ep in episodes] == [None, "S", None]
+    assert "ingest_titles_failed_total 1" in metrics_file.read_text()
+
+
+@patch("src.ingest.save_data", return_value=0)
+def test_ingest_anime_metadata_when_resumed_skips_completed_work(
+    mock_save_data, monkeypatch
+):
+    monkeypatch.setattr("src.ingest.PARSE_PROCESSES", 0)
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        if request.url.path == "/v4/anime":
+            data = [{"mal_id": i, "type": "TV"} for i in (10, 20)]
+            return httpx.Response(200, json={"data": data, "pagination": {}})
+        if request.url.host == "myanimelist.net":
+            return httpx.Response(200, text="<div><h2>Synopsis</h2>S</div>")
+        mal_id = request.url.path.split("/")[3]
+        data = [{"mal_id": 1, "url": f"https://myanimelist.net/{mal_id}/ep/1"}]
+        return httpx.Response(200, json={"data": data})
+
+    def crash_on_title_20(file_path, data):
+        if data.get("summary", {}).get("mal_id") == 20:
+            raise OSError("disk full")
+        return 0
+
+    mock_save_data.side_effect = crash_on_title_20
+    with mock_fetcher(handler):
+        assert ingest_anime_metadata("Kaguya Sama") == [10]
+    assert len(requests) == 5
+
+    requests.clear()
+    mock_save_data.side_effect = None
+    with mock_fetcher(handler):
+        assert ingest_anime_metadata("Kaguya Sama", resume=True) == [10, 20]
+    # The search page and the episode of title 20 come from the journal, its
+    # episode list from the HTTP cache, and title 10 is not ingested again.
+    assert requests == []
+    saved = mock_save_data.call_args.kwargs["data"]
+    assert saved["summary"]["mal_id"] == 20
+    assert saved["episodes"][0]["synopsis"] == "S"
+
+
+@patch("src.ingest.save_data", return_value=0)
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_when_not_resumed_starts_over(
+    mock_fetch_metadata, mock_fetch_episodes, mock_save_data
+):
+    mock_fetch_metadata.return_value = [{"mal_id": 10, "type": "TV"}]
+    mock_fetch_episodes.return_value = ([], [])
+
+    assert ingest_anime_metadata("Kaguya Sama") == [10]
+    assert ingest_anime_metadata("Kaguya Sama") == [10]
+    assert mock_save_data.call_count == 2
+
+
+@patch("src.ingest.afetch_episode_list", new_callable=AsyncMock)
+@patch("src.ingest.afetch_metadata_from_myanimelist", new_callable=AsyncMock)
+def test_ingest_anime_metadata_when_overlapping_queries_crawls_titles_once(
+    mock_fetch_metadata, mock_fetch_episodes, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("src.ingest.META_DIR", tmp_path)
+    finished = {"type": "TV", "status": "Finished Airing"}
+    mock_fetch_episodes.return_value = ([{"mal_id": 1, "synopsis": "S1"}], [])
+
+    mock_fetch_metadata.return_value = [{"mal_id": 10, **finished}]
+    assert ingest_anime_metadata("Kaguya Sama") == [10]
+    mock_fetch_metadata.return_value = [{"mal_id": i, **finished} for i in (10, 20)]
+    assert ingest_anime_metadata("Kaguya-sama Love is War") == [10, 20]
+
+    crawled = [call.args[1] for call in mock_fetch_episodes.call_args_list]
+    assert crawled == [10, 20]
+
+
+@patch("src.ingest.save_data", return_value=100)
+def test_fetch_metadata_from_myanimelist_writes_metrics_file(mock_save_data, tmp_path):
+    def handler(request):
+        return httpx.Response(200, json={"data": [], "pagination": {}})
+
+    metrics_file = tmp_path / "ingest.prom"
+    with mock_fetcher(handler):
+        _run(
+            lambda fetcher: afetch_metadata_from_myanimelist(fetcher, "Kaguya"),
+            metrics_file=metrics_file,
+        )
+    text = metrics_file.read_text()
+    assert 'http_responses_total{endpoint="search",status="200"} 1' in text
+    assert 'http_cache_total{endpoint="search",result="miss"} 1' in text
+    assert 'ingest_bytes_written_total{kind="raw"} 100' in text
@@ -0,0 +1,35 @@
+from src.db.journal import IngestJournal
+
+
+def test_journal_job_id_depends_on_parameters():
+    job = IngestJournal.job_id(queries=["a"], delta=False)
+    assert job == IngestJournal.job_id(delta=False, queries=["a"])
+    assert job != IngestJournal.job_id(queries=["a"], delta=True)
+
+
+def test_journal_records_pages_episodes_and_titles(tmp_path):
+    journal = IngestJournal(tmp_path / "journal.sqlite", job="job")
+    assert journal.page("query", 1) is None
+    journal.record_page("query", 1, [{"mal_id": 10}], has_next=True)
+    journal.record_episode(10, {"mal_id": 1, "synopsis": "S1"})
+    journal.close()
+
+    journal = IngestJournal(tmp_path / "journal.sqlite", job="job")
+    assert journal.page("query", 1) == ([{"mal_id": 10}], True)
+    assert journal.episodes(10) == {1: {"mal_id": 1, "synopsis": "S1"}}
+    journal.record_title(10)
+    assert journal.titles() == {10}
+    assert journal.episodes(10) == {}  # Saved titles no longer need their episodes
+
+
+def test_journal_reset_only_forgets_its_job(tmp_path):
+    path = tmp_path / "journal.sqlite"
+    first = IngestJournal(path, job="first")
+    second = IngestJournal(path, job="second")
+    first.record_title(1)
+    second.record_title(2)
+
+    first.reset()
+
+    assert first.titles() == set()
+    assert second.titles() == {2}
@@ -0,0 +1,49 @@
+import math
+
+from src.metrics import Histogram
+from src.metrics import Metrics
+
+
+def test_histogram_quantile_interpolates_inside_bucket():
+    h = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        h.observe(value)
+    assert h.count == 4
+    assert h.mean == 1.625
+    assert h.quantile(0.5) == 1.5
+    assert h.quantile(1.0) == 4.0
+    assert math.isnan(Histogram(buckets=(1.0,)).quantile(0.5))
+
+
+def test_histogram_quantile_when_above_last_bucket():
+    h = Histogram(buckets=(1.0,))
+    h.observe(30.0)
+    assert h.quantile(0.95) == 1.0
+
+
+def test_metrics_value_sums_matching_series():
+    metrics = Metrics()
+    metrics.inc("http_cache_total", endpoint="search", result="hit")
+    metrics.inc("http_cache_total", endpoint="episodes", result="hit")
+    metrics.inc("http_cache_total", endpoint="episodes", result="miss")
+    assert metrics.value("http_cache_total", result="hit") == 2
+    assert metrics.value("http_cache_total", endpoint="episodes") == 2
+    assert metrics.value("missing") == 0
+
+
+def test_metrics_to_prometheus():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc("http_retries_total", endpoint="search")
+    metrics.observe("http_request_seconds", 0.5, endpoint="search")
+    metrics.observe("http_request_seconds", 2.0, endpoint="search")
+
+    text = metrics.to_prometheus().splitlines()
+
+    assert "# TYPE http_retries_total counter" in text
+    assert 'http_retries_total{endpoint="search"} 1' in text
+    assert "# TYPE http_request_seconds histogram" in text
+    assert 'http_request_seconds_bucket{endpoint="search",le="0.1"} 0' in text
+    assert 'http_request_seconds_bucket{endpoint="search",le="1"} 1' in text
+    assert 'http_request_seconds_bucket{endpoint="search",le="+Inf"} 2' in text
+    assert 'http_request_seconds_sum{endpoint="search"} 2.5' in text
+    assert 'http_request_seconds_count{endpoint="search"} 2' in text
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+from llama_index.core import Document
+from llama_index.core import StorageContext
+from llama_index.core import VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import NodeRelationship
+from llama_index.core.schema import RelatedNodeInfo
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import FilterOperator
+from llama_index.core.vector_stores.types import MetadataFilter
+from llama_index.core.vector_stores.types import MetadataFilters
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from src.numpy_vector_store import NumpyVectorStore
+from src.retrieval import title_filters
+
+
+def make_vectors(n: int = 500, dim: int = 16) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(10, dim))
+    vectors = centers[rng.integers(0, 10, n)] + 0.3 * rng.normal(size=(n, dim))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_nodes(vectors: np.ndarray) -> list[TextNode]:
+    return [
+        TextNode(
+            id_=f"n{i}",
+            text=f"text {i}",
+            embedding=vector.tolist(),
+            metadata={"mal_id": i % 7},
+            relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=f"d{i}")},
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def search(store: NumpyVectorStore, vector: np.ndarray, k: int = 5, **kwargs):
+    query = VectorStoreQuery(query_embedding=vector.tolist(), similarity_top_k=k)
+    for key, value in kwargs.items():
+        setattr(query, key, value)
+    return store.query(query)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_numpy_store_persists_and_searches_exactly(tmp_path, dtype):
+    vectors = make_vectors()
+    store = NumpyVectorStore(dtype=dtype)
+    store.add(make_nodes(vectors))
+    store.persist(str(tmp_path))
+
+    loaded = NumpyVectorStore.from_persist_dir(tmp_path)
+    assert isinstance(loaded._vectors, np.memmap)
+    assert loaded._vectors.dtype == np.dtype(dtype)
+    query = vectors[3] + 0.1
+    result = search(loaded, query)
+    expected = np.argsort(-(vectors @ (query / np.linalg.norm(query))))[:5]
+    assert result.ids[0] == "n3"
+    assert len(set(result.ids) & {f"n{i}" for i in expected}) >= 4
+    assert result.similarities == sorted(result.similarities, reverse=True)
+    assert result.nodes[0].get_content() == "text 3"
+    assert result.nodes[0].metadata == {"mal_id": 3}
+
+
+def test_numpy_store_updates_after_loading(tmp_path):
+    vectors = make_vectors(50)
+    store = NumpyVectorStore()
+    store.add(make_nodes(vectors[:40]))
+    store.persist(str(tmp_path))
+    store = NumpyVectorStore.from_persist_dir(tmp_path)
+    store.add(make_nodes(vectors)[40:])
+    store.delete("d5")
+
+    assert search(store, vectors[45], k=1).ids == ["n45"]
+    assert "n5" not in search(store, vectors[5]).ids
+    filters = MetadataFilters(filters=[MetadataFilter(key="mal_id", value=3)])
+    assert set(search(store, vectors[0], k=50, filters=filters).ids) == {
+        f"n{i}" for i in range(3, 50, 7)
+    }
+    store.persist(str(tmp_path))
+    assert NumpyVectorStore.from_persist_dir(tmp_path).count == 49
+
+
+def test_numpy_store_looks_up_anime_filters_in_its_index(tmp_path):
+    vectors = make_vectors(60)
+    store = NumpyVectorStore(ivf_min_vectors=40)
+    store.add(make_nodes(vectors[:50]))
+    store.persist(str(tmp_path))
+    store = NumpyVectorStore.from_persist_dir(tmp_path)
+    store.add(make_nodes(vectors)[50:])
+    store.delete("d10")
+
+    assert store._anime_rows([3]).tolist() == sorted(
+        row for row, e in enumerate(store._entries) if e["metadata"]["mal_id"] == 3
+    )
+    filters = title_filters({3, 5})
+    assert set(search(store, vectors[0], k=60, filters=filters).ids) == {
+        f"n{i}" for i in range(60) if i % 7 in (3, 5) and i != 10
+    }
+    others = MetadataFilter(key="mal_id", value=[3, 5], operator=FilterOperator.NIN)
+    scanned = MetadataFilters(filters=[others])
+    assert len(search(store, vectors[0], k=60, filters=scanned).ids) == 59 - 16
+
+
+def test_numpy_store_keeps_the_previous_files_when_persist_fails(tmp_path, monkeypatch):
+    vectors = make_vectors(20)
+    store = NumpyVectorStore()
+    store.add(make_nodes(vectors[:10]))
+    store.persist(str(tmp_path / "store"))
+    store.add(make_nodes(vectors)[10:])
+
+    def fail(vectors, dtype):
+        raise KeyError("crash")
+
+    monkeypatch.setattr("src.numpy_vector_store.quantize", fail)
+    with pytest.raises(KeyError):
+        store.persist(str(tmp_path / "store"))
+    assert [p.name for p in tmp_path.iterdir()] == ["store"]
+    assert NumpyVectorStore.from_persist_dir(tmp_path / "store").count == 10
+
+
+def test_numpy_store_ivf_partitions_large_stores(tmp_path):
+    vectors = make_vectors(2000)
+    store = NumpyVectorStore(ivf_min_vectors=1000, ivf_probes=8)
+    store.add(make_nodes(vectors))
+    store.persist(str(tmp_path))
+
+    loaded = NumpyVectorStore.from_persist_dir(tmp_path, ivf_probes=8)
+    assert loaded._centroids is not None
+    assert len(loaded._centroids) == 44  # sqrt(2000)
+    assert loaded._offsets[-1] == 2000
+    hits = sum(search(loaded, vectors[i], k=1).ids == [f"n{i}"] for i in range(50))
+    assert hits >= 48
+
+
+def test_numpy_store_plugs_into_vector_store_index(tmp_path):
+    store = NumpyVectorStore()
+    index = VectorStoreIndex.from_documents(
+        [Document(text=f"Anime {i}", metadata={"mal_id": i}) for i in range(3)],
+        storage_context=StorageContext.from_defaults(vector_store=store),
+        embed_model=MockEmbedding(embed_dim=8),
+    )
+    store.persist(str(tmp_path))
+
+    loaded = VectorStoreIndex.from_vector_store(
+        NumpyVectorStore.from_persist_dir(tmp_path),
+        embed_model=MockEmbedding(embed_dim=8),
+    )
+    nodes = loaded.as_retriever(similarity_top_k=3).retrieve("anime")
+    assert sorted(n.node.metadata["mal_id"] for n in nodes) == [0, 1, 2]
+    assert index.vector_store is store
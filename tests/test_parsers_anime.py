@@ -1,4 +1,8 @@
+from src.parsers.anime import anime_record_hash
+from src.parsers.anime import anime_titles
+from src.parsers.anime import chunk_content_hash
 from src.parsers.anime import parse_anime
+from src.parsers.anime import parse_anime_record
 from src.parsers.anime import parse_episode
 
 
@@ -63,11 +67,55 @@ def test_parse_anime_chunking():
     assert len(chunks[0]["episodes"]) == 13
     assert len(chunks[1]["episodes"]) == 13
     assert len(chunks[2]["episodes"]) == 1
-    # Check metadata propagation
+    # Chunks reference the anime record instead of copying it
     assert chunks[0]["mal_id"] == 100
     assert chunks[0]["title"] == "Test Anime"
-    assert chunks[0]["score"] == 7.8
-    assert chunks[0]["studios"] == "Studio A"
-    assert chunks[0]["genres"] == "Comedy"
-    assert chunks[0]["aired_from"] == "2022-01-01"
-    assert chunks[0]["aired_to"] == "2022-03-01"
+    assert "score" not in chunks[0]
+    record = parse_anime_record(summary)
+    assert chunks[0]["anime_hash"] == anime_record_hash(record)
+    assert record["score"] == 7.8
+    assert record["studios"] == "Studio A"
+    assert record["genres"] == "Comedy"
+    assert record["aired_from"] == "2022-01-01"
+    assert record["aired_to"] == "2022-03-01"
+
+
+def test_parse_anime_chunk_ids_and_hashes():
+    summary = {"mal_id": 100, "url": "https://mal/anime/100", "title": "Test Anime"}
+    episodes = [
+        {"mal_id": i, "title": f"Ep{i}", "synopsis": f"S{i}", "url": f"u{i}"}
+        for i in range(1, 4)
+    ]
+    chunks = parse_anime({"summary": summary, "episodes": episodes}, 2)
+    assert [c["chunk_id"] for c in chunks] == ["100-0", "100-1"]
+    assert chunks[0]["content_hash"] == chunk_content_hash(chunks[0])
+
+    episodes[2]["synopsis"] = "Changed"
+    changed = parse_anime({"summary": summary, "episodes": episodes}, 2)
+    assert changed[0]["content_hash"] == chunks[0]["content_hash"]
+    assert changed[1]["content_hash"] != chunks[1]["content_hash"]
+
+
+def test_parse_anime_content_hash_sees_anime_changes():
+    summary = {"mal_id": 100, "url": "https://mal/anime/100", "title": "Test Anime"}
+    episodes = [{"mal_id": 1, "title": "Ep1", "synopsis": "S1", "url": "u1"}]
+    chunk = parse_anime({"summary": summary, "episodes": episodes})[0]
+    summary["synopsis"] = "New synopsis"
+    changed = parse_anime({"summary": summary, "episodes": episodes})[0]
+    assert changed["content_hash"] != chunk["content_hash"]
+
+
+def test_anime_titles_keeps_synonyms_apart():
+    summary = {
+        "title": "Kaguya-sama wa Kokurasetai",
+        "title_english": "Kaguya-sama: Love is War",
+        "title_japanese": "かぐや様は告らせたい",
+        "title_synonyms": ["Kaguya-sama wa Kokurasetai", " Love is War ", ""],
+    }
+    assert anime_titles(summary) == [
+        "Kaguya-sama wa Kokurasetai",
+        "Kaguya-sama: Love is War",
+        "かぐや様は告らせたい",
+        "Love is War",
+    ]
+    assert anime_titles({"title": "T", "title_english": None}) == ["T"]
@@ -0,0 +1,53 @@
+import pytest
+
+from src.parsers.synopsis import extract_synopsis
+from src.parsers.synopsis import extract_synopsis_bs4
+
+PAGES = [
+    "",
+    "<div><h2>Synopsis</h2>Some summary here.</div>",
+    "<div><h2>Other</h2>No synopsis here.</div>",
+    "<h2>Synopsis</h2>This synopsis is not inside a div.",
+    """
+    <html><head><script>var s = "<div><h2>Synopsis</h2>fake</div>";</script>
+    <style>div > h2 { color: red; }</style></head>
+    <body><div class="wrapper"><div id="menu">Menu</div>
+      <div class="js-scrollfix-bottom-rel">
+        <div class="fl-l">Score</div>
+        <h2>Synopsis</h2>
+        Kaguya &amp; Miyuki <b>plot</b> a confession.<br>
+        <!-- ad slot <div> -->
+        <div class="spoiler"><span>Nested</span> text</div>
+        (Source: Crunchyroll)
+      </div>
+      <div class="footer">Footer</div>
+    </div></body></html>
+    """,
+    "<DIV><H2 class='h2_overwrite'>Episode Synopsis</H2>Upper case</DIV>",
+    "<div><h2>Synopsis</h2>Never closed <p>paragraph",
+    "<div><h2>Background</h2>b</div><div><h2>Synopsis</h2>second h2</div>",
+    "<div><h2>Synopsis</h2></div>",
+    '<div data-x="a>b"><h2>Synopsis</h2>x</div>',
+    '<div><p>a <img src="x>y"> b</p><h2>Synopsis</h2></div>',
+    "<div><h2 title='a>b'>Synopsis</h2>x</div>",
+    '<div><script type="a>b">var a = "<div>";</script><h2>Synopsis</h2>x</div>',
+    "<div><h2>Episode <b>Synopsis</b></h2>x</div>",
+    "<div><h2><!-- c -->Synopsis</h2>x</div>",
+    "<div><h2> <b>Synopsis</b> </h2>x</div>",
+    "<div><h2><b>Synopsis</b></h2>x</div>",
+    "<div><h2><!--Synopsis--></h2>x</div>",
+    "<div><h2>\n Synopsis &amp; more\n</h2>x</div>",
+    "<div><h2>Other <b>Synopsis</b></h2>a</div><div><h2>Synopsis</h2>b</div>",
+]
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_extract_synopsis_when_matches_bs4(page):
+    assert extract_synopsis(page) == extract_synopsis_bs4(page)
+
+
+def test_extract_synopsis_ignores_markup_in_scripts_and_comments():
+    result = extract_synopsis(PAGES[4])
+    assert result == (
+        "Score Kaguya & Miyuki plot a confession. Nested text (Source: Crunchyroll)"
+    )
@@ -0,0 +1,64 @@
+import asyncio
+
+from src.pipeline import Pipeline
+from src.pipeline import Stage
+
+
+def test_pipeline_runs_items_through_every_stage():
+    results = []
+
+    async def main():
+        async def double(item):
+            await write.put(item * 2)
+
+        async def collect(item):
+            results.append(item)
+
+        double_stage = Stage("double", double, workers=2, maxsize=1)
+        write = Stage("write", collect, workers=1, maxsize=1)
+        async with Pipeline([double_stage, write]) as pipeline:
+            for i in range(10):
+                await double_stage.put(i)
+            await pipeline.join()
+        return pipeline
+
+    pipeline = asyncio.run(main())
+    assert sorted(results) == [i * 2 for i in range(10)]
+    assert [s.items for s in pipeline.stats] == [10, 10]
+
+
+def test_pipeline_bottleneck_when_stage_is_slow():
+    async def main():
+        async def forward(item):
+            await slow.put(item)
+
+        async def sleep(item):
+            await asyncio.sleep(0.01)
+
+        fast = Stage("fast", forward, workers=1, maxsize=1)
+        slow = Stage("slow", sleep, workers=1, maxsize=1)
+        async with Pipeline([fast, slow]) as pipeline:
+            for i in range(10):
+                await fast.put(i)
+            await pipeline.join()
+        return pipeline
+
+    pipeline = asyncio.run(main())
+    assert pipeline.bottleneck().name == "slow"
+
+
+def test_stage_counts_errors_and_keeps_running():
+    async def main():
+        async def fail_odd(item):
+            if item % 2:
+                raise ValueError(item)
+
+        stage = Stage("flaky", fail_odd, workers=1, maxsize=2)
+        async with Pipeline([stage]) as pipeline:
+            for i in range(4):
+                await stage.put(i)
+            await pipeline.join()
+        return stage.stats
+
+    stats = asyncio.run(main())
+    assert (stats.items, stats.errors) == (4, 2)
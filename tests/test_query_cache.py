@@ -0,0 +1,138 @@
+from unittest.mock import MagicMock
+
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import QueryBundle
+from llama_index.core.schema import TextNode
+
+from src.query_cache import AnswerCache
+from src.query_cache import LRUCache
+from src.query_cache import QueryCache
+from src.query_cache import normalize_query
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_query_collapses_whitespace_and_width():
+    full_width = "\uff2b\uff41\uff47\uff55\uff59\uff41"
+    query = f"  What  happens in\t{full_width}? "
+    assert normalize_query(query) == "What happens in Kaguya?"
+
+
+def test_lru_cache_evicts_least_recently_used_entries():
+    cache: LRUCache[str, int] = LRUCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (3, 1, 1)
+    assert cache.stats.hit_ratio == 0.75
+
+
+def test_lru_cache_entries_expire():
+    clock = Clock()
+    cache: LRUCache[str, int] = LRUCache(max_entries=2, ttl=60, clock=clock)
+    cache.put("a", 1)
+    clock.now = 59
+    assert cache.get("a") == 1
+    clock.now = 60
+
+    assert cache.get("a") is None
+    assert cache.size == 0
+
+
+def test_lru_cache_is_cleared_when_the_version_changes():
+    cache: LRUCache[str, int] = LRUCache(max_entries=2, ttl=60)
+    cache.put("a", 1, version="v1")
+    assert cache.get("a", version="v1") == 1
+
+    assert cache.get("a", version="v2") is None
+    cache.put("a", 2, version="v2")
+    assert cache.get("a", version="v2") == 2
+
+
+def test_query_cache_skips_the_model_and_the_retriever_on_repeats():
+    embed_model = MagicMock()
+    embed_model.get_query_embedding.return_value = [0.1, 0.2]
+    version = MagicMock(return_value="v1")
+    retrieve = MagicMock(
+        side_effect=lambda bundle: [
+            NodeWithScore(node=TextNode(id_="a", text=bundle.query_str), score=0.5)
+        ]
+    )
+    cache = QueryCache(embed_model, version)
+
+    first = cache.retrieve(QueryBundle("Who is  Anya?"), 5, {2}, retrieve)
+    first[0].node.metadata["title"] = "Spy x Family"  # Edited by postprocessors
+    again = cache.retrieve(QueryBundle("Who is Anya? "), 5, {2}, retrieve)
+
+    embed_model.get_query_embedding.assert_called_once_with("Who is Anya?")
+    retrieve.assert_called_once()
+    assert retrieve.call_args.args[0].embedding == [0.1, 0.2]
+    assert [(n.node.node_id, n.score) for n in again] == [("a", 0.5)]
+    assert again[0].node.metadata == {}
+
+    cache.retrieve(QueryBundle("Who is Anya?"), 10, {2}, retrieve)  # Other top k
+    assert retrieve.call_count == 2
+    version.return_value = "v2"  # Index rebuilt
+    cache.retrieve(QueryBundle("Who is Anya?"), 5, {2}, retrieve)
+    assert embed_model.get_query_embedding.call_count == 2
+    assert retrieve.call_count == 3
+    assert cache.embeddings.stats.hit_ratio == 0.5
+    assert cache.results.stats.hit_ratio == 0.25
+
+
+EMBEDDINGS = {
+    "What is Frieren about?": [1.0, 0.0, 0.0],
+    "what is Frieren about": [0.99, 0.1, 0.0],
+    "Who is Frieren?": [0.6, 0.8, 0.0],
+    "What is Spy x Family about?": [0.0, 0.0, 1.0],
+}
+
+
+def make_answer_cache(**kwargs) -> tuple[AnswerCache, MagicMock]:
+    scope = MagicMock(return_value="v1:index")
+    return AnswerCache(EMBEDDINGS.__getitem__, scope, **kwargs), scope
+
+
+def test_answer_cache_returns_answers_of_similar_questions():
+    cache, _ = make_answer_cache(threshold=0.95)
+    cache.store("What is Frieren about?", "An elf mage.", key=(1,))
+
+    assert cache.lookup("what is Frieren about", key=(1,)).answer == "An elf mage."
+    assert cache.lookup("Who is Frieren?", key=(1,)) is None
+    assert cache.lookup("What is Frieren about?", key=(2,)) is None  # Other anime
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_answer_cache_evicts_expired_and_least_recently_used_answers():
+    clock = Clock()
+    cache, _ = make_answer_cache(max_entries=2, ttl=60, clock=clock)
+    cache.store("What is Frieren about?", "An elf mage.")
+    cache.store("Who is Frieren?", "A mage.")
+    assert cache.lookup("What is Frieren about?") is not None
+    cache.store("What is Spy x Family about?", "A spy family.")
+
+    assert cache.lookup("Who is Frieren?") is None
+    assert cache.lookup("What is Frieren about?").answer == "An elf mage."
+    clock.now = 60
+    assert cache.lookup("What is Spy x Family about?") is None
+    assert cache.size == 0
+
+
+def test_answer_cache_is_cleared_when_the_scope_changes():
+    cache, scope = make_answer_cache()
+    cache.store("What is Frieren about?", "An elf mage.")
+    scope.return_value = "v2:index"  # New prompt version
+
+    assert cache.lookup("What is Frieren about?") is None
+    cache.store("What is Frieren about?", "A fantasy anime.")
+    assert cache.lookup("What is Frieren about?").answer == "A fantasy anime."
@@ -1,21 +1,39 @@
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+from llama_index.core.chat_engine.types import BaseChatEngine
+
+from src.query_engine import AnimeChatEngine
+from src.query_engine import chat
 from src.query_engine import init_model
+from src.retrieval import HybridRetriever
 
 
+@patch("src.query_engine.RETRIEVAL_MODE", "hybrid")
 @patch("src.query_engine.logger")
+@patch("src.query_engine.get_query_cache")
+@patch("src.query_engine.get_title_index")
+@patch("src.query_engine.load_bm25_index")
+@patch("src.query_engine.AnimeChatEngine")
 @patch("src.query_engine.build_and_persist_vector_index")
-@patch("src.query_engine.Groq")
+@patch("llama_index.llms.groq.Groq")
 @patch("src.query_engine.Memory")
-@patch("src.query_engine.settings")
+@patch("src.query_engine.get_settings")
 def test_init_model_creates_chat_engine(
-    mock_settings, mock_memory, mock_groq, mock_build_index, mock_logger
+    mock_settings,
+    mock_memory,
+    mock_groq,
+    mock_build_index,
+    mock_chat_engine_class,
+    mock_load_bm25,
+    mock_title_index,
+    mock_query_cache,
+    mock_logger,
 ):
     # Arrange
     mock_index = MagicMock()
     mock_chat_engine = MagicMock()
-    mock_index.as_chat_engine.return_value = mock_chat_engine
+    mock_chat_engine_class.from_defaults.return_value = mock_chat_engine
     mock_build_index.return_value = mock_index
 
     mock_llm = MagicMock()
@@ -24,15 +42,66 @@ def test_init_model_creates_chat_engine(
     mock_memory = MagicMock()
     mock_memory.return_value = mock_memory
 
-    mock_settings.GROQ_API = "fake-api-key"
+    mock_settings.return_value.GROQ_API = "fake-api-key"
 
     # Act
-    result = init_model()
+    pool = init_model()
+    with pool.session("a") as result, pool.session("b") as other:
+        pass
 
     # Assert
     mock_logger.info.assert_any_call("Start Model Init")
     mock_build_index.assert_called_once()
     mock_groq.assert_called_once()
-    mock_index.as_chat_engine.assert_called_once()
+    assert mock_chat_engine_class.from_defaults.call_count == 2  # One per session
+    retriever = mock_chat_engine_class.from_defaults.call_args.kwargs["retriever"]
+    assert isinstance(retriever, HybridRetriever)
+    assert retriever._cache is mock_query_cache.return_value
+    mock_load_bm25.assert_called_once_with(mock_index.vector_store)
     mock_logger.info.assert_any_call("Model loaded!")
-    assert result == mock_chat_engine
+    assert result == other == mock_chat_engine
+
+
+@patch("src.query_engine.ANSWER_CACHE", True)
+@patch("src.query_engine.get_query_cache")
+@patch("src.query_engine.get_answer_cache")
+@patch("src.query_engine.get_title_index")
+def test_chat_answers_first_questions_from_the_answer_cache(
+    mock_title_index, mock_answer_cache, mock_query_cache
+):
+    mock_title_index.return_value.match.return_value = {52991}
+    answers = mock_answer_cache.return_value
+    answers.lookup.return_value = None
+    chat_engine = MagicMock(spec=AnimeChatEngine)
+    chat_engine.chat.return_value.response = "An elf mage."
+
+    assert chat(chat_engine, "What happens in episode 2 of Frieren?", True) == (
+        "An elf mage."
+    )
+    answers.store.assert_called_once_with(
+        "What happens in episode 2 of Frieren?", "An elf mage.", ((52991,), ("2",))
+    )
+
+    answers.lookup.return_value = MagicMock(answer="Cached answer")
+    assert chat(chat_engine, "Episode 2 of Frieren?", True) == "Cached answer"
+    chat_engine.chat.assert_called_once()
+    assert chat_engine.memory.put.call_count == 2  # Follow-ups keep the context
+
+    assert chat(chat_engine, "And episode 3?", False) == "An elf mage."
+    assert answers.lookup.call_count == 2  # Follow-ups are not cached
+
+
+@patch("src.query_engine.ANSWER_CACHE", True)
+@patch("src.query_engine.get_query_cache")
+@patch("src.query_engine.get_answer_cache")
+@patch("src.query_engine.get_title_index")
+def test_chat_skips_the_answer_cache_without_chat_memory(
+    mock_title_index, mock_answer_cache, mock_query_cache
+):
+    mock_title_index.return_value.match.return_value = set()
+    mock_answer_cache.return_value.lookup.return_value = MagicMock(answer="Cached")
+    chat_engine = MagicMock(spec=BaseChatEngine)
+    chat_engine.chat.return_value.response = "An elf mage."
+
+    assert chat(chat_engine, "What is Frieren about?", True) == "An elf mage."
+    mock_answer_cache.return_value.lookup.assert_not_called()
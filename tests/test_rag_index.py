@@ -1,11 +1,37 @@
 import json
 import types
+from functools import partial
 
+import chromadb
+import pytest
 from llama_index.core import Document
+from llama_index.core import StorageContext
+from llama_index.core import VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.vector_stores.chroma import ChromaVectorStore
 
+from src.db.catalog import AnimeCatalog
+from src.index_manifest import IndexManifest
+from src.rag_index import INDEX_MODES
+from src.rag_index import ChromaEmbeddingWrapper
+from src.rag_index import build_and_persist_vector_index
 from src.rag_index import build_documents
+from src.rag_index import embedding_cache_key
+from src.rag_index import get_catalog
+from src.rag_index import get_embed_model
+from src.rag_index import get_embedding_cache
+from src.rag_index import index_documents
+from src.rag_index import index_version
+from src.rag_index import iter_chunks
+from src.rag_index import iter_documents
+from src.rag_index import iter_index_documents
+from src.rag_index import load_bm25_index
+from src.rag_index import load_embedding_backend
 from src.rag_index import load_index
 from src.rag_index import load_metadata_files
+from src.rag_index import open_collection
+from src.rag_index import plan_index_sync
+from src.storage import write_json
 
 
 def make_chunk(mal_id: int = 123) -> dict:
@@ -45,6 +71,123 @@ def test_build_documents_when_two_chunks():
     assert "Test Anime" in docs[1].text
 
 
+def test_build_documents_joins_the_catalog_record(tmp_path):
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    catalog.put(
+        {"mal_id": 123, "url": "u", "title": "Test Anime", "synopsis": "From catalog"}
+    )
+    chunk = {"mal_id": 123, "title": "Test Anime", "episodes": [], "chunk_id": "123-0"}
+    doc = build_documents([chunk], catalog)[0]
+    assert "Synopsis: From catalog" in doc.text
+    assert set(doc.metadata) == {"mal_id", "title", "chunk_id"}
+    # Chunks written before the catalog carry their anime fields
+    legacy = {**make_chunk(456), "genres": "Comedy"}
+    doc = build_documents([legacy], catalog)[0]
+    assert "A test anime synopsis." in doc.text
+    assert "genres" not in doc.metadata
+    catalog.close()
+
+
+def test_build_documents_uses_chunk_id_and_hides_bookkeeping_keys():
+    chunk = {**make_chunk(), "chunk_id": "123-0", "content_hash": "abc"}
+    doc = build_documents([chunk])[0]
+    assert doc.id_ == "123-0"
+    assert doc.metadata["content_hash"] == "abc"
+    assert "abc" not in doc.get_content(metadata_mode="embed")
+
+
+def test_hierarchical_documents_link_episodes_to_one_parent():
+    chunks = [
+        {**make_chunk(), "chunk_id": "123-0", "content_hash": "h0", "score": 8.1},
+        {**make_chunk(), "chunk_id": "123-1", "content_hash": "h1"},
+    ]
+    docs = list(iter_index_documents(chunks, index_mode="hierarchical"))
+    assert [d.id_ for d in docs] == [
+        "123-anime",
+        "123-ep1",
+        "123-ep2",
+        "123-ep1",  # make_chunk numbers the episodes of both chunks from 1
+        "123-ep2",
+    ]
+    parent, episode = docs[0], docs[1]
+    assert "A test anime synopsis." in parent.text
+    assert parent.metadata["score"] == 8.1
+    assert "Ep1" not in parent.text
+    assert "First ep." in episode.text
+    assert "Second ep." not in episode.text
+    assert "synopsis" not in episode.text.lower()
+    assert episode.metadata["parent_id"] == "123-anime"
+    assert docs[3].metadata["chunk_id"] == "123-1"
+    assert "parent_id" not in episode.get_content(metadata_mode="llm")
+    with pytest.raises(ValueError, match="Unknown index mode"):
+        iter_index_documents(chunks, index_mode="tree")
+
+
+def test_plan_index_sync_counts_changes():
+    chunks = [
+        {**make_chunk(1), "chunk_id": "1-0", "content_hash": "same"},
+        {**make_chunk(2), "chunk_id": "2-0", "content_hash": "new-hash"},
+        {**make_chunk(3), "chunk_id": "3-0", "content_hash": "h3"},
+    ]
+    indexed = {
+        "1-0": ["same", "same"],  # One chunk split into two nodes
+        "2-0": ["old-hash"],
+        "4-0": ["h4"],
+        "legacy-uuid": [None],
+    }
+    to_embed, to_delete, stats = plan_index_sync(indexed, chunks)
+    assert [c["chunk_id"] for c in to_embed] == ["2-0", "3-0"]
+    assert sorted(to_delete) == ["2-0", "4-0", "legacy-uuid"]
+    assert (stats.added, stats.updated, stats.deleted, stats.unchanged) == (1, 1, 2, 1)
+
+
+def test_embedding_backends_do_not_share_cached_vectors():
+    assert embedding_cache_key("torch") == "BAAI/bge-small-en-v1.5"
+    assert embedding_cache_key("onnx-int8") == "BAAI/bge-small-en-v1.5:onnx-int8"
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        load_embedding_backend("tensorflow")
+
+
+def test_onnx_backend_runs_on_the_threads_given(monkeypatch):
+    loaded = []
+
+    def onnx_embedding(model_name, **kwargs):
+        loaded.append(kwargs)
+        return MockEmbedding(embed_dim=4, model_name=model_name)
+
+    monkeypatch.setattr("src.onnx_embedding.OnnxEmbedding", onnx_embedding)
+    load_embedding_backend("onnx-int8", threads=3)
+    load_embedding_backend("onnx")
+
+    assert loaded == [
+        {"quantized": True, "threads": 3},
+        {"quantized": False, "threads": 0},
+    ]
+
+
+def test_embed_model_is_loaded_once_on_first_use(monkeypatch, tmp_path):
+    loaded = []
+
+    def load(backend):
+        loaded.append(backend)
+        return MockEmbedding(embed_dim=4, model_name="BAAI/bge-small-en-v1.5")
+
+    monkeypatch.setattr("src.rag_index.load_embedding_backend", load)
+    monkeypatch.setattr("src.rag_index.EMBEDDING_CACHE_PATH", tmp_path / "e.sqlite")
+    get_embed_model.cache_clear()
+    get_embedding_cache.cache_clear()
+    try:
+        chroma_function = ChromaEmbeddingWrapper()
+        assert chroma_function.name() == "BAAI/bge-small-en-v1.5"
+        assert loaded == []
+        assert len(chroma_function(["a", "b"])) == 2
+        assert chroma_function.model is get_embed_model()
+        assert loaded == ["torch"]
+    finally:
+        get_embed_model.cache_clear()
+        get_embedding_cache.cache_clear()
+
+
 def test_load_metadata_files(tmp_path):
     # Create two mock metadata files
     anime1 = {"id": 1, "title": "Anime1"}
@@ -80,6 +223,7 @@ def test_load_index_logs(monkeypatch, caplog):
         "src.rag_index.VectorStoreIndex.from_vector_store",
         lambda vector_store, embed_model: "dummy_index",
     )
+    monkeypatch.setattr("src.rag_index.get_embed_model", object)
 
     # Patch logger.info to capture log messages
     logs = []
@@ -87,3 +231,159 @@ def test_load_index_logs(monkeypatch, caplog):
 
     load_index(dummy_collection)
     assert any("Vector index loaded successfully." in str(msg) for msg in logs)
+
+
+def test_open_collection_resets_on_configuration_drift(monkeypatch, tmp_path):
+    monkeypatch.setattr("src.rag_index.INDEX_MANIFEST_PATH", tmp_path / "m.json")
+    client = chromadb.EphemeralClient()
+    client.get_or_create_collection(
+        "anime", embedding_function=ChromaEmbeddingWrapper()
+    ).add(ids=["1-0"], embeddings=[[0.1]])
+    monkeypatch.setattr(
+        "src.rag_index.get_embed_model", lambda: MockEmbedding(embed_dim=4)
+    )
+    manifest = types.SimpleNamespace(drift=lambda embed_dim: ["chunk_size: 20 -> 13"])
+
+    with pytest.raises(RuntimeError, match="chunk_size"):
+        open_collection(client, manifest, reset=False, rebuild_on_drift=False)
+    collection, reset = open_collection(client, None, False, rebuild_on_drift=False)
+    assert (collection.count(), reset) == (1, False)
+
+    collection, reset = open_collection(client, manifest, False, rebuild_on_drift=True)
+    assert (collection.count(), reset) == (0, True)
+    client.delete_collection("anime")
+
+
+def test_iter_chunks_streams_metadata_files(monkeypatch, tmp_path):
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    monkeypatch.setattr("src.rag_index.META_DIR", tmp_path / "metadata")
+    monkeypatch.setattr("src.rag_index.CHUNKS_PATH", tmp_path / "chunks.jsonl.zst")
+    for mal_id in (1, 2):
+        anime = {
+            "summary": {"mal_id": mal_id, "title": f"T{mal_id}", "url": "u"},
+            "episodes": [{"mal_id": 1, "title": "Ep1", "url": "u"}],
+        }
+        write_json(tmp_path / "metadata" / f"{mal_id}.json.zst", anime)
+
+    stream = iter_chunks(force_recreate=True, catalog=catalog)
+    assert next(stream)["chunk_id"] == "1-0"
+    assert not (tmp_path / "chunks.jsonl.zst").exists()  # Written once consumed
+    assert catalog.get(1)["title"] == "T1"
+    assert [c["chunk_id"] for c in stream] == ["2-0"]
+    assert set(catalog.get_many([1, 2])) == {1, 2}
+    assert [c["chunk_id"] for c in iter_chunks(False)] == ["1-0", "2-0"]
+
+    (tmp_path / "metadata" / "2.json.zst").unlink()  # Removed from META_DIR
+    assert [c["chunk_id"] for c in iter_chunks(True, catalog)] == ["1-0"]
+    assert set(catalog.get_many([1, 2])) == {1}
+    assert {mal_id for _, mal_id in catalog.iter_aliases()} == {1}
+
+
+@pytest.mark.parametrize("index_mode", INDEX_MODES)
+def test_build_and_persist_vector_index_joins_the_catalog(
+    monkeypatch, tmp_path, index_mode
+):
+    for name, path in {
+        "META_DIR": "metadata",
+        "CHUNKS_PATH": "chunks.jsonl.zst",
+        "CHUNKS_JSON": "chunks.json",
+        "CHROMA_DIR": "chroma",
+        "INDEX_MANIFEST_PATH": "chroma_manifest.json",
+        "CATALOG_PATH": "catalog.sqlite",
+        "EMBEDDING_CACHE_PATH": "embedding_cache.sqlite",
+    }.items():
+        monkeypatch.setattr(f"src.rag_index.{name}", tmp_path / path)
+    monkeypatch.setattr("src.rag_index.VECTOR_STORE", "chroma")
+    monkeypatch.setattr("src.rag_index.INDEX_MODE", index_mode)
+    monkeypatch.setattr(
+        "src.rag_index.iter_index_documents",
+        partial(iter_index_documents, index_mode=index_mode),
+    )
+    monkeypatch.setattr(
+        "src.rag_index.load_embedding_backend",
+        lambda backend: MockEmbedding(embed_dim=4, model_name="BAAI/bge-small-en-v1.5"),
+    )
+    anime = {
+        "summary": {
+            "mal_id": 1,
+            "title": "Frieren",
+            "url": "u",
+            "synopsis": "An elf mage outlives her party.",
+            "genres": [{"name": "Fantasy"}],
+        },
+        "episodes": [{"mal_id": 1, "title": "The Journey's End", "url": "u"}],
+    }
+    write_json(tmp_path / "metadata" / "1.json.zst", anime)
+    for getter in (get_catalog, get_embed_model, get_embedding_cache):
+        getter.cache_clear()
+    try:
+        build_and_persist_vector_index(force_recreate=True, embed_processes=0)
+        client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+        stored = client.get_collection("anime").get()
+    finally:
+        for getter in (get_catalog, get_embed_model, get_embedding_cache):
+            getter.cache_clear()
+
+    documents = {
+        metadata["document_id"]: (text, metadata)
+        for text, metadata in zip(stored["documents"], stored["metadatas"], strict=True)
+    }
+    text, metadata = documents["1-0" if index_mode == "chunk" else "1-anime"]
+    assert "Synopsis: An elf mage outlives her party." in text
+    if index_mode == "hierarchical":
+        assert (metadata["url"], metadata["genres"]) == ("u", "Fantasy")
+
+
+def test_index_documents_inserts_in_batches():
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("stream-test")
+    storage_context = StorageContext.from_defaults(
+        vector_store=ChromaVectorStore(chroma_collection=collection)
+    )
+    index = VectorStoreIndex(
+        [], storage_context=storage_context, embed_model=MockEmbedding(embed_dim=4)
+    )
+    chunks = ({**make_chunk(i), "chunk_id": f"{i}-0"} for i in range(5))
+
+    assert index_documents(index, iter_documents(chunks), batch_size=2) == 5
+    assert collection.count() == 5
+    assert index.docstore.get_document_hash("4-0") is not None
+    client.delete_collection("stream-test")
+
+
+def test_load_bm25_index_rebuilds_when_the_vector_index_changes(monkeypatch, tmp_path):
+    monkeypatch.setattr("src.rag_index.INDEX_MANIFEST_PATH", tmp_path / "m.json")
+    monkeypatch.setattr("src.rag_index.BM25_INDEX_PATH", tmp_path / "bm25.npz")
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("bm25-test")
+    collection.add(ids=["a"], documents=["Frieren"], embeddings=[[0.1]])
+    vector_store = ChromaVectorStore(chroma_collection=collection)
+
+    def save_manifest(built_at: float) -> None:
+        IndexManifest("m", "torch", 1, 13, 1, "hash", built_at=built_at).save(
+            tmp_path / "m.json"
+        )
+
+    save_manifest(1.0)
+    assert load_bm25_index(vector_store).node_ids == ["a"]
+    collection.add(ids=["b"], documents=["Frieren again"], embeddings=[[0.2]])
+    assert len(load_bm25_index(vector_store).node_ids) == 1  # Loaded from disk
+
+    save_manifest(2.0)  # Rebuilt or updated vector index
+    bm25 = load_bm25_index(vector_store)
+    assert [node_id for node_id, _ in bm25.search("frieren", 5)] == ["a", "b"]
+    client.delete_collection("bm25-test")
+
+
+def test_index_version_changes_with_the_manifest(monkeypatch, tmp_path):
+    monkeypatch.setattr("src.rag_index.INDEX_MANIFEST_PATH", tmp_path / "m.json")
+    assert index_version("chroma") == ""
+
+    IndexManifest("m", "torch", 1, 13, 1, "hash", built_at=1.0).save(
+        tmp_path / "m.json"
+    )
+    assert index_version("chroma") == "chroma:hash:1.0"
+    IndexManifest("m", "torch", 1, 13, 1, "hash", built_at=2.0).save(
+        tmp_path / "m.json"
+    )
+    assert index_version("chroma") == "chroma:hash:2.0"
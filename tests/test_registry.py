@@ -0,0 +1,47 @@
+import pytest
+
+from src.db.registry import RegistryEntry
+from src.db.registry import StalenessPolicy
+from src.db.registry import TitleRegistry
+
+POLICY = StalenessPolicy(airing_max_age=10, finished_max_age=100, default_max_age=50)
+FINISHED = {"mal_id": 1, "status": "Finished Airing"}
+AIRING = {"mal_id": 2, "status": "Currently Airing", "airing": True}
+
+
+@pytest.mark.parametrize(
+    ("anime", "age", "stale"),
+    [
+        (FINISHED, 50, False),
+        (FINISHED, 100, True),
+        (AIRING, 5, False),
+        (AIRING, 20, True),
+    ],
+)
+def test_staleness_policy_depends_on_status(anime, age, stale):
+    entry = RegistryEntry(anime["mal_id"], 1000.0, 12, anime["status"])
+    assert POLICY.is_stale(entry, anime, now=1000.0 + age) is stale
+
+
+def test_staleness_policy_when_status_changed():
+    entry = RegistryEntry(1, 1000.0, 12, "Currently Airing")
+    assert POLICY.is_stale(entry, FINISHED, now=1000.0)
+
+
+def test_staleness_policy_uniform_zero_is_always_stale():
+    entry = RegistryEntry(1, 1000.0, 12, "Finished Airing")
+    assert StalenessPolicy.uniform(0).is_stale(entry, FINISHED, now=1000.0)
+
+
+def test_registry_records_and_reports_fresh_titles(tmp_path):
+    registry = TitleRegistry(tmp_path / "registry.sqlite")
+    assert registry.fresh([FINISHED, AIRING], POLICY) == set()
+
+    registry.record(1, episodes=12, status="Finished Airing")
+    registry.record(2, episodes=3, status="Finished Airing")
+    registry.close()
+
+    registry = TitleRegistry(tmp_path / "registry.sqlite")
+    assert registry.get([1, 3])[1].episodes == 12
+    assert 3 not in registry.get([1, 3])
+    assert registry.fresh([FINISHED, AIRING], POLICY) == {1}
@@ -0,0 +1,171 @@
+import chromadb
+from llama_index.core import Document
+from llama_index.core import StorageContext
+from llama_index.core import VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import NodeWithScore
+from llama_index.core.schema import TextNode
+from llama_index.vector_stores.chroma import ChromaVectorStore
+
+from src.bm25 import BM25Index
+from src.db.catalog import AnimeCatalog
+from src.rag_index import iter_hierarchical_documents
+from src.rag_index import iter_indexed_nodes
+from src.retrieval import CatalogJoin
+from src.retrieval import HybridRetriever
+from src.retrieval import ParentNodeExpansion
+from src.retrieval import TitleFilteredRetriever
+from src.retrieval import reciprocal_rank_fusion
+from src.title_index import TitleIndex
+
+
+def make_chunk(mal_id: int) -> dict:
+    return {
+        "mal_id": mal_id,
+        "title": f"Anime {mal_id}",
+        "synopsis": f"Synopsis {mal_id}.",
+        "episodes": [
+            {"episode_id": 1, "title": "Ep1", "synopsis": "First ep."},
+            {"episode_id": 2, "title": "Ep2", "synopsis": "Second ep."},
+        ],
+        "chunk_id": f"{mal_id}-0",
+    }
+
+
+def test_parent_node_expansion_adds_each_anime_once():
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("hierarchy-test")
+    vector_store = ChromaVectorStore(chroma_collection=collection)
+    index = VectorStoreIndex.from_documents(
+        list(iter_hierarchical_documents([make_chunk(1), make_chunk(2)])),
+        storage_context=StorageContext.from_defaults(vector_store=vector_store),
+        embed_model=MockEmbedding(embed_dim=4),
+    )
+    episodes = {
+        n.node.ref_doc_id: n.node
+        for n in index.as_retriever(similarity_top_k=10).retrieve("episode")
+        if n.node.metadata["node_type"] == "episode"
+    }
+    retrieved = [
+        NodeWithScore(node=episodes["2-ep2"], score=0.9),
+        NodeWithScore(node=episodes["1-ep1"], score=0.8),
+        NodeWithScore(node=episodes["2-ep1"], score=0.7),
+        NodeWithScore(node=TextNode(id_="other", text="No parent"), score=0.6),
+    ]
+
+    expanded = ParentNodeExpansion(vector_store=index.vector_store).postprocess_nodes(
+        retrieved
+    )
+
+    assert [(n.node.ref_doc_id or n.node_id, n.score) for n in expanded] == [
+        ("2-anime", 0.9),
+        ("2-ep2", 0.9),
+        ("2-ep1", 0.7),
+        ("1-anime", 0.8),
+        ("1-ep1", 0.8),
+        ("other", 0.6),
+    ]
+    assert "Synopsis 2." in expanded[0].node.get_content()
+    client.delete_collection("hierarchy-test")
+
+
+def test_catalog_join_adds_anime_fields_to_nodes(tmp_path):
+    catalog = AnimeCatalog(tmp_path / "catalog.sqlite")
+    catalog.put(
+        {
+            "mal_id": 1,
+            "url": "u",
+            "title": "Catalog title",
+            "synopsis": "Long synopsis",
+            "genres": "Comedy",
+            "score": None,
+        }
+    )
+    chunk = TextNode(text="Episodes", metadata={"mal_id": 1, "title": "Chunk title"})
+    other = TextNode(text="Unknown anime", metadata={"mal_id": 2})
+    episode = TextNode(text="Ep1", metadata={"mal_id": 1, "node_type": "episode"})
+    nodes = [
+        NodeWithScore(node=chunk, score=0.9),
+        NodeWithScore(node=other),
+        NodeWithScore(node=episode),
+    ]
+
+    CatalogJoin(catalog=catalog).postprocess_nodes(nodes)
+
+    assert chunk.metadata == {
+        "mal_id": 1,
+        "title": "Chunk title",
+        "url": "u",
+        "genres": "Comedy",
+    }
+    assert other.metadata == {"mal_id": 2}
+    assert episode.metadata == {"mal_id": 1, "node_type": "episode"}
+    catalog.close()
+
+
+def test_reciprocal_rank_fusion_sums_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+
+    assert [node_id for node_id, _ in fused] == ["c", "a", "b", "d"]
+    assert fused[0][1] == 1 / 63 + 1 / 61
+
+
+def test_hybrid_retriever_fetches_bm25_only_nodes():
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("hybrid-test")
+    vector_store = ChromaVectorStore(chroma_collection=collection)
+    titles = ["Spy x Family", "Frieren", "Kaguya-sama", "Mob Psycho 100"]
+    # Frieren is the farthest from the query embedding, all ones
+    nodes = [
+        TextNode(
+            text=f"Anime: {t}",
+            metadata={"mal_id": i},
+            embedding=[-1.0] * 4 if t == "Frieren" else [1.0, 1.0, 1.0, i],
+        )
+        for i, t in enumerate(titles)
+    ]
+    index = VectorStoreIndex(
+        nodes,
+        storage_context=StorageContext.from_defaults(vector_store=vector_store),
+        embed_model=MockEmbedding(embed_dim=4),
+    )
+    bm25 = BM25Index.build(iter_indexed_nodes(vector_store))
+    # A single dense candidate: the BM25 match must come from the vector store
+    retriever = HybridRetriever(index, bm25, similarity_top_k=2, candidates=1)
+
+    nodes = retriever.retrieve("Tell me about Frieren")
+
+    assert len(nodes) == 2
+    frieren = next(n for n in nodes if n.node.metadata["mal_id"] == 1)
+    assert frieren.node.get_content() == "Anime: Frieren"
+    assert frieren.score == 1 / 61  # First BM25 result only
+    client.delete_collection("hybrid-test")
+
+
+def test_title_filters_restrict_retrieval_to_the_named_anime():
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection("title-filter-test")
+    vector_store = ChromaVectorStore(chroma_collection=collection)
+    docs = [
+        Document(text=f"Anime {i} episode {e}", metadata={"mal_id": i})
+        for i in range(5)
+        for e in range(3)
+    ]
+    index = VectorStoreIndex.from_documents(
+        docs,
+        storage_context=StorageContext.from_defaults(vector_store=vector_store),
+        embed_model=MockEmbedding(embed_dim=4),
+    )
+    titles = TitleIndex.from_aliases([("Spy x Family", 2), ("Frieren", 9)])
+    bm25 = BM25Index.build(iter_indexed_nodes(vector_store))
+
+    for retriever in (
+        TitleFilteredRetriever(index, titles, similarity_top_k=5),
+        HybridRetriever(index, bm25, titles, similarity_top_k=5),
+    ):
+        named = retriever.retrieve("What happens in Spy x Family?")
+        assert [n.node.metadata["mal_id"] for n in named] == [2, 2, 2]
+        # Anime without nodes, or no anime named: the whole index is searched
+        assert len(retriever.retrieve("Is Frieren good?")) == 5
+        assert len(retriever.retrieve("Which anime?")) == 5
+    client.delete_collection("title-filter-test")
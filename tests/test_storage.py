@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from src.storage import JsonlWriter
+from src.storage import atomic_dir
+from src.storage import data_path
+from src.storage import find_data_file
+from src.storage import iter_data_files
+from src.storage import iter_jsonl
+from src.storage import migrate_chunks
+from src.storage import migrate_dir
+from src.storage import read_json
+from src.storage import write_json
+from src.storage import write_jsonl
+
+ANIME = {"summary": {"mal_id": 1, "title": "かぐや様"}, "episodes": [{"mal_id": 1}]}
+
+
+@pytest.mark.parametrize("name", ["1.json.zst", "1.json"])
+def test_write_and_read_json_round_trip(tmp_path, name):
+    write_json(tmp_path / name, ANIME)
+    assert read_json(tmp_path / name) == ANIME
+
+
+def test_write_json_compresses(tmp_path):
+    data = {"episodes": [{"title": "Episode", "synopsis": "x" * 100}] * 50}
+    write_json(tmp_path / "1.json", data)
+    write_json(tmp_path / "1.json.zst", data)
+    assert (tmp_path / "1.json.zst").stat().st_size * 10 < (
+        tmp_path / "1.json"
+    ).stat().st_size
+
+
+@pytest.mark.parametrize("name", ["chunks.jsonl.zst", "chunks.jsonl"])
+def test_jsonl_streaming_round_trip(tmp_path, name):
+    records = ({"mal_id": i, "title": f"T{i}"} for i in range(100))
+    assert write_jsonl(tmp_path / name, records) == 100
+    stream = iter_jsonl(tmp_path / name)
+    assert next(stream) == {"mal_id": 0, "title": "T0"}
+    assert len(list(stream)) == 99
+
+
+def test_jsonl_writer_requires_context_manager(tmp_path):
+    with pytest.raises(RuntimeError):
+        JsonlWriter(tmp_path / "chunks.jsonl.zst").write({})
+
+
+def test_find_data_file_prefers_compressed(tmp_path):
+    assert find_data_file(tmp_path, "1") is None
+    write_json(tmp_path / "1.json", {"old": True})
+    assert find_data_file(tmp_path, "1") == tmp_path / "1.json"
+    write_json(data_path(tmp_path, "1"), {"old": False})
+    assert find_data_file(tmp_path, "1") == tmp_path / "1.json.zst"
+
+
+def test_iter_data_files_one_file_per_stem(tmp_path):
+    write_json(tmp_path / "1.json", {})
+    write_json(tmp_path / "1.json.zst", {})
+    write_json(tmp_path / "2.json", {})
+    assert [p.name for p in iter_data_files(tmp_path)] == ["1.json.zst", "2.json"]
+
+
+def test_migrate_dir(tmp_path):
+    (tmp_path / "1.json").write_text(json.dumps(ANIME, indent=2), encoding="utf-8")
+    (tmp_path / "2.json").write_text("{not json", encoding="utf-8")
+
+    migrated, before, after = migrate_dir(tmp_path)
+
+    assert migrated == 1
+    assert before > after > 0
+    assert not (tmp_path / "1.json").exists()
+    assert read_json(tmp_path / "1.json.zst") == ANIME
+    assert (tmp_path / "2.json").exists()  # Unreadable files are left alone
+
+
+def test_migrate_chunks(tmp_path):
+    legacy = tmp_path / "chunks.json"
+    target = tmp_path / "chunks.jsonl.zst"
+    assert migrate_chunks(legacy, target) == 0
+
+    legacy.write_text(json.dumps([{"mal_id": 1}, {"mal_id": 2}]), encoding="utf-8")
+    assert migrate_chunks(legacy, target, keep=True) == 2
+    assert list(iter_jsonl(target)) == [{"mal_id": 1}, {"mal_id": 2}]
+    assert legacy.exists()
+
+
+def test_write_jsonl_keeps_previous_file_on_error(tmp_path):
+    path = tmp_path / "chunks.jsonl.zst"
+    write_jsonl(path, [{"mal_id": 1}])
+
+    def crashing_records():
+        yield {"mal_id": 2}
+        raise KeyError("crash")
+
+    with pytest.raises(KeyError):
+        write_jsonl(path, crashing_records())
+
+    assert list(iter_jsonl(path)) == [{"mal_id": 1}]
+    assert [p.name for p in tmp_path.iterdir()] == ["chunks.jsonl.zst"]
+
+
+def test_atomic_dir_replaces_the_directory_once_written(tmp_path):
+    path = tmp_path / "store"
+    path.mkdir()
+    (path / "old.txt").write_text("old")
+
+    def crash():
+        with atomic_dir(path) as tmp:
+            (tmp / "new.txt").write_text("new")
+            raise KeyError("crash")
+
+    with pytest.raises(KeyError):
+        crash()
+    assert [p.name for p in tmp_path.iterdir()] == ["store"]
+    assert [p.name for p in path.iterdir()] == ["old.txt"]
+
+    with atomic_dir(path) as tmp:
+        (tmp / "new.txt").write_text("new")
+        assert not (path / "new.txt").exists()
+    assert [p.name for p in tmp_path.iterdir()] == ["store"]
+    assert [p.name for p in path.iterdir()] == ["new.txt"]
@@ -0,0 +1,51 @@
+import pytest
+
+from src.title_index import TitleIndex
+from src.title_index import title_tokens
+
+TITLES = [
+    ("Kaguya-sama wa Kokurasetai", 1),
+    ("Kaguya-sama: Love is War", 1),
+    ("かぐや様は告らせたい", 1),
+    ("Kaguya-sama: Love is War - Ultra Romantic", 2),
+    ("Another", 3),
+    ("Monster", 4),
+    ("Monster Musume no Iru Nichijou", 5),
+    ("K", 6),
+    ("Shingeki no Kyojin", 7),
+    ("進撃の巨人", 7),
+]
+
+
+def test_title_tokens_normalizes_width_and_splits_kana():
+    full_width = "\uff2b\uff21\uff27\uff35\uff39\uff21-sama"
+    assert title_tokens(full_width) == ["KAGUYA", "sama"]
+    assert title_tokens("進撃の巨人 2") == ["進", "撃", "の", "巨", "人", "2"]
+
+
+@pytest.mark.parametrize(
+    ("question", "mal_ids"),
+    [
+        ("What happens in kaguya-sama: love is war?", {1, 2}),  # And sequels
+        ("Is Kaguya-sama wa Kokurasetai good?", {1}),
+        ("Who is the president in Kaguya-sama?", {1, 2}),  # Start of titles
+        ("who is the president in kaguya-sama?", set()),
+        ("かぐや様は告らせたいの1話", {1}),
+        ("進撃の巨人について", {7}),
+        ("Is Another scary?", {3}),
+        ("Recommend me another anime", set()),  # Not capitalized
+        ("Another anime please", set()),  # First word of the question
+        ("Tell me about Monster Musume", {5}),  # Longest title wins
+        ("Is Monster worth it?", {4}),
+        ("What is K about?", set()),  # Too short
+        ("Compare Monster and Shingeki no Kyojin", {4, 7}),
+    ],
+)
+def test_title_index_matches_named_anime(question, mal_ids):
+    assert TitleIndex.from_aliases(TITLES).match(question) == mal_ids
+
+
+def test_title_index_ignores_questions_naming_too_many_anime(monkeypatch):
+    monkeypatch.setattr("src.title_index.TITLE_FILTER_MAX_ANIME", 1)
+
+    assert TitleIndex.from_aliases(TITLES).match("Tell me about Kaguya-sama") == set()